@@ -1,8 +1,16 @@
 import os
+import argparse
 import pandas as pd
 import json
 import time
+import perfilado
+import registro_eventos
 from emailSender import ReportEmailSender
+from bitacora_envios import BitacoraEnvios
+from clasificacion_fallos import clasificar_fallo, validar_clases
+from contactos import es_email_valido, ConfiguracionContactos
+from manifiesto import cedula_de_archivo, huella_generacion, pdfs_por_enviar, verificar_pdf
+from configuracion import DIRECTORIO_PROYECTO, cargar_config, directorio_email
 
 def mover_archivo_enviado(archivo, enviados_dir, index):
     """
@@ -10,76 +18,190 @@ def mover_archivo_enviado(archivo, enviados_dir, index):
     """
     if not os.path.exists(enviados_dir):
         os.makedirs(enviados_dir)
-    
+
     nombre_base = os.path.basename(archivo)
     nombre_con_indice = f"{index:03d}_{nombre_base}"
     ruta_destino = os.path.join(enviados_dir, nombre_con_indice)
-    
+
     try:
         os.rename(archivo, ruta_destino)
         print(f"✅ Archivo movido a: {ruta_destino}")
         return True
     except Exception as e:
         print(f"❌ Error al mover el archivo {archivo}: {e}")
+        registro_eventos.evento("email_mover", "error", cedula_de_archivo(archivo), error=e,
+                                archivo=archivo, destino=ruta_destino)
         return False
 
-# Cargar configuración
-with open("config.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
-
-# Carpeta donde están los PDFs
-base_dir = os.path.dirname(os.path.abspath(__file__))
-directorio_email = os.path.join(base_dir, "dist", "output", "email")
-
-# Crear la carpeta de enviados
-enviados_dir = os.path.join(directorio_email, "enviados")
-os.makedirs(enviados_dir, exist_ok=True)
-
-email_archivos = []
-
-# Leer archivos y extraer teléfonos
-for archivo in os.listdir(directorio_email):
-    if archivo.lower().endswith(".pdf") and "!" in archivo:
-        ruta_completa = os.path.join(directorio_email, archivo)
-        base = archivo.removesuffix(".pdf")
-        partes = base.split("!")
-        if len(partes) == 3:
-            _, _, email = partes
-            email_archivos.append([
-                email,
-                ruta_completa
-            ])
-            print(f"📂 Preparado: {email} | {ruta_completa}")
-
-print(f"\nLista final de contactos: {email_archivos}")
-
-# Pasar contactos a la clase y ejecutar
-if email_archivos:
-    email_sender = ReportEmailSender("", "", "asunto", "cuerpo")
+
+def recolectar_archivos_email(directorio_email, reportes=None):
+    """
+    Arma la lista [email, ruta, contenido, entrada] de los PDFs a enviar por
+    correo; `entrada` (archivo, sha256, tamaño, fecha) identifica la generación
+    para la bitácora. Si se reciben los registros del generador se usan
+    directamente (incluido el PDF en memoria); si no, se toman del manifiesto
+    de la carpeta.
+    """
+    email_archivos = []
+
+    if reportes is not None:
+        for r in reportes:
+            if r['canal'] == 'email':
+                entrada = {'archivo': r['ruta'], 'sha256': r.get('sha256'), 'tamano': r.get('tamano')}
+                email_archivos.append([r['email'], r['ruta'], r.get('contenido'), entrada])
+                print(f"📂 Preparado: {r['email']} | {r['ruta']}")
+        return email_archivos
+
+    # PDFs de la carpeta según su manifiesto (o escaneándola si no lo tiene)
+    for entrada in pdfs_por_enviar(directorio_email, ConfiguracionContactos.CANAL_EMAIL):
+        email = entrada['destino']
+        if not es_email_valido(email):
+            print(f"⚠️ Correo inválido, se omite: {entrada['archivo']}")
+            continue
+        email_archivos.append([email, entrada['ruta'], None, entrada])
+        print(f"📂 Preparado: {email} | {entrada['ruta']}")
+
+    return email_archivos
+
+
+def crear_bitacora_email(config):
+    """Bitácora de los envíos por correo: cada fallo queda con su clase para reenviarlo después"""
+    return BitacoraEnvios(
+        archivo=config.get('archivo_bitacora_email') or os.path.join(DIRECTORIO_PROYECTO, 'bitacora_email.db'),
+        max_intentos=config.get('max_intentos_envio')
+    )
+
+
+def _contacto_email(destinatario, ruta_archivo):
+    return {"archivo": ruta_archivo, "numero": destinatario, "nombre": os.path.basename(ruta_archivo)}
+
+
+def enviar_correos(config, email_archivos, enviados_dir):
+    """
+    Envía cada PDF a su destinatario y mueve los enviados a `enviados_dir`.
+    Con la `entrada` de cada archivo (ver `recolectar_archivos_email`) la
+    bitácora se ata a esa generación de PDFs: lo ya enviado en ella no se
+    reenvía y una generación nueva empieza una bitácora limpia. El reenvío de
+    fallos pasa solo [email, ruta, contenido] y sigue con la corrida guardada.
+    Antes de enviar, el PDF se comprueba contra el checksum de su entrada.
+    """
+    print(f"\nLista final de contactos: {[n[:2] for n in email_archivos]}")
+
+    if not email_archivos:
+        print("⚠️ No se encontraron archivos PDF válidos para enviar.")
+        return
+
+    os.makedirs(enviados_dir, exist_ok=True)
+    email_sender = ReportEmailSender(
+        config.get('email_remitente', ""),
+        config.get('email_password', ""),
+        config.get('email_asunto', "asunto"),
+        config.get('email_cuerpo', "cuerpo")
+    )
     exitosos = 0
     fallidos = 0
-    conteo_enviados = 1
+    bitacora = crear_bitacora_email(config)
+    entradas = [archivo[3] for archivo in email_archivos if len(archivo) > 3]
+    if entradas:
+        bitacora.iniciar_corrida(huella_generacion(entradas))
+    bitacora.registrar_contactos([_contacto_email(d, r) for d, r, *_ in email_archivos])
+    ya_enviados = bitacora.enviados()
+    if ya_enviados:
+        print(f"⏭️ {sum(1 for _, r, *_ in email_archivos if r in ya_enviados)} correos ya enviados en esta generación")
+        email_archivos = [archivo for archivo in email_archivos if archivo[1] not in ya_enviados]
+    conteo_enviados = bitacora.siguiente_indice(enviados_dir)
+
+    for destinatario, ruta_archivo, contenido, *entrada in perfilado.por_proveedor(email_archivos):
 
-    for n in email_archivos:
-        destinatario = n[0]
-        ruta_archivo = n[1]
-        
         print(f"\n✉️ Enviando a: {destinatario} el archivo: {os.path.basename(ruta_archivo)}")
-        
+        inicio = time.perf_counter()
+        cedula = cedula_de_archivo(ruta_archivo)
+        contacto = _contacto_email(destinatario, ruta_archivo)
+        bitacora.intentando(contacto)
+
+        problema = verificar_pdf(ruta_archivo, entrada[0]['sha256'], entrada[0]['tamano']) if entrada else None
+        if problema:
+            print(f"❌ {problema.capitalize()}, se omite: {os.path.basename(ruta_archivo)}")
+            clase = clasificar_fallo(problema)
+            registro_eventos.evento("email_enviar", "omitido", cedula, time.perf_counter() - inicio,
+                                    motivo=problema, clase=clase, destinatario=destinatario)
+            bitacora.fallido(contacto, problema, clase=clase)
+            fallidos += 1
+            continue
+
         # Asumiendo que send_mail retorna True si el envío fue exitoso, False en caso contrario.
-        if email_sender.send_mail(destinatario, ruta_archivo):
+        if email_sender.send_mail(destinatario, ruta_archivo, contenido=contenido):
             print(f"✅ Correo enviado con éxito a {destinatario}.")
+            registro_eventos.evento("email_enviar", "enviado", cedula, time.perf_counter() - inicio,
+                                    destinatario=destinatario)
             if mover_archivo_enviado(ruta_archivo, enviados_dir, conteo_enviados):
+                bitacora.enviado(contacto, conteo_enviados)
                 exitosos += 1
                 conteo_enviados += 1
             else:
+                # El correo salió: no se reenvía aunque el archivo no se haya movido
+                bitacora.enviado(contacto, conteo_enviados, "enviado, pero no se pudo mover el archivo")
                 fallidos += 1
         else:
             print(f"❌ Fallo al enviar el correo a {destinatario}.")
+            error = email_sender.ultimo_error
+            clase = clasificar_fallo(error=error)
+            registro_eventos.evento("email_enviar", "fallido", cedula, time.perf_counter() - inicio,
+                                    error=error, clase=clase, destinatario=destinatario)
+            bitacora.fallido(contacto, f"{type(error).__name__}: {error}" if error else "fallo al enviar", clase=clase)
             fallidos += 1
-            
+
     print(f"\nResumen de envío:")
     print(f"✅ Exitosos: {exitosos}")
     print(f"❌ Fallidos: {fallidos}")
-else:
-    print("⚠️ No se encontraron archivos PDF válidos para enviar.")
\ No newline at end of file
+    bitacora.resumen()
+    bitacora.cerrar()
+
+
+def reintentar_correos(config, enviados_dir, clases=None):
+    """
+    Reenvía en un solo lote los correos fallidos de las `clases` dadas (por
+    defecto las reintentables), primero los de mayor prioridad, tomándolos de
+    la bitácora en lugar de volver a recorrer la carpeta.
+    """
+    bitacora = crear_bitacora_email(config)
+    fallos = bitacora.fallos(validar_clases(clases))
+    if not fallos:
+        print("✅ No hay correos fallidos para reenviar.")
+        bitacora.resumen()
+        bitacora.cerrar()
+        return
+    bitacora.reencolar(fallos)
+    bitacora.cerrar()
+    print(f"🔁 Reenviando {len(fallos)} correos fallidos por prioridad de clase")
+    enviar_correos(config, [[f['numero'], f['archivo'], None] for f in fallos], enviados_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Envía los PDFs por correo")
+    parser.add_argument('--reintentar-fallidos', action='store_true',
+                        help="Reenvía solo los fallos reintentables de la bitácora, por prioridad")
+    parser.add_argument('--clases', nargs='+', default=None, metavar='CLASE',
+                        help="Con --reintentar-fallidos, reenvía estas clases de fallo en lugar de las reintentables")
+    perfilado.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    # Cargar configuración
+    config = cargar_config()
+
+    # Carpeta donde están los PDFs
+    directorio = directorio_email(config)
+
+    # Crear la carpeta de enviados
+    enviados_dir = os.path.join(directorio, "enviados")
+
+    with registro_eventos.corrida(config, directorio), \
+            perfilado.corrida(args.profile, directorio, args.profile_cada):
+        if args.reintentar_fallidos:
+            with perfilado.etapa('enviar_correos'):
+                reintentar_correos(config, enviados_dir, args.clases)
+        else:
+            with perfilado.etapa('recolectar_archivos'):
+                email_archivos = recolectar_archivos_email(directorio)
+            with perfilado.etapa('enviar_correos'):
+                enviar_correos(config, email_archivos, enviados_dir)
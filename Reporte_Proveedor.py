@@ -12,8 +12,21 @@ Fecha: 2025
 import pandas as pd
 from fpdf import FPDF, XPos, YPos
 import os
+import io
 import math
-from typing import Dict, List, Any, Optional
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Union
+from configuracion import DIRECTORIO_SALIDA
+from contactos import normalizar_contactos, clave_cedula, ConfiguracionContactos
+from manifiesto import registro_manifiesto, escribir_manifiestos
+from escritura_atomica import EscritorAtomico
+from lector_liquidacion import LectorLiquidacion
+import perfilado
+import registro_eventos
+from fuentes_datos import (FuenteDatos, FuenteExcel, TABLA_LIQUIDACION, TABLA_BD_PRO,
+                           TABLA_CERTIFICACIONES, TABLA_CONTACTOS)
 
 class ConfiguracionReporte:
     """Configuración centralizada para el reporte PDF"""
@@ -40,9 +53,16 @@ class ConfiguracionReporte:
     # Rutas
     DIRECTORIO_SALIDA_TEL = 'output/tel'
     DIRECTORIO_SALIDA_EMAIL = 'output/email'
-    DIRECTORIO_SALIDA = 'output'
+    DIRECTORIO_SALIDA = DIRECTORIO_SALIDA
+    ARCHIVO_CONTACTOS_RECHAZADOS = 'contactos_rechazados.csv'
+    ARCHIVO_IMPRESION_CONSOLIDADO = 'impresion_consolidado.pdf'
     RUTA_LOGO = './logo.png'
     
+    # Logo en modo de tamaño optimizado: se escala a su ancho impreso y se recomprime
+    ANCHO_LOGO_MM = 30
+    DPI_LOGO = 150
+    CALIDAD_JPEG_LOGO = 85
+    
     # Información de la empresa (valores por defecto - ahora se pueden sobrescribir)
     EMPRESA_NIT = '800.176.428-6'
     EMPRESA_NOMBRE = 'COMERCIALIZADORA INTERNACIONAL CARIBBEAN EXOTICS S. A.'
@@ -98,35 +118,121 @@ class UtilFormato:
         return "0.00%"
 
 
+@dataclass(slots=True)
+class RegistroProveedor:
+    """
+    Datos de un proveedor listos para dibujar, sin objetos de pandas: las filas
+    del detalle ya formateadas como tuplas de textos y los totales como números.
+    Se arma una vez por proveedor y es barato de copiar a otro proceso.
+    """
+    cedula: str
+    nombre: str
+    filas: Tuple[Tuple[str, ...], ...]
+    total_bruto: float
+    total_rete_fuente: float
+    total_fondo_hortifru: float
+    descuento_2500: float
+    otros_descuentos: float
+    
+    @classmethod
+    def desde_dataframe(cls, datos: pd.DataFrame) -> 'RegistroProveedor':
+        """Convierte las filas (ya limpias) de un proveedor, columna por columna"""
+        cantidad = len(datos)
+        
+        def columna(nombre: str, defecto: Any = 0) -> List[Any]:
+            return datos[nombre].tolist() if nombre in datos.columns else [defecto] * cantidad
+        
+        def suma(nombre: str) -> float:
+            return datos.get(nombre, pd.Series([0])).sum().item()
+        
+        moneda = UtilFormato.formatear_moneda
+        numero = UtilFormato.formatear_numero
+        frutas = columna('FRUTA', '')
+        fechas = columna('FCHA INGRESO', '')
+        kilos = columna('KILOS RECIBIDOS', 1)
+        kg_exp, kg_nal, kg_ave = columna('KG. EXP'), columna('KG. NAL'), columna('KG. AVE')
+        precio_exp, precio_nal, precio_ave = columna('PRECIO EXP'), columna('PRECIO NAL'), columna('PRECIO AVE')
+        bruto, rete, fondo = columna('TOTAL BRUTO'), columna('RETE FUENTE'), columna('FONDO HORTIFRU')
+        
+        filas = tuple(
+            (
+                str(frutas[i]),
+                UtilFormato.formatear_fecha(fechas[i]),
+                numero(kilos_fila),
+                UtilFormato.formatear_porcentaje(kg_exp[i], kilos_fila),
+                numero(kg_exp[i]),
+                numero(kg_nal[i]),
+                numero(kg_ave[i]),
+                moneda(precio_exp[i]),
+                moneda(precio_nal[i]),
+                moneda(precio_ave[i]),
+                moneda(bruto[i]),
+                moneda(rete[i]),
+                moneda(fondo[i]),
+                # VALOR TOTAL: TOTAL BRUTO - RETE FUENTE - FONDO HORTIFRU
+                moneda(bruto[i] - rete[i] - fondo[i]),
+            )
+            for i, kilos_fila in enumerate(kilos)
+        )
+        return cls(
+            cedula=str(datos['CEDULA'].iloc[0]),
+            nombre=str(datos['NOMBRE'].iloc[0]),
+            filas=filas,
+            total_bruto=suma('TOTAL BRUTO'),
+            total_rete_fuente=suma('RETE FUENTE'),
+            total_fondo_hortifru=suma('FONDO HORTIFRU'),
+            descuento_2500=suma('D 2500'),
+            otros_descuentos=suma('DES ANALISIS'),
+        )
+    
+    @property
+    def subtotal(self) -> float:
+        return self.total_bruto - self.total_rete_fuente - self.total_fondo_hortifru
+
+
 class GestorDatos:
     """Clase para gestionar la carga y procesamiento de datos desde Excel"""
     
-    def __init__(self, archivo_excel: str):
+    def __init__(self, archivo_excel: str, streaming: bool = False, tamano_bloque: Optional[int] = None,
+                 fuente: Optional[FuenteDatos] = None):
+        """
+        Args:
+            archivo_excel: Ruta del libro de Excel
+            streaming: Si es True, 'BD LIQUIDACION' se lee por bloques y se vuelca a disco
+                (ver LectorLiquidacion); los proveedores se entregan uno a la vez
+            tamano_bloque: Filas por bloque en modo streaming
+            fuente: De dónde salen las tablas (ver fuentes_datos); por defecto el libro de Excel
+        """
         self.archivo_excel = archivo_excel
+        self.fuente = fuente or FuenteExcel(archivo_excel)
+        if streaming and not isinstance(self.fuente, FuenteExcel):
+            print(f"⚠️ La lectura por bloques solo aplica al libro de Excel; se carga {self.fuente} completo.")
+            streaming = False
+        self.streaming = streaming
+        self.lector = LectorLiquidacion(archivo_excel, tamano_bloque=tamano_bloque) if streaming else None
         self.df_liquidacion = pd.DataFrame()
         self.df_cer_fl_gl = pd.DataFrame()
         self.df_liquidacion = None
         self.df_bd_pro = None
         self.df_cer_fl_gl = None
         self.df_tel_email = None  # NUEVA HOJA PARA TELÉFONOS
+        self.df_contactos = None  # Contactos normalizados por cédula
+        self.df_contactos_rechazados = None
         
     def cargar_datos(self):
-        """Carga todos los datos necesarios desde el archivo Excel"""
+        """Carga todos los datos necesarios desde la fuente (por defecto el archivo Excel)"""
         try:
-            # Cargar hoja principal BD LIQUIDACION
-            self.df_liquidacion = pd.read_excel(
-                self.archivo_excel, 
-                sheet_name='BD LIQUIDACION'
-            )
-            
-            self.df_liquidacion.columns = self.df_liquidacion.columns.str.strip()
+            # Cargar hoja principal BD LIQUIDACION (en modo streaming solo se vuelca a disco)
+            if self.streaming:
+                self.lector.cargar()
+            else:
+                self.df_liquidacion = self.fuente.leer(TABLA_LIQUIDACION)
+                
+                self.df_liquidacion.columns = self.df_liquidacion.columns.str.strip()
             
             # Cargar hoja BD PRO para direcciones
             try:
-                self.df_bd_pro = pd.read_excel(
-                    self.archivo_excel, 
-                    sheet_name='BD PRO'
-                )
+                self.df_bd_pro = self.fuente.leer(TABLA_BD_PRO)
                 self.df_bd_pro.columns = self.df_bd_pro.columns.str.strip()
                 print("Columnas de 'BD PRO':", self.df_bd_pro.columns)
             except ValueError:
@@ -135,10 +241,7 @@ class GestorDatos:
             
             # Cargar hoja CER FL GL para certificaciones
             try:
-                self.df_cer_fl_gl = pd.read_excel(
-                    self.archivo_excel, 
-                    sheet_name='CER FL GL'
-                )
+                self.df_cer_fl_gl = self.fuente.leer(TABLA_CERTIFICACIONES)
                 
                 self.df_cer_fl_gl.columns = self.df_cer_fl_gl.columns.str.strip()
                 
@@ -149,28 +252,32 @@ class GestorDatos:
                 
             # Cargar hoja INFO PRO para TELEFONOS Y CORREOS
             try:
-                self.df_tel_email = pd.read_excel(
-                    self.archivo_excel, 
-                    sheet_name='INFO PRO'
-                )
+                self.df_tel_email = self.fuente.leer(TABLA_CONTACTOS)
                 self.df_tel_email.columns = self.df_tel_email.columns.str.strip()
                 print("Columnas de 'INFO PRO':", self.df_tel_email.columns)
             except ValueError:
                 print("⚠️ Advertencia: No se encontró la hoja 'INFO PRO'. Se usará dirección por defecto.")
-                self.df_bd_pro = pd.DataFrame()
+                self.df_tel_email = pd.DataFrame()
+            
+            # Normalizar teléfonos y correos una sola vez para toda la corrida
+            self.df_contactos, self.df_contactos_rechazados = normalizar_contactos(self.df_tel_email)
             
-            return self._limpiar_datos()
+            if self.streaming:
+                return None
+            self.df_liquidacion = self._limpiar_datos(self.df_liquidacion)
+            return self.df_liquidacion
             
         except FileNotFoundError:
-            raise FileNotFoundError(f"El archivo '{self.archivo_excel}' no se encontró.")
+            raise FileNotFoundError(f"El archivo '{self.fuente.ruta}' no se encontró.")
         except ValueError as e:
             raise ValueError(f"Error al cargar datos: {str(e)}")
     
-    def _limpiar_datos(self):
-        """Limpia y prepara los datos para el procesamiento"""
+    @staticmethod
+    def _limpiar_datos(df_liquidacion: pd.DataFrame) -> pd.DataFrame:
+        """Limpia y prepara los datos para el procesamiento (la hoja completa o un proveedor)"""
         # Limpiar datos principales
-        self.df_liquidacion['NOMBRE'] = self.df_liquidacion['NOMBRE'].fillna('Sin Nombre')
-        self.df_liquidacion['CEDULA'] = self.df_liquidacion['CEDULA'].fillna('000000')
+        df_liquidacion['NOMBRE'] = df_liquidacion['NOMBRE'].fillna('Sin Nombre')
+        df_liquidacion['CEDULA'] = df_liquidacion['CEDULA'].fillna('000000')
         
         # Asegurar que las columnas numéricas estén correctas
         columnas_numericas = [
@@ -181,12 +288,36 @@ class GestorDatos:
         ]
         
         for col in columnas_numericas:
-            if col in self.df_liquidacion.columns:
-                self.df_liquidacion[col] = pd.to_numeric(
-                    self.df_liquidacion[col], errors='coerce'
+            if col in df_liquidacion.columns:
+                df_liquidacion[col] = pd.to_numeric(
+                    df_liquidacion[col], errors='coerce'
                 ).fillna(0)
         
-        return self.df_liquidacion
+        return df_liquidacion
+    
+    def total_proveedores(self) -> int:
+        """Cantidad de cédulas distintas en la liquidación"""
+        if self.streaming:
+            return self.lector.total_proveedores
+        if self.df_liquidacion is None or self.df_liquidacion.empty:
+            return 0
+        return self.df_liquidacion['CEDULA'].nunique()
+    
+    def proveedores(self):
+        """(cédula, filas del proveedor) ordenados por cédula, ya limpios"""
+        if self.streaming:
+            for cedula, datos_cliente in self.lector.grupos():
+                yield cedula, self._limpiar_datos(datos_cliente)
+        elif self.df_liquidacion is not None:
+            yield from self.df_liquidacion.groupby('CEDULA')
+    
+    def guardar_contactos_rechazados(self, ruta_csv: str):
+        """Guarda en CSV los teléfonos y correos descartados en la normalización"""
+        if self.df_contactos_rechazados is None:
+            return
+        os.makedirs(os.path.dirname(ruta_csv) or '.', exist_ok=True)
+        self.df_contactos_rechazados.to_csv(ruta_csv, index=False, encoding='utf-8-sig')
+        print(f"📋 Contactos rechazados: {len(self.df_contactos_rechazados)} (ver {ruta_csv})")
     
     def obtener_info_cliente(self, cedula: str) -> Dict[str, Any]:
         """Obtiene información completa del cliente desde BD PRO"""
@@ -194,7 +325,9 @@ class GestorDatos:
             'direccion': '',  # Por defecto
             'municipio': '',
             'telefono': '',
-            'email': ''
+            'telefono_e164': '',
+            'email': '',
+            'canal': ConfiguracionContactos.CANAL_IMPRESION
         }
         
         if not self.df_bd_pro.empty and cedula:
@@ -212,25 +345,10 @@ class GestorDatos:
                     info['municipio'] = str(fila['Ciudad'])
                     
                     
-        if not self.df_tel_email.empty and cedula:
-            telefono_info = self.df_tel_email[
-                self.df_tel_email['CEDULA'].astype(str) == str(cedula)
-            ]
-            
-            if not telefono_info.empty:
-                fila_tel = telefono_info.iloc[0]
-                if 'WHATSAPP' in telefono_info.columns and pd.notna(fila_tel['WHATSAPP'] and fila_tel['WHATSAPP'] != '0' and fila_tel['WHATSAPP'] != 0):
-                    info['telefono'] = str(fila_tel['WHATSAPP'])
-                    
-        if not self.df_tel_email.empty and cedula:
-            telefono_info = self.df_tel_email[
-                self.df_tel_email['CEDULA'].astype(str) == str(cedula)
-            ]
-            
-            if not telefono_info.empty:
-                fila_tel = telefono_info.iloc[0]
-                if 'EMAIL 1' in telefono_info.columns and pd.notna(fila_tel['EMAIL 1'] and fila_tel['EMAIL 1'] != '0' and fila_tel['EMAIL 1'] != 0):
-                    info['email'] = str(fila_tel['EMAIL 1'])
+        if self.df_contactos is not None and cedula:
+            clave = clave_cedula(cedula)
+            if clave in self.df_contactos.index:
+                info.update(self.df_contactos.loc[clave].to_dict())
         
         return info
     
@@ -282,6 +400,81 @@ class GestorDatos:
         
         return certificaciones
     
+class PlantillaReporte:
+    """
+    Disposición de las partes fijas del reporte, calculada una vez por corrida.
+    
+    El encabezado, el pie, la mitad de la empresa en la información del cliente
+    (COMPRADOR / NIT EMPRESA / DIRECCIÓN EMPRESA) y la tabla de detalle son
+    iguales para todos los proveedores: solo dependen de la empresa y del
+    subtítulo. Aquí se miden una sola vez (posiciones, anchos, altos y líneas de
+    cada texto fijo) y cada documento las reutiliza en cada página; por reporte
+    solo se mide lo propio del proveedor.
+    """
+    
+    def __init__(self, empresa_nombre: str, empresa_nit: str, empresa_direccion: str, subtitle: str):
+        medidor = FPDF(ConfiguracionReporte.ORIENTACION, ConfiguracionReporte.UNIDAD, ConfiguracionReporte.FORMATO)
+        medidor.set_margins(
+            ConfiguracionReporte.MARGEN_LATERAL,
+            ConfiguracionReporte.MARGEN_VERTICAL,
+            ConfiguracionReporte.MARGEN_LATERAL
+        )
+        
+        # Encabezado: el subtítulo se centra con la fuente del título, como siempre se ha dibujado
+        medidor.set_font('Helvetica', 'B', 16)
+        self.titulo = 'DOCUMENTO FACTURA DE COMPRA'
+        self.x_titulo = medidor.w / 2 - medidor.get_string_width(self.titulo) / 2
+        self.x_subtitulo = medidor.w / 2 - medidor.get_string_width(subtitle) / 2
+        
+        # Información del cliente: columnas y textos de la empresa
+        ancho_total = medidor.w - medidor.l_margin - medidor.r_margin
+        self.ancho_izquierda = ancho_total * 0.4
+        self.ancho_derecha = ancho_total * 0.4
+        self.ancho_etiqueta_izq = self.ancho_izquierda * 0.35
+        self.ancho_valor_izq = self.ancho_izquierda * 0.65
+        self.ancho_etiqueta_der = self.ancho_derecha * 0.35
+        self.ancho_valor_der = self.ancho_derecha * 0.65
+        
+        medidor.set_font('Helvetica', '', 10)
+        self.lineas_empresa = {
+            texto: self._lineas(medidor, texto, self.ancho_valor_der)
+            for texto in (empresa_nombre, empresa_nit, empresa_direccion)
+        }
+        medidor.set_font('Helvetica', 'B', 10)
+        etiquetas_izq = ('NOMBRE / RAZÓN SOCIAL', 'CÉDULA / NIT', 'DIRECCIÓN', 'MUNICIPIO')
+        etiquetas_der = ('COMPRADOR', 'NIT EMPRESA', 'DIRECCIÓN EMPRESA', 'CELULAR')
+        self.lineas_etiquetas = {texto: self._lineas(medidor, texto, self.ancho_etiqueta_izq) for texto in etiquetas_izq}
+        self.lineas_etiquetas.update({texto: self._lineas(medidor, texto, self.ancho_etiqueta_der) for texto in etiquetas_der})
+        
+        # Tabla de detalle
+        self.anchos_columnas = [prop * ancho_total for prop in ConfiguracionReporte.PROPORCIONES_COLUMNAS]
+        self.x_columnas = [sum(self.anchos_columnas[:i]) for i in range(len(self.anchos_columnas))]
+        self.altura_encabezados = max(
+            len(encabezado.split('\n')) * ConfiguracionReporte.ALTURA_LINEA
+            for encabezado in ConfiguracionReporte.ENCABEZADOS_TABLA
+        )
+        self.alturas_celdas_encabezado = [
+            self.altura_encabezados / len(encabezado.split('\n'))
+            for encabezado in ConfiguracionReporte.ENCABEZADOS_TABLA
+        ]
+    
+    @staticmethod
+    def _lineas(medidor: FPDF, texto: str, ancho: float) -> int:
+        """Líneas que ocupa el texto en el ancho dado, con la fuente actual del medidor"""
+        if not texto:
+            return 1
+        return max(1, math.ceil(medidor.get_string_width(texto) / ancho))
+    
+    def altura_empresa(self, texto: str) -> float:
+        return self.lineas_empresa[texto] * ConfiguracionReporte.ALTURA_LINEA
+
+
+@lru_cache(maxsize=None)
+def obtener_plantilla(empresa_nombre: str, empresa_nit: str, empresa_direccion: str, subtitle: str) -> PlantillaReporte:
+    """Plantilla compartida por todos los reportes de la corrida con los mismos datos de empresa"""
+    return PlantillaReporte(empresa_nombre, empresa_nit, empresa_direccion, subtitle)
+
+
 class ReporteProveedor(FPDF):
     """
     Clase principal para generar reportes de facturación en PDF
@@ -290,8 +483,12 @@ class ReporteProveedor(FPDF):
     para generar reportes de compra con formato personalizado.
     """
     
+    # Logo preparado para el modo de tamaño optimizado (se calcula una vez por proceso)
+    _logo_optimizado: Optional[bytes] = None
+    
     def __init__(self, nit_empresa: Optional[str] = None, nombre_empresa: Optional[str] = None, 
-                 direccion_empresa: Optional[str] = None, subtitle: Optional[str] = None):
+                 direccion_empresa: Optional[str] = None, subtitle: Optional[str] = None,
+                 optimizar_tamano: bool = False, crear_directorios: bool = True):
         """
         Inicializa el generador de reportes con configuración dinámica de empresa
         
@@ -299,6 +496,9 @@ class ReporteProveedor(FPDF):
             nit_empresa: NIT de la empresa (opcional)
             nombre_empresa: Nombre de la empresa (opcional)
             direccion_empresa: Dirección de la empresa (opcional)
+            optimizar_tamano: Usa el logo reducido y recomprimido (los flujos ya van
+                comprimidos siempre: es el valor por defecto de fpdf2)
+            crear_directorios: False cuando ya se aseguraron (ver FabricaReportes)
         """
         super().__init__(
             ConfiguracionReporte.ORIENTACION, 
@@ -311,11 +511,16 @@ class ReporteProveedor(FPDF):
         self.empresa_nombre = nombre_empresa or ConfiguracionReporte.EMPRESA_NOMBRE
         self.empresa_direccion = direccion_empresa or ConfiguracionReporte.EMPRESA_DIRECCION
         self.subtitle = subtitle
+        self.optimizar_tamano = optimizar_tamano
+        self.plantilla = obtener_plantilla(self.empresa_nombre, self.empresa_nit, self.empresa_direccion, subtitle or '')
         
         self._configurar_pdf()
-        self._crear_directorio_salida()
+        if crear_directorios:
+            self._crear_directorio_salida()
         self.certificacion_flo = ""
         self.certificacion_gap = ""
+        # Primera página del proveedor actual: en un consolidado la numeración se reinicia por proveedor
+        self._pagina_inicial = 1
         self.DIRECTORIO_SALIDA = ConfiguracionReporte.DIRECTORIO_SALIDA
         self.DIRECTORIO_SALIDA_EMAIL = ConfiguracionReporte.DIRECTORIO_SALIDA_EMAIL
         self.DIRECTORIO_SALIDA_TEL = ConfiguracionReporte.DIRECTORIO_SALIDA_TEL
@@ -332,7 +537,8 @@ class ReporteProveedor(FPDF):
             ConfiguracionReporte.MARGEN_LATERAL
         )
     
-    def _crear_directorio_salida(self):
+    @staticmethod
+    def _crear_directorio_salida():
         """Crea el directorio de salida si no existe"""
         os.makedirs(ConfiguracionReporte.DIRECTORIO_SALIDA, exist_ok=True)
         os.makedirs(ConfiguracionReporte.DIRECTORIO_SALIDA_TEL, exist_ok=True)
@@ -349,18 +555,38 @@ class ReporteProveedor(FPDF):
         """Agrega el logo de la empresa al encabezado"""
         if os.path.exists(ConfiguracionReporte.RUTA_LOGO):
             self.image(
-                ConfiguracionReporte.RUTA_LOGO, 
-                x=10, y=0, w=30
+                io.BytesIO(self._obtener_logo_optimizado()) if self.optimizar_tamano else ConfiguracionReporte.RUTA_LOGO,
+                x=10, y=0, w=ConfiguracionReporte.ANCHO_LOGO_MM
             )
     
+    @classmethod
+    def _obtener_logo_optimizado(cls) -> bytes:
+        """
+        Logo reducido a los píxeles que ocupa impreso (ANCHO_LOGO_MM a DPI_LOGO),
+        con la transparencia aplanada sobre blanco y recomprimido como JPEG.
+        """
+        if cls._logo_optimizado is None:
+            from PIL import Image
+            
+            imagen = Image.open(ConfiguracionReporte.RUTA_LOGO)
+            ancho_px = math.ceil(ConfiguracionReporte.ANCHO_LOGO_MM / 25.4 * ConfiguracionReporte.DPI_LOGO)
+            if imagen.width > ancho_px:
+                imagen = imagen.resize((ancho_px, round(imagen.height * ancho_px / imagen.width)), Image.LANCZOS)
+            imagen = imagen.convert('RGBA')
+            fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+            fondo.paste(imagen, mask=imagen.getchannel('A'))
+            
+            salida = io.BytesIO()
+            fondo.save(salida, 'JPEG', quality=ConfiguracionReporte.CALIDAD_JPEG_LOGO, optimize=True)
+            cls._logo_optimizado = salida.getvalue()
+        return cls._logo_optimizado
+    
     def _agregar_titulo_principal(self):
         """Agrega el título principal del documento"""
         self.set_font('Helvetica', 'B', 16)
-        titulo = 'DOCUMENTO FACTURA DE COMPRA'
-        x_posicion = self.w / 2 - self.get_string_width(titulo) / 2
-        self.set_x(x_posicion)
+        self.set_x(self.plantilla.x_titulo)
         self.cell(
-            90, 10, titulo, 
+            90, 10, self.plantilla.titulo, 
             align='C', 
             new_x=XPos.CENTER, 
             new_y=YPos.NEXT
@@ -369,8 +595,7 @@ class ReporteProveedor(FPDF):
     def _agregar_subtitulo(self):
         """Agrega el subtítulo del documento"""
         subtitle = self.subtitle
-        x_posicion = self.w / 2 - self.get_string_width(subtitle) / 2
-        self.set_x(x_posicion)
+        self.set_x(self.plantilla.x_subtitulo)
         self.set_font('Helvetica', '', 12)
         self.cell(
             90, 10, subtitle,
@@ -384,7 +609,7 @@ class ReporteProveedor(FPDF):
         self.set_y(-15)
         self.set_font('Helvetica', 'I', 8)
         self.cell(
-            0, 10, f'Página {self.page_no()}',
+            0, 10, f'Página {self.page_no() - self._pagina_inicial + 1}',
             align='C', 
             new_x=XPos.LMARGIN, 
             new_y=YPos.NEXT
@@ -426,20 +651,41 @@ class ReporteProveedor(FPDF):
         
         self.set_y(-15)
     
+    def agregar_proveedor(self, datos_cliente: Union[RegistroProveedor, pd.DataFrame], info_adicional: Dict[str, Any],
+                          certificaciones: Dict[str, str], marcador: Optional[str] = None) -> int:
+        """
+        Agrega las páginas de un proveedor a partir de una página nueva.
+        Retorna el número de su primera página dentro del documento.
+        
+        Args:
+            datos_cliente: Registro del proveedor (o sus filas, que se convierten aquí)
+            marcador: Título de su entrada en el índice (outline) del PDF, si se desea
+        """
+        if isinstance(datos_cliente, pd.DataFrame):
+            datos_cliente = RegistroProveedor.desde_dataframe(datos_cliente)
+        self.add_page()
+        self._pagina_inicial = self.page_no()
+        if marcador:
+            self.start_section(marcador)
+        self.establecer_certificacion(certificaciones)
+        self.agregar_informacion_cliente(datos_cliente, info_adicional)
+        self.agregar_tabla_detalle(datos_cliente)
+        self.agregar_tabla_resumen_y_cert(datos_cliente)
+        return self._pagina_inicial
+
     def establecer_certificacion(self, certificaciones: Dict[str, str]):
         """Establece los textos de certificación para mostrar en el footer"""
         self.certificacion_flo = certificaciones.get('flo', '')
         self.certificacion_gap = certificaciones.get('gap', '')
     
-    def agregar_informacion_cliente(self, datos_cliente: pd.DataFrame, info_adicional: Dict[str, Any]):
+    def agregar_informacion_cliente(self, datos_cliente: RegistroProveedor, info_adicional: Dict[str, Any]):
         """
         Agrega la información del cliente al reporte con formato mejorado
         """
         self._configurar_colores_info()
         
-        ancho_total = self.w - self.l_margin - self.r_margin
-        ancho_izquierda = ancho_total * 0.4
-        ancho_derecha = ancho_total * 0.4
+        ancho_izquierda = self.plantilla.ancho_izquierda
+        ancho_derecha = self.plantilla.ancho_derecha
         
         self._agregar_fila_nombre_comprador_mejorada(datos_cliente, ancho_izquierda, ancho_derecha)
         self._agregar_fila_cedulas_mejorada(datos_cliente, ancho_izquierda, ancho_derecha)
@@ -455,63 +701,65 @@ class ReporteProveedor(FPDF):
         self.set_fill_color(*ConfiguracionReporte.COLOR_ENCABEZADO)
         self.set_text_color(0)
     
-    def _agregar_fila_nombre_comprador_mejorada(self, datos_cliente: pd.DataFrame, ancho_izq: float, ancho_der: float):
+    def _agregar_fila_nombre_comprador_mejorada(self, datos_cliente: RegistroProveedor, ancho_izq: float, ancho_der: float):
         """Agrega la fila con nombre del cliente y comprador con formato mejorado"""
         y_inicio = self.get_y()
         x_inicio = self.get_x()
         
         # Usar la información dinámica de la empresa
         comprador_text = self.empresa_nombre
-        nombre_cliente = str(datos_cliente.iloc[0]['NOMBRE'])
+        nombre_cliente = datos_cliente.nombre
         
-        ancho_etiqueta_izq = ancho_izq * 0.35
-        ancho_valor_izq = ancho_izq * 0.65
-        ancho_etiqueta_der = ancho_der * 0.35
-        ancho_valor_der = ancho_der * 0.65
+        ancho_etiqueta_izq = self.plantilla.ancho_etiqueta_izq
+        ancho_valor_izq = self.plantilla.ancho_valor_izq
+        ancho_etiqueta_der = self.plantilla.ancho_etiqueta_der
+        ancho_valor_der = self.plantilla.ancho_valor_der
         
         self.set_font('Helvetica', '', 10)
         altura_cliente = self._calcular_altura_texto(nombre_cliente, ancho_valor_izq)
-        altura_comprador = self._calcular_altura_texto(comprador_text, ancho_valor_der)
+        altura_comprador = self.plantilla.altura_empresa(comprador_text)
         altura_total = max(altura_cliente, altura_comprador, 8)
         
         self.set_xy(x_inicio, y_inicio)
-        self._crear_celda_con_altura_fija('NOMBRE / RAZÓN SOCIAL', ancho_etiqueta_izq, altura_total, es_etiqueta=True)
+        self._crear_celda_con_altura_fija('NOMBRE / RAZÓN SOCIAL', ancho_etiqueta_izq, altura_total, es_etiqueta=True, lineas=self.plantilla.lineas_etiquetas['NOMBRE / RAZÓN SOCIAL'])
         self._crear_celda_con_altura_fija(nombre_cliente, ancho_valor_izq, altura_total, es_etiqueta=False)
         
         x_derecha = x_inicio + ancho_izq + 5
         self.set_xy(x_derecha, y_inicio)
-        self._crear_celda_con_altura_fija('COMPRADOR', ancho_etiqueta_der, altura_total, es_etiqueta=True)
-        self._crear_celda_con_altura_fija(comprador_text, ancho_valor_der, altura_total, es_etiqueta=False)
+        self._crear_celda_con_altura_fija('COMPRADOR', ancho_etiqueta_der, altura_total, es_etiqueta=True, lineas=self.plantilla.lineas_etiquetas['COMPRADOR'])
+        self._crear_celda_con_altura_fija(comprador_text, ancho_valor_der, altura_total, es_etiqueta=False,
+                                          lineas=self.plantilla.lineas_empresa[comprador_text])
         
         self.set_xy(x_inicio, y_inicio + altura_total + 2)
     
-    def _agregar_fila_cedulas_mejorada(self, datos_cliente: pd.DataFrame, ancho_izq: float, ancho_der: float):
+    def _agregar_fila_cedulas_mejorada(self, datos_cliente: RegistroProveedor, ancho_izq: float, ancho_der: float):
         """Agrega la fila con cédulas/NIT con formato mejorado"""
         y_inicio = self.get_y()
         x_inicio = self.get_x()
         
-        cedula_cliente = str(datos_cliente.iloc[0]['CEDULA'])
+        cedula_cliente = datos_cliente.cedula
         # Usar el NIT dinámico de la empresa
         nit_empresa = self.empresa_nit
         
-        ancho_etiqueta_izq = ancho_izq * 0.35
-        ancho_valor_izq = ancho_izq * 0.65
-        ancho_etiqueta_der = ancho_der * 0.35
-        ancho_valor_der = ancho_der * 0.65
+        ancho_etiqueta_izq = self.plantilla.ancho_etiqueta_izq
+        ancho_valor_izq = self.plantilla.ancho_valor_izq
+        ancho_etiqueta_der = self.plantilla.ancho_etiqueta_der
+        ancho_valor_der = self.plantilla.ancho_valor_der
         
         self.set_font('Helvetica', '', 10)
         altura_cedula = self._calcular_altura_texto(cedula_cliente, ancho_valor_izq)
-        altura_nit = self._calcular_altura_texto(nit_empresa, ancho_valor_der)
+        altura_nit = self.plantilla.altura_empresa(nit_empresa)
         altura_total = max(altura_cedula, altura_nit, 8)
         
         self.set_xy(x_inicio, y_inicio)
-        self._crear_celda_con_altura_fija('CÉDULA / NIT', ancho_etiqueta_izq, altura_total, es_etiqueta=True)
+        self._crear_celda_con_altura_fija('CÉDULA / NIT', ancho_etiqueta_izq, altura_total, es_etiqueta=True, lineas=self.plantilla.lineas_etiquetas['CÉDULA / NIT'])
         self._crear_celda_con_altura_fija(cedula_cliente, ancho_valor_izq, altura_total, es_etiqueta=False)
         
         x_derecha = x_inicio + ancho_izq + 5
         self.set_xy(x_derecha, y_inicio)
-        self._crear_celda_con_altura_fija('NIT EMPRESA', ancho_etiqueta_der, altura_total, es_etiqueta=True)
-        self._crear_celda_con_altura_fija(nit_empresa, ancho_valor_der, altura_total, es_etiqueta=False)
+        self._crear_celda_con_altura_fija('NIT EMPRESA', ancho_etiqueta_der, altura_total, es_etiqueta=True, lineas=self.plantilla.lineas_etiquetas['NIT EMPRESA'])
+        self._crear_celda_con_altura_fija(nit_empresa, ancho_valor_der, altura_total, es_etiqueta=False,
+                                          lineas=self.plantilla.lineas_empresa[nit_empresa])
         
         self.set_xy(x_inicio, y_inicio + altura_total + 2)
     
@@ -524,24 +772,25 @@ class ReporteProveedor(FPDF):
         # Usar la dirección dinámica de la empresa
         direccion_empresa = self.empresa_direccion
         
-        ancho_etiqueta_izq = ancho_izq * 0.35
-        ancho_valor_izq = ancho_izq * 0.65
-        ancho_etiqueta_der = ancho_der * 0.35
-        ancho_valor_der = ancho_der * 0.65
+        ancho_etiqueta_izq = self.plantilla.ancho_etiqueta_izq
+        ancho_valor_izq = self.plantilla.ancho_valor_izq
+        ancho_etiqueta_der = self.plantilla.ancho_etiqueta_der
+        ancho_valor_der = self.plantilla.ancho_valor_der
         
         self.set_font('Helvetica', '', 10)
         altura_dir_cliente = self._calcular_altura_texto(direccion_cliente, ancho_valor_izq)
-        altura_dir_empresa = self._calcular_altura_texto(direccion_empresa, ancho_valor_der)
+        altura_dir_empresa = self.plantilla.altura_empresa(direccion_empresa)
         altura_total = max(altura_dir_cliente, altura_dir_empresa, 8)
         
         self.set_xy(x_inicio, y_inicio)
-        self._crear_celda_con_altura_fija('DIRECCIÓN', ancho_etiqueta_izq, altura_total, es_etiqueta=True)
+        self._crear_celda_con_altura_fija('DIRECCIÓN', ancho_etiqueta_izq, altura_total, es_etiqueta=True, lineas=self.plantilla.lineas_etiquetas['DIRECCIÓN'])
         self._crear_celda_con_altura_fija(direccion_cliente, ancho_valor_izq, altura_total, es_etiqueta=False)
         
         x_derecha = x_inicio + ancho_izq + 5
         self.set_xy(x_derecha, y_inicio)
-        self._crear_celda_con_altura_fija('DIRECCIÓN EMPRESA', ancho_etiqueta_der, altura_total, es_etiqueta=True)
-        self._crear_celda_con_altura_fija(direccion_empresa, ancho_valor_der, altura_total, es_etiqueta=False)
+        self._crear_celda_con_altura_fija('DIRECCIÓN EMPRESA', ancho_etiqueta_der, altura_total, es_etiqueta=True, lineas=self.plantilla.lineas_etiquetas['DIRECCIÓN EMPRESA'])
+        self._crear_celda_con_altura_fija(direccion_empresa, ancho_valor_der, altura_total, es_etiqueta=False,
+                                          lineas=self.plantilla.lineas_empresa[direccion_empresa])
         
         self.set_xy(x_inicio, y_inicio + altura_total + 2)
     
@@ -556,10 +805,10 @@ class ReporteProveedor(FPDF):
         if not municipio and not telefono:
             return
         
-        ancho_etiqueta_izq = ancho_izq * 0.35
-        ancho_valor_izq = ancho_izq * 0.65
-        ancho_etiqueta_der = ancho_der * 0.35
-        ancho_valor_der = ancho_der * 0.65
+        ancho_etiqueta_izq = self.plantilla.ancho_etiqueta_izq
+        ancho_valor_izq = self.plantilla.ancho_valor_izq
+        ancho_etiqueta_der = self.plantilla.ancho_etiqueta_der
+        ancho_valor_der = self.plantilla.ancho_valor_der
         
         self.set_font('Helvetica', '', 10)
         altura_municipio = self._calcular_altura_texto(municipio, ancho_valor_izq) if municipio else 8
@@ -568,13 +817,13 @@ class ReporteProveedor(FPDF):
         
         if municipio:
             self.set_xy(x_inicio, y_inicio)
-            self._crear_celda_con_altura_fija('MUNICIPIO', ancho_etiqueta_izq, altura_total, es_etiqueta=True)
+            self._crear_celda_con_altura_fija('MUNICIPIO', ancho_etiqueta_izq, altura_total, es_etiqueta=True, lineas=self.plantilla.lineas_etiquetas['MUNICIPIO'])
             self._crear_celda_con_altura_fija(municipio, ancho_valor_izq, altura_total, es_etiqueta=False)
         
         if telefono:
             x_derecha = x_inicio + ancho_izq + 5
             self.set_xy(x_derecha, y_inicio)
-            self._crear_celda_con_altura_fija('CELULAR', ancho_etiqueta_der, altura_total, es_etiqueta=True)
+            self._crear_celda_con_altura_fija('CELULAR', ancho_etiqueta_der, altura_total, es_etiqueta=True, lineas=self.plantilla.lineas_etiquetas['CELULAR'])
             self._crear_celda_con_altura_fija(telefono, ancho_valor_der, altura_total, es_etiqueta=False)
         
         self.set_xy(x_inicio, y_inicio + altura_total + 6)
@@ -591,8 +840,12 @@ class ReporteProveedor(FPDF):
             num_lineas = math.ceil(ancho_texto / ancho_disponible)
             return num_lineas * ConfiguracionReporte.ALTURA_LINEA
     
-    def _crear_celda_con_altura_fija(self, texto: str, ancho: float, altura_fija: float, es_etiqueta: bool = False):
-        """Crea una celda con altura fija específica, centrado verticalmente el contenido"""
+    def _crear_celda_con_altura_fija(self, texto: str, ancho: float, altura_fija: float, es_etiqueta: bool = False,
+                                     lineas: Optional[int] = None):
+        """
+        Crea una celda con altura fija específica, centrado verticalmente el contenido.
+        `lineas` (de la plantilla) evita volver a medir los textos fijos.
+        """
         x_actual = self.get_x()
         y_actual = self.get_y()
         
@@ -608,14 +861,14 @@ class ReporteProveedor(FPDF):
         self.rect(x_actual, y_actual, ancho, altura_fija, 'DF')
         self.rect(x_actual, y_actual, ancho, altura_fija, 'D')
         
-        ancho_texto = self.get_string_width(texto)
-        if ancho_texto <= ancho:
+        if lineas is None:
+            lineas = max(1, math.ceil(self.get_string_width(texto) / ancho))
+        if lineas == 1:
             y_texto = y_actual + (altura_fija - ConfiguracionReporte.ALTURA_LINEA) / 2
             self.set_xy(x_actual, y_texto)
             self.cell(ancho, ConfiguracionReporte.ALTURA_LINEA, texto, border=0, align=alineacion)
         else:
-            num_lineas_necesarias = math.ceil(ancho_texto / ancho)
-            altura_texto_total = num_lineas_necesarias * ConfiguracionReporte.ALTURA_LINEA
+            altura_texto_total = lineas * ConfiguracionReporte.ALTURA_LINEA
             
             y_texto = y_actual + (altura_fija - altura_texto_total) / 2
             self.set_xy(x_actual, y_texto)
@@ -639,39 +892,7 @@ class ReporteProveedor(FPDF):
         )
         self.ln(2)
     
-    # 1. MODIFICAR la función obtener_textos_fila
-    def obtener_textos_fila(self, fila: pd.Series) -> List[str]:
-        """Convierte una fila de datos en textos formateados para la tabla"""
-        fecha_formateada = UtilFormato.formatear_fecha(fila.get('FCHA INGRESO', ''))
-        porcentaje_exp = UtilFormato.formatear_porcentaje(
-            fila.get('KG. EXP', 0),
-            fila.get('KILOS RECIBIDOS', 1)
-        )
-        
-        # CALCULAR EL VALOR TOTAL: TOTAL BRUTO - RETE FUENTE - FONDO HORTIFRU
-        total_bruto = fila.get('TOTAL BRUTO', 0)
-        rete_fuente = fila.get('RETE FUENTE', 0)
-        fondo_hortifru = fila.get('FONDO HORTIFRU', 0)
-        valor_total_calculado = total_bruto - rete_fuente - fondo_hortifru
-    
-        return [
-            str(fila.get('FRUTA', '')),
-            fecha_formateada,
-            UtilFormato.formatear_numero(fila.get('KILOS RECIBIDOS', 0)),
-            porcentaje_exp,
-            UtilFormato.formatear_numero(fila.get('KG. EXP', 0)),
-            UtilFormato.formatear_numero(fila.get('KG. NAL', 0)),
-            UtilFormato.formatear_numero(fila.get('KG. AVE', 0)),
-            UtilFormato.formatear_moneda(fila.get('PRECIO EXP', 0)),
-            UtilFormato.formatear_moneda(fila.get('PRECIO NAL', 0)),
-            UtilFormato.formatear_moneda(fila.get('PRECIO AVE', 0)),
-            UtilFormato.formatear_moneda(fila.get('TOTAL BRUTO', 0)),
-            UtilFormato.formatear_moneda(fila.get('RETE FUENTE', 0)),
-            UtilFormato.formatear_moneda(fila.get('FONDO HORTIFRU', 0)),
-            UtilFormato.formatear_moneda(valor_total_calculado),  # VALOR CALCULADO
-        ]
-    
-    def agregar_tabla_detalle(self, datos: pd.DataFrame):
+    def agregar_tabla_detalle(self, datos: RegistroProveedor):
         """Agrega la tabla con el detalle de compras"""
         self._configurar_tabla()
         anchos_columnas = self._calcular_anchos_columnas()
@@ -688,18 +909,17 @@ class ReporteProveedor(FPDF):
         self.set_draw_color(*ConfiguracionReporte.COLOR_BORDE)
     
     def _calcular_anchos_columnas(self) -> List[float]:
-        """Calcula los anchos de las columnas basado en proporciones"""
-        ancho_pagina = self.w - self.l_margin - self.r_margin
-        return [prop * ancho_pagina for prop in ConfiguracionReporte.PROPORCIONES_COLUMNAS]
+        """Anchos de las columnas según sus proporciones (calculados en la plantilla)"""
+        return self.plantilla.anchos_columnas
     
     def _agregar_encabezados_tabla(self, anchos_columnas: List[float]):
         """Agrega los encabezados de la tabla"""
         y_inicio = self.get_y()
-        altura_maxima = self._calcular_altura_encabezados()
+        altura_maxima = self.plantilla.altura_encabezados
         
         for i, encabezado in enumerate(ConfiguracionReporte.ENCABEZADOS_TABLA):
             x_actual = self.get_x()
-            altura_celda = altura_maxima / len(encabezado.split('\n'))
+            altura_celda = self.plantilla.alturas_celdas_encabezado[i]
             
             self.multi_cell(
                 anchos_columnas[i], altura_celda, encabezado,
@@ -711,39 +931,33 @@ class ReporteProveedor(FPDF):
         self.ln(altura_maxima)
     
     def _calcular_altura_encabezados(self) -> float:
-        """Calcula la altura máxima necesaria para los encabezados"""
-        altura_maxima = 0
-        for encabezado in ConfiguracionReporte.ENCABEZADOS_TABLA:
-            num_lineas = len(encabezado.split('\n'))
-            altura = num_lineas * ConfiguracionReporte.ALTURA_LINEA
-            if altura > altura_maxima:
-                altura_maxima = altura
-        return altura_maxima
+        """Altura máxima necesaria para los encabezados (calculada en la plantilla)"""
+        return self.plantilla.altura_encabezados
     
-    def _agregar_filas_tabla(self, datos: pd.DataFrame, anchos_columnas: List[float]):
+    def _agregar_filas_tabla(self, datos: RegistroProveedor, anchos_columnas: List[float]):
         """Agrega las filas de datos a la tabla"""
         self.set_font('Helvetica', '', 7)
         alternar_color = False
         
-        for _, fila in datos.iterrows():
-            self._agregar_fila_individual(fila, anchos_columnas, alternar_color)
+        for textos_celda in datos.filas:
+            self._agregar_fila_individual(textos_celda, anchos_columnas, alternar_color)
             alternar_color = not alternar_color
          # 💡 MODIFICACIÓN: Agregar la fila de totales aquí, al final de la tabla de detalles.
         self._agregar_fila_total(datos, anchos_columnas)
         
     
     # 2. MODIFICAR la función _agregar_fila_total
-    def _agregar_fila_total(self, datos: pd.DataFrame, anchos_columnas: List[float]):
+    def _agregar_fila_total(self, datos: RegistroProveedor, anchos_columnas: List[float]):
         """
         Agrega una fila con los totales de las columnas calculando el VALOR TOTAL.
         """
-        # Sumar las columnas necesarias para obtener los totales.
-        total_bruto = datos['TOTAL BRUTO'].sum()
-        total_rete_fuente = datos['RETE FUENTE'].sum()
-        total_fondo_hortifru = datos['FONDO HORTIFRU'].sum()
+        # Totales de las columnas necesarias, ya sumados en el registro
+        total_bruto = datos.total_bruto
+        total_rete_fuente = datos.total_rete_fuente
+        total_fondo_hortifru = datos.total_fondo_hortifru
         
         # CALCULAR EL TOTAL DEL VALOR TOTAL: TOTAL BRUTO - RETENCIONES
-        total_valor_total = total_bruto - total_rete_fuente - total_fondo_hortifru
+        total_valor_total = datos.subtotal
 
         # Preparar el contenido de la fila de totales
         textos_celda = [''] * len(ConfiguracionReporte.ENCABEZADOS_TABLA)
@@ -784,19 +998,19 @@ class ReporteProveedor(FPDF):
         # Dibujar cada celda con su total correspondiente
         for i in range(len(anchos_columnas)):
             if i >= primera_columna_con_total:
-                x_celda = x_inicio + sum(anchos_columnas[:i])
+                x_celda = x_inicio + self.plantilla.x_columnas[i]
                 self.set_xy(x_celda, y_inicio)
                 texto_celda = textos_celda[i] if textos_celda[i] else ''
                 self.cell(anchos_columnas[i], ConfiguracionReporte.ALTURA_LINEA * 2, texto_celda, border=1, align='R', fill=True)
 
         self.ln(ConfiguracionReporte.ALTURA_LINEA * 2)
     
-    def _agregar_fila_individual(self, fila: pd.Series, anchos_columnas: List[float], usar_color_alternativo: bool):
-        """Agrega una fila individual a la tabla"""
+    def _agregar_fila_individual(self, textos_celda: Tuple[str, ...], anchos_columnas: List[float],
+                                 usar_color_alternativo: bool):
+        """Agrega una fila individual (textos ya formateados) a la tabla"""
         y_inicio = self.get_y()
         x_inicio = self.get_x()
         
-        textos_celda = self.obtener_textos_fila(fila)
         altura_fila = self._calcular_altura_fila(textos_celda, anchos_columnas)
         
         if self.get_y() + altura_fila > self.page_break_trigger:
@@ -836,7 +1050,7 @@ class ReporteProveedor(FPDF):
                                  x_inicio: float, y_inicio: float, altura_fila: float):
         """Agrega el contenido de texto a las celdas de la fila"""
         for i, texto in enumerate(textos):
-            x_celda = x_inicio + sum(anchos[:i])
+            x_celda = x_inicio + self.plantilla.x_columnas[i]
             
             ancho_texto = self.get_string_width(texto)
             altura_texto = ConfiguracionReporte.ALTURA_LINEA
@@ -852,7 +1066,7 @@ class ReporteProveedor(FPDF):
                 new_x=XPos.RIGHT, new_y=YPos.TOP
             )
     
-    def agregar_tabla_resumen_y_cert(self, datos: pd.DataFrame):
+    def agregar_tabla_resumen_y_cert(self, datos: RegistroProveedor):
         """
         Agrega la tabla de resumen con totales y las certificaciones al lado,
         asegurando que el margen solo afecte a las certificaciones.
@@ -911,23 +1125,18 @@ class ReporteProveedor(FPDF):
                         ancho_cert, 5, self.certificacion_gap,
                         border=0, align='C'
                     )
-    def _calcular_valores_resumen(self, datos: pd.DataFrame) -> Dict[str, float]:
+    def _calcular_valores_resumen(self, datos: RegistroProveedor) -> Dict[str, float]:
         """Calcula los valores para el resumen financiero"""
-        # CALCULAR EL VALOR TOTAL: TOTAL BRUTO - RETENCIONES
-        total_bruto = datos['TOTAL BRUTO'].sum()
-        total_rete_fuente = datos['RETE FUENTE'].sum()
-        total_fondo_hortifru = datos['FONDO HORTIFRU'].sum()
-        
-        # EL SUBTOTAL ES LA SUMA DE TODOS LOS VALORES TOTALES CALCULADOS
-        subtotal_calculado = total_bruto - total_rete_fuente - total_fondo_hortifru
+        # EL SUBTOTAL ES LA SUMA DE TODOS LOS VALORES TOTALES CALCULADOS (TOTAL BRUTO - RETENCIONES)
+        subtotal_calculado = datos.subtotal
         
         return {
             'subtotal': subtotal_calculado,
-            'descuento_2500': datos.get('D 2500', pd.Series([0])).sum(),
+            'descuento_2500': datos.descuento_2500,
             'descuento_plantas': 0,
-            'otros_descuentos': datos.get('DES ANALISIS', pd.Series([0])).sum(),
+            'otros_descuentos': datos.otros_descuentos,
             'total_documento': subtotal_calculado -
-            datos.get('D 2500', pd.Series([0])).sum()- datos.get('DES ANALISIS', pd.Series([0])).sum() #0 es organizar descuento plantas
+            datos.descuento_2500 - datos.otros_descuentos #0 es organizar descuento plantas
         }
         
     def _agregar_filas_resumen(self, valores: Dict[str, float], x_pos: float, 
@@ -956,7 +1165,9 @@ class ReporteProveedor(FPDF):
 
 
     def generar_reportes(archivo_excel: str, nit_empresa: Optional[str] = None, 
-                        nombre_empresa: Optional[str] = None, direccion_empresa: Optional[str] = None, subtitle : Optional[str] = None):
+                        nombre_empresa: Optional[str] = None, direccion_empresa: Optional[str] = None, subtitle : Optional[str] = None,
+                        gestor_datos: Optional[GestorDatos] = None, conservar_pdf: bool = False,
+                        agrupar_impresion: bool = False, optimizar_tamano: bool = False) -> List[Dict[str, Any]]:
         """
         Función principal para cargar datos y generar reportes PDF con configuración dinámica de empresa.
         
@@ -965,21 +1176,49 @@ class ReporteProveedor(FPDF):
             nit_empresa: NIT de la empresa (opcional)
             nombre_empresa: Nombre de la empresa (opcional) 
             direccion_empresa: Dirección de la empresa (opcional)
+            gestor_datos: Gestor con los datos ya cargados (opcional, evita releer el Excel)
+            conservar_pdf: Si es True, cada registro incluye el contenido del PDF en memoria
+            agrupar_impresion: Si es True, los proveedores sin teléfono ni correo van a un
+                solo PDF para imprimir, con un marcador por cédula y páginas numeradas por proveedor
+            optimizar_tamano: Si es True, genera PDFs más livianos (ver ReporteProveedor)
+            
+        Returns:
+            Lista de registros (cedula, nombre, canal, ruta, telefono, email) de los PDFs generados
         """
+        generados = []
+        escritor = EscritorAtomico()
+        fabrica = FabricaReportes(
+            nit_empresa=nit_empresa,
+            nombre_empresa=nombre_empresa,
+            direccion_empresa=direccion_empresa,
+            subtitle=subtitle,
+            optimizar_tamano=optimizar_tamano
+        )
         try:
-            gestor_datos = GestorDatos(archivo_excel)
-            df_liquidacion = gestor_datos.cargar_datos()
+            if gestor_datos is None:
+                gestor_datos = GestorDatos(archivo_excel)
+                gestor_datos.cargar_datos()
 
-            if df_liquidacion.empty:
+            total_clientes = gestor_datos.total_proveedores()
+            if total_clientes == 0:
                 print("❌ El DataFrame de liquidación está vacío. No se pueden generar reportes.")
-                return
+                return generados
+            
+            gestor_datos.guardar_contactos_rechazados(os.path.join(
+                ConfiguracionReporte.DIRECTORIO_SALIDA,
+                ConfiguracionReporte.ARCHIVO_CONTACTOS_RECHAZADOS
+            ))
 
-            clientes = df_liquidacion.groupby('CEDULA')
-            total_clientes = len(clientes)
+            clientes = gestor_datos.proveedores()
+            manifiesto = []
+            consolidado = None
+            registros_consolidado = []
             
-            for i, (cedula, datos_cliente) in enumerate(clientes, 1):
+            for i, (cedula, datos_cliente) in enumerate(perfilado.por_proveedor(clientes), 1):
+                inicio = time.perf_counter()
                 try:
-                    nombre = datos_cliente['NOMBRE'].iloc[0]
+                    registro_proveedor = RegistroProveedor.desde_dataframe(datos_cliente)
+                    nombre = registro_proveedor.nombre
 
                     nombre_limpio = nombre.replace('Ñ', 'N').replace('ñ', 'n')
                     
@@ -1005,45 +1244,148 @@ class ReporteProveedor(FPDF):
                     
                     email = info_adicional.get('email','')
                     
+                    canal = info_adicional.get('canal', ConfiguracionContactos.CANAL_IMPRESION)
+                    
                     # Pasar el tipo de certificación a la función obtener_certificacion
                     certificaciones = gestor_datos.obtener_certificacion(cedula,cert_tipo_liquidacion)
                     
-                    # 🔥 MODIFICACIÓN PRINCIPAL: Pasar los parámetros dinámicos al constructor
-                    reporte = ReporteProveedor(
-                        nit_empresa=nit_empresa,
-                        nombre_empresa=nombre_empresa, 
-                        direccion_empresa=direccion_empresa,
-                        subtitle=subtitle
-                    )
-                    reporte.add_page()
-                    reporte.establecer_certificacion(certificaciones)
-                    reporte.agregar_informacion_cliente(datos_cliente, info_adicional)
-                    reporte.agregar_tabla_detalle(datos_cliente)
-                    reporte.agregar_tabla_resumen_y_cert(datos_cliente)
+                    if agrupar_impresion and canal == ConfiguracionContactos.CANAL_IMPRESION:
+                        # Un solo documento para todos: el logo y las fuentes se incrustan una vez
+                        if consolidado is None:
+                            consolidado = fabrica.nuevo()
+                        pagina = consolidado.agregar_proveedor(
+                            registro_proveedor, info_adicional, certificaciones,
+                            marcador=f"{cedula} - {nombre_limpio}"
+                        )
+                        registros_consolidado.append({
+                            'cedula': str(cedula),
+                            'nombre': nombre_limpio,
+                            'canal': canal,
+                            'ruta': os.path.abspath(os.path.join(
+                                ConfiguracionReporte.DIRECTORIO_SALIDA,
+                                ConfiguracionReporte.ARCHIVO_IMPRESION_CONSOLIDADO
+                            )),
+                            'telefono': '',
+                            'email': '',
+                            'contenido': None,
+                            'pagina': pagina
+                        })
+                        print(f"🖨️ [{i}/{total_clientes}] {nombre_limpio} (Cédula: {cedula}) agregado al consolidado de impresión (página {pagina})")
+                        registro_eventos.evento("generar_pdf", "consolidado", cedula, time.perf_counter() - inicio,
+                                                canal=canal, pagina=pagina)
+                        continue
+                    
+                    # Documento nuevo con la configuración de empresa preparada por la fábrica
+                    reporte = fabrica.nuevo()
+                    reporte.agregar_proveedor(registro_proveedor, info_adicional, certificaciones)
                             
-                    if telefono: 
-                        telefono_limpio = "".join(filter(str.isdigit, telefono))
-                        nombre_pdf = f"{nombre_limpio}!{cedula}!{telefono_limpio}.pdf" 
+                    if canal == ConfiguracionContactos.CANAL_TEL: 
+                        nombre_pdf = f"{nombre_limpio}!{cedula}!{telefono}.pdf" 
                         ruta_salida = os.path.join(reporte.DIRECTORIO_SALIDA_TEL, nombre_pdf)
-                        reporte.output(ruta_salida)
                         
-                    elif email and email not in ['no@no.com','2@2.com', '2@2.COM']: 
+                    elif canal == ConfiguracionContactos.CANAL_EMAIL: 
                         nombre_pdf = f"{nombre_limpio}!{cedula}!{email}.pdf" 
                         ruta_salida = os.path.join(reporte.DIRECTORIO_SALIDA_EMAIL, nombre_pdf)
-                        reporte.output(ruta_salida)
                         
                     else:
-                        # Si no hay teléfono, usa solo el nombre y la cédula
+                        # Si no hay teléfono ni correo válido, usa solo el nombre y la cédula
                         nombre_pdf = f"{nombre_limpio}!{cedula}.pdf"
                         ruta_salida = os.path.join(reporte.DIRECTORIO_SALIDA, nombre_pdf)
-                        reporte.output(ruta_salida)
                     
-                    print(f"✅ [{i}/{total_clientes}] Reporte generado para {nombre_limpio} (Cédula: {cedula}) - Certificación: {cert_tipo_liquidacion}")
+                    contenido = reporte.output()
+                    escritor.escribir(ruta_salida, contenido)
+                    
+                    registro = {
+                        'cedula': str(cedula),
+                        'nombre': nombre_limpio,
+                        'canal': canal,
+                        'ruta': os.path.abspath(ruta_salida),
+                        'telefono': info_adicional.get('telefono_e164', '') if canal == ConfiguracionContactos.CANAL_TEL else '',
+                        'email': email if canal == ConfiguracionContactos.CANAL_EMAIL else '',
+                        'contenido': bytes(contenido) if conservar_pdf else None
+                    }
+                    entrada_manifiesto = registro_manifiesto(registro, contenido)
+                    registro['sha256'] = entrada_manifiesto['sha256']
+                    registro['tamano'] = entrada_manifiesto['tamano']
+                    manifiesto.append(entrada_manifiesto)
+                    generados.append(registro)
+                    
+                    print(f"✅ [{i}/{total_clientes}] Reporte generado para {nombre_limpio} (Cédula: {cedula}) - Certificación: {cert_tipo_liquidacion} - {len(contenido) / 1024:.1f} KB")
+                    registro_eventos.evento("generar_pdf", "ok", cedula, time.perf_counter() - inicio,
+                                            canal=canal, tamano=len(contenido))
 
                 except Exception as e:
                     print(f"❌ [{i}/{total_clientes}] Error generando reporte para {nombre_limpio} (Cédula: {cedula}): {repr(e)}")
+                    registro_eventos.evento("generar_pdf", "error", cedula, time.perf_counter() - inicio, error=e)
                     
+            if consolidado is not None:
+                ruta_consolidado = registros_consolidado[0]['ruta']
+                contenido = consolidado.output()
+                escritor.escribir(ruta_consolidado, contenido)
+                entrada_manifiesto = registro_manifiesto({
+                    'cedula': '',
+                    'nombre': 'consolidado de impresión',
+                    'canal': ConfiguracionContactos.CANAL_IMPRESION,
+                    'ruta': ruta_consolidado
+                }, contenido)
+                manifiesto.append(entrada_manifiesto)
+                for registro in registros_consolidado:
+                    registro['sha256'] = entrada_manifiesto['sha256']
+                    registro['tamano'] = entrada_manifiesto['tamano']
+                generados.extend(registros_consolidado)
+                print(f"🖨️ Consolidado de impresión: {len(registros_consolidado)} proveedores, "
+                      f"{consolidado.page_no()} páginas en {ruta_consolidado}")
+
+            # Los PDFs existen con su nombre final solo cuando el escritor confirma el último lote
+            with perfilado.etapa('confirmar_escritura'), registro_eventos.medir('confirmar_escritura',
+                                                                               pdfs=len(manifiesto)):
+                escritor.cerrar()
+                escribir_manifiestos(manifiesto, [
+                    ConfiguracionReporte.DIRECTORIO_SALIDA,
+                    ConfiguracionReporte.DIRECTORIO_SALIDA_TEL,
+                    ConfiguracionReporte.DIRECTORIO_SALIDA_EMAIL
+                ])
+            if manifiesto:
+                total_bytes = sum(entrada['tamano'] for entrada in manifiesto)
+                print(f"\n📦 {len(manifiesto)} PDFs, {total_bytes / 1024:.0f} KB en total "
+                      f"({total_bytes / len(manifiesto) / 1024:.1f} KB en promedio)")
             print("\n✅ Todos los reportes han sido generados exitosamente.")
 
         except (FileNotFoundError, ValueError) as e:
-            print(f"❌ Error crítico: {e}")
\ No newline at end of file
+            print(f"❌ Error crítico: {e}")
+            registro_eventos.evento("generar", "error", error=e)
+        finally:
+            # Si el cierre de arriba ya se hizo no vuelve a hacer nada; tras un error confirma lo escrito
+            escritor.cerrar()
+        
+        return generados
+
+
+class FabricaReportes:
+    """
+    Prepara una vez por corrida lo que comparten todos los reportes (carpetas de
+    salida, plantilla de disposición y logo optimizado) y crea cada documento
+    sin repetirlo. Copiar un documento prototipo con `deepcopy` resultó más
+    lento que construir el FPDF, así que la fábrica construye y solo evita el
+    trabajo repetido (ver benchmark_reportes.py).
+    """
+    
+    def __init__(self, nit_empresa: Optional[str] = None, nombre_empresa: Optional[str] = None,
+                 direccion_empresa: Optional[str] = None, subtitle: Optional[str] = None,
+                 optimizar_tamano: bool = False):
+        self.parametros = {
+            'nit_empresa': nit_empresa,
+            'nombre_empresa': nombre_empresa,
+            'direccion_empresa': direccion_empresa,
+            'subtitle': subtitle,
+            'optimizar_tamano': optimizar_tamano,
+        }
+        ReporteProveedor._crear_directorio_salida()
+        if optimizar_tamano and os.path.exists(ConfiguracionReporte.RUTA_LOGO):
+            ReporteProveedor._obtener_logo_optimizado()
+        # Deja calculada la plantilla de disposición para los documentos de la corrida
+        self.plantilla = self.nuevo().plantilla
+    
+    def nuevo(self) -> ReporteProveedor:
+        """Documento vacío y configurado, listo para agregar un proveedor"""
+        return ReporteProveedor(**self.parametros, crear_directorios=False)
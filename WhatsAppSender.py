@@ -11,88 +11,193 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.keys import Keys
-from pyautogui import ImageNotFoundException
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, NoSuchWindowException
 import pandas as pd
 import json
 import datetime
 import pickle
-import pyautogui
+import sqlite3
+import bisect
+import signal
+import threading
+import itertools
+from collections import deque
+try:
+    import pyautogui
+except Exception:
+    # Sin pantalla (p. ej. Chrome headless en un servidor) pyautogui no se puede importar;
+    # en ese caso solo están disponibles los métodos basados en el DOM.
+    pyautogui = None
+
+from verificacion_whatsapp import CacheVerificacion, pasada_verificacion
+from bitacora_envios import BitacoraEnvios
+from manifiesto import cedula_de_archivo, verificar_pdf
+from estado_pantalla import BibliotecaPlantillas, ClasificadorPantalla, EstadoPantalla
+from clasificacion_fallos import FALLO_PLANTILLA, clasificar_fallo
+import perfilado
+import registro_eventos
 
 
 class QuotaManager:
-    def __init__(self, limite_diario=100, limite_horario=50):
+    """
+    Cuotas de envío por línea guardadas en SQLite (modo WAL).
+
+    Cada envío es una fila con su marca de tiempo; las escrituras se hacen en
+    una transacción inmediata, por lo que varios procesos pueden compartir el
+    mismo archivo de una línea sin corromperlo. En memoria se mantiene el
+    conteo del día y una cola ordenada con los envíos de la última hora, que
+    se actualizan solo con las filas nuevas: `puede_enviar` es O(1) amortizado.
+
+    `puede_enviar` es solo una consulta; el cupo se toma con `reservar_envio`,
+    que cuenta e inserta en la misma transacción inmediata. Así dos procesos
+    en el límite menos uno no pueden enviar ambos.
+    """
+
+    VENTANA_HORARIA = 3600
+    DIAS_RETENCION = 2
+    # Horario permitido: desde HORA_INICIO:00 hasta HORA_FIN:59
+    HORA_INICIO = 7
+    HORA_FIN = 21
+
+    def __init__(self, limite_diario=100, limite_horario=50, archivo_datos="quota_data.db"):
         self.limite_diario = limite_diario
         self.limite_horario = limite_horario
-        self.archivo_datos = "quota_data.pkl"
+        self.archivo_datos = archivo_datos
+        self.conexion = sqlite3.connect(self.archivo_datos, timeout=30, isolation_level=None)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("CREATE TABLE IF NOT EXISTS envios (id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL)")
+        self.conexion.execute("CREATE INDEX IF NOT EXISTS idx_envios_ts ON envios (ts)")
         self.cargar_datos()
 
-    def cargar_datos(self):
+    @staticmethod
+    def _inicio_del_dia(fecha):
+        return datetime.datetime.combine(fecha, datetime.time.min).timestamp()
+
+    def _migrar_pickle(self):
+        """Importa una sola vez el historial del antiguo quota_data.pkl, si existe"""
+        archivo_pickle = os.path.splitext(self.archivo_datos)[0] + ".pkl"
+        if not os.path.exists(archivo_pickle):
+            return
+        if self.conexion.execute("SELECT 1 FROM envios LIMIT 1").fetchone():
+            return
         try:
-            with open(self.archivo_datos, 'rb') as f:
+            with open(archivo_pickle, 'rb') as f:
                 datos = pickle.load(f)
-                self.mensajes_hoy = datos.get('mensajes_hoy', 0)
-                self.fecha_actual = datos.get('fecha_actual', datetime.date.today())
-                self.historial_horas = datos.get('historial_horas', {})
-        except (FileNotFoundError, EOFError):
-            self.mensajes_hoy = 0
-            self.fecha_actual = datetime.date.today()
-            self.historial_horas = {}
-
-    def guardar_datos(self):
-        datos = {
-            'mensajes_hoy': self.mensajes_hoy,
-            'fecha_actual': self.fecha_actual,
-            'historial_horas': self.historial_horas
-        }
-        with open(self.archivo_datos, 'wb') as f:
-            pickle.dump(datos, f)
+        except (EOFError, pickle.UnpicklingError):
+            return
+        marcas = [datetime.datetime.fromisoformat(h).timestamp() for h in datos.get('historial_horas', {})]
+        if datos.get('fecha_actual') == datetime.date.today():
+            # Envíos del día sin hora conocida: se registran al inicio del día
+            sin_hora = max(0, datos.get('mensajes_hoy', 0) - len(marcas))
+            marcas += [self._inicio_del_dia(datetime.date.today())] * sin_hora
+        self.conexion.execute("BEGIN IMMEDIATE")
+        self.conexion.executemany("INSERT INTO envios (ts) VALUES (?)", [(m,) for m in sorted(marcas)])
+        self.conexion.execute("COMMIT")
+
+    def cargar_datos(self):
+        self._migrar_pickle()
+        ahora = time.time()
+        self.conexion.execute("DELETE FROM envios WHERE ts < ?", (ahora - self.DIAS_RETENCION * 86400,))
+        self.fecha_actual = datetime.date.today()
+        inicio_dia = self._inicio_del_dia(self.fecha_actual)
+        self.mensajes_hoy = self.conexion.execute(
+            "SELECT COUNT(*) FROM envios WHERE ts >= ?", (inicio_dia,)
+        ).fetchone()[0]
+        self.historial_horas = deque(ts for (ts,) in self.conexion.execute(
+            "SELECT ts FROM envios WHERE ts >= ? ORDER BY ts", (ahora - self.VENTANA_HORARIA,)
+        ))
+        self._ultimo_id = self.conexion.execute("SELECT COALESCE(MAX(id), 0) FROM envios").fetchone()[0]
+
+    def _sincronizar(self):
+        """Incorpora los envíos registrados (por este u otros procesos) desde la última lectura"""
+        inicio_dia = self._inicio_del_dia(self.fecha_actual)
+        limite_hora = time.time() - self.VENTANA_HORARIA
+        for id_envio, ts in self.conexion.execute(
+            "SELECT id, ts FROM envios WHERE id > ? ORDER BY id", (self._ultimo_id,)
+        ):
+            self._ultimo_id = id_envio
+            if ts >= inicio_dia:
+                self.mensajes_hoy += 1
+            if ts >= limite_hora:
+                if self.historial_horas and ts < self.historial_horas[-1]:
+                    bisect.insort(self.historial_horas, ts)
+                else:
+                    self.historial_horas.append(ts)
 
     def limpiar_historial_antiguo(self):
-        hora_actual = datetime.datetime.now()
-        horas_a_eliminar = []
-        for hora_str in self.historial_horas:
-            hora = datetime.datetime.fromisoformat(hora_str)
-            if (hora_actual - hora).total_seconds() > 3600:
-                horas_a_eliminar.append(hora_str)
-        for hora in horas_a_eliminar:
-            del self.historial_horas[hora]
+        limite = time.time() - self.VENTANA_HORARIA
+        while self.historial_horas and self.historial_horas[0] < limite:
+            self.historial_horas.popleft()
 
     def puede_enviar(self):
         if datetime.date.today() != self.fecha_actual:
-            self.mensajes_hoy = 0
-            self.fecha_actual = datetime.date.today()
-            self.historial_horas = {}
+            self.cargar_datos()
+        else:
+            self._sincronizar()
 
         self.limpiar_historial_antiguo()
 
         if self.mensajes_hoy >= self.limite_diario:
             print(f"🚫 Límite diario alcanzado ({self.mensajes_hoy}/{self.limite_diario})")
+            registro_eventos.evento("cuota", "limite_diario", envios=self.mensajes_hoy, limite=self.limite_diario)
             return False
 
         mensajes_ultima_hora = len(self.historial_horas)
         if mensajes_ultima_hora >= self.limite_horario:
             print(f"🚫 Límite por hora alcanzado ({mensajes_ultima_hora}/{self.limite_horario})")
+            registro_eventos.evento("cuota", "limite_horario", envios=mensajes_ultima_hora, limite=self.limite_horario)
             return False
 
         if not self.es_horario_permitido():
+            registro_eventos.evento("cuota", "fuera_de_horario", hora=datetime.datetime.now().hour)
             return False
 
         return True
 
     def es_horario_permitido(self):
         hora_actual = datetime.datetime.now().hour
-        if not (7 <= hora_actual <= 21):
-            print(f"🚫 Fuera del horario permitido (7AM-9PM). Hora actual: {hora_actual}:00")
+        if not (self.HORA_INICIO <= hora_actual <= self.HORA_FIN):
+            print(f"🚫 Fuera del horario permitido ({self.HORA_INICIO}:00-{self.HORA_FIN}:59). Hora actual: {hora_actual}:00")
             return False
         return True
 
-    def registrar_envio(self):
-        self.mensajes_hoy += 1
-        hora_actual = datetime.datetime.now().isoformat()
-        self.historial_horas[hora_actual] = True
-        self.guardar_datos()
+    def reservar_envio(self):
+        """
+        Toma un cupo antes de enviar: cuenta los envíos del día y de la última
+        hora e inserta la reserva en una sola transacción inmediata, que
+        serializa a los procesos que comparten la línea. Retorna el id de la
+        reserva, o None si algún límite ya se alcanzó.
+        """
+        ahora = time.time()
+        self.conexion.execute("BEGIN IMMEDIATE")
+        try:
+            hoy, ultima_hora = self.conexion.execute(
+                "SELECT COALESCE(SUM(ts >= ?), 0), COALESCE(SUM(ts >= ?), 0) FROM envios",
+                (self._inicio_del_dia(datetime.date.today()), ahora - self.VENTANA_HORARIA)
+            ).fetchone()
+            if hoy >= self.limite_diario or ultima_hora >= self.limite_horario:
+                self.conexion.execute("ROLLBACK")
+                print(f"🚫 Sin cupo para enviar (hoy {hoy}/{self.limite_diario}, "
+                      f"última hora {ultima_hora}/{self.limite_horario})")
+                registro_eventos.evento("cuota", "reserva_rechazada", hoy=hoy, ultima_hora=ultima_hora)
+                return None
+            id_reserva = self.conexion.execute("INSERT INTO envios (ts) VALUES (?)", (ahora,)).lastrowid
+            self.conexion.execute("COMMIT")
+        except BaseException:
+            self.conexion.execute("ROLLBACK")
+            raise
+        if datetime.date.today() != self.fecha_actual:
+            self.cargar_datos()
+        else:
+            self._sincronizar()
+        self.limpiar_historial_antiguo()
         print(f"📊 Mensajes hoy: {self.mensajes_hoy}/{self.limite_diario} | Última hora: {len(self.historial_horas)}/{self.limite_horario}")
+        return id_reserva
+
+    def cancelar_reserva(self, id_reserva):
+        """Devuelve el cupo de un envío que no salió y vuelve a contar desde la base"""
+        self.conexion.execute("DELETE FROM envios WHERE id = ?", (id_reserva,))
+        self.cargar_datos()
 
     def obtener_tiempo_espera_recomendado(self):
         if len(self.historial_horas) >= self.limite_horario - 2:
@@ -104,17 +209,48 @@ class QuotaManager:
 
 
 class WhatsAppSafeSender:
-    def __init__(self, contacts, mensaje, profile_path, attach_buttons, document_buttons, no_contact_buttons, send_buttons, enviados_dir):
+    URL_WHATSAPP = "https://web.whatsapp.com"
+    # Cada cuánto se revisa el horario permitido durante una espera larga (segundos)
+    INTERVALO_COMPROBACION = 30
+
+    def __init__(self, contacts, mensaje, profile_path, attach_buttons, document_buttons, no_contact_buttons, send_buttons, enviados_dir,
+                 cache_verificacion=None, base_url=None, headless=False, chrome_binario=None, modo_adjunto="autogui",
+                 quota_manager=None, bitacora=None, preview_buttons=None, archivo_escala=None):
         self.CONTACTOS = contacts
         self.MENSAJE = mensaje
         self.profile_path = profile_path
+        # base_url permite apuntar el emisor al simulador local (simulador_whatsapp.py)
+        self.base_url = (base_url or self.URL_WHATSAPP).rstrip("/")
+        self.headless = headless
+        self.chrome_binario = chrome_binario
+        # "autogui": diálogo del sistema con plantillas de imagen; "input": ruta directa al input[type=file]
+        self.modo_adjunto = modo_adjunto
         self.enviados_dir = enviados_dir
-        self.quota_manager = QuotaManager()
+        self.quota_manager = quota_manager or QuotaManager()
+        self.cache_verificacion = cache_verificacion or CacheVerificacion()
+        self.bitacora = bitacora or BitacoraEnvios()
+        # Se activa con SIGINT/SIGTERM: corta las esperas y detiene el envío tras el contacto en curso
+        self.detener_evento = threading.Event()
+        # Resultado de preparar_contacto por archivo, calculado durante la pausa previa
+        self._preparados = {}
+        # Funciones que reciben los eventos del envío (p. ej. panel_envios.MonitorEnvios)
+        self.oyentes = []
+        # Clase del último fallo cuando el motivo en texto no basta (ver clasificacion_fallos)
+        self.clase_fallo = None
 
         self.ATTACH_BUTTON_TEMPLATE = attach_buttons
         self.DOCUMENT_BUTTON_TEMPLATE = document_buttons
         self.NO_CONTACT_TEMPLATE = no_contact_buttons
         self.SEND_BUTTON_TEMPLATE = send_buttons
+        # Una captura por paso comparada con las plantillas de cada estado (vista previa: opcional),
+        # a la escala de pantalla recordada en `archivo_escala`
+        self.clasificador = ClasificadorPantalla({
+            EstadoPantalla.CONTACTO_ENCONTRADO: attach_buttons,
+            EstadoPantalla.SIN_CONTACTO: no_contact_buttons,
+            EstadoPantalla.ADJUNTAR_LISTO: document_buttons,
+            EstadoPantalla.VISTA_PREVIA: preview_buttons,
+            EstadoPantalla.ENVIO_LISTO: send_buttons,
+        }, biblioteca=BibliotecaPlantillas(archivo_escala))
 
         self.CAPTION_BOX_XPATH = '//div[@contenteditable="true"][@data-tab="10"]'
         self.SEARCH_BOX_XPATH = '//div[@contenteditable="true"][@data-tab="3"]'
@@ -135,11 +271,33 @@ class WhatsAppSafeSender:
             "Saludos {nombre}, {mensaje}"
         ]
 
+    def agregar_oyente(self, oyente):
+        """Registra una función que recibirá cada evento del envío como diccionario"""
+        self.oyentes.append(oyente)
+
+    def _emitir(self, tipo, **datos):
+        """Entrega un evento a los oyentes; un oyente con errores no interrumpe el envío"""
+        evento = {"tipo": tipo, "ts": time.time(), **datos}
+        for oyente in self.oyentes:
+            try:
+                oyente(evento)
+            except Exception as e:
+                print(f"⚠️ Error en un oyente del envío ({tipo}): {e}")
+
+    def _fin_etapa(self, etapa, inicio):
+        """Emite la duración de una etapa (buscar, adjuntar, enviar) y retorna el instante actual"""
+        ahora = time.perf_counter()
+        self._emitir("etapa", etapa=etapa, segundos=ahora - inicio)
+        return ahora
+
     def iniciar_driver(self):
         try:
-            service = Service(ChromeDriverManager().install())
             options = Options()
-            options.add_argument("--start-maximized")
+            if self.headless:
+                options.add_argument("--headless=new")
+                options.add_argument("--window-size=1920,1080")
+            else:
+                options.add_argument("--start-maximized")
             options.add_argument("--disable-blink-features=AutomationControlled")
             options.add_argument("--disable-dev-shm-usage")
             options.add_argument("--no-sandbox")
@@ -147,13 +305,23 @@ class WhatsAppSafeSender:
             options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
 
             profile_path = self.profile_path
-            options.add_argument(f"--user-data-dir={profile_path}")
+            if profile_path:
+                options.add_argument(f"--user-data-dir={profile_path}")
+            if self.chrome_binario:
+                options.binary_location = self.chrome_binario
 
-            driver = webdriver.Chrome(service=service, options=options)
+            try:
+                service = Service(ChromeDriverManager().install())
+                driver = webdriver.Chrome(service=service, options=options)
+            except Exception as e:
+                # Respaldo: dejar que Selenium Manager resuelva el chromedriver adecuado
+                print(f"⚠️ webdriver-manager no disponible ({e}), usando Selenium Manager")
+                driver = webdriver.Chrome(options=options)
             wait = WebDriverWait(driver, 60)
             return driver, wait
         except Exception as e:
             print(f"❌ Error al iniciar el driver: {e}")
+            registro_eventos.evento("whatsapp_driver", "error", error=e)
             return None, None
 
     def esperar_whatsapp_cargado(self, wait):
@@ -165,10 +333,12 @@ class WhatsAppSafeSender:
                 return True
             except Exception as e:
                 print(f"⚠️ Intento {intento + 1}/{max_intentos} fallido: {e}")
+                registro_eventos.evento("whatsapp_cargar", "reintento", error=e, intento=intento + 1)
                 if intento < max_intentos - 1:
                     print("🔄 Reintentando en 10 segundos…")
                     time.sleep(10)
         print("❌ No se pudo cargar WhatsApp Web después de varios intentos")
+        registro_eventos.evento("whatsapp_cargar", "error", intentos=max_intentos)
         return False
     
     def detectar_bloqueo_o_problema(self, driver):
@@ -212,6 +382,7 @@ class WhatsAppSafeSender:
                 if elementos and len(elementos) > 0:
                     texto = elementos[0].text
                     print(f"🚨 PROBLEMA DETECTADO: {texto}")
+                    registro_eventos.evento("whatsapp_problema", "detectado", motivo=texto, xpath=xpath)
                     return True, texto
             except Exception:
                 continue
@@ -237,28 +408,27 @@ class WhatsAppSafeSender:
                 time.sleep(random.uniform(0.2, 0.5))
 
 
+    def _contacto_no_encontrado(self, driver):
+        """
+        Verifica si la búsqueda no encontró el contacto: primero por el texto en
+        el DOM y, si hay pantalla, por las plantillas de imagen.
+        """
+        if driver.find_elements(By.XPATH, self.NO_CONTACT_XPATH):
+            return True
+        if self.headless or pyautogui is None:
+            return False
+        return self._contacto_no_encontrado_por_imagen()
+
     def _contacto_no_encontrado_por_imagen(self):
         """
-        Verifica si alguna de las plantillas de 'no contacto' está visible en pantalla.
-        Retorna True si alguna se encuentra, False en caso contrario.
+        Verifica con una sola captura si alguna de las plantillas de 'no contacto'
+        está visible en pantalla.
         """
-        # Se asegura de que la variable sea iterable, incluso si solo es un string
-        templates = self.NO_CONTACT_TEMPLATE if isinstance(self.NO_CONTACT_TEMPLATE, list) else [self.NO_CONTACT_TEMPLATE]
-        
-        for template_path in templates:
-            try:
-                # Intenta localizar la imagen en pantalla.
-                pyautogui.locateOnScreen(template_path, confidence=0.8, grayscale=True)
-                return True
-            except ImageNotFoundException:
-                # Si la imagen no se encuentra, continuar con la siguiente.
-                print(f"❌ Imagen '{template_path}' no encontrada, buscando siguiente.")
-                continue
-            except Exception as e:
-                # Maneja errores como una ruta de archivo inválida.
-                print(f"⚠️ Error al procesar '{template_path}': {e}")
-                continue
-        return False
+        try:
+            return self.clasificador.clasificar([EstadoPantalla.SIN_CONTACTO]).ve(EstadoPantalla.SIN_CONTACTO)
+        except Exception as e:
+            print(f"⚠️ Error al revisar la pantalla: {e}")
+            return False
 
     def abrir_chat_con_contacto(self, driver, wait, numero):
         """
@@ -281,7 +451,7 @@ class WhatsAppSafeSender:
             time.sleep(random.uniform(1, 2))
 
             # 3. Validar si el contacto se encontró o no usando las imágenes.
-            if self._contacto_no_encontrado_por_imagen():
+            if self._contacto_no_encontrado(driver):
                 # Si la función auxiliar retorna True, significa que no se encontró el contacto.
                 print(f"❌ Contacto {numero} no encontrado en la búsqueda.")
                 search_box.clear()
@@ -303,7 +473,7 @@ class WhatsAppSafeSender:
         """Método auxiliar para abrir un chat usando la URL directa."""
         print(f"🔄 Intentando abrir el chat para {numero} usando URL directa...")
         try:
-            driver.get(f"https://web.whatsapp.com/send?phone={numero}")
+            driver.get(f"{self.base_url}/send?phone={numero}")
             time.sleep(random.uniform(2, 4))
             
             wait.until(EC.any_of(
@@ -313,20 +483,60 @@ class WhatsAppSafeSender:
             
             if driver.find_elements(By.XPATH, self.INVALID_PHONE_XPATH):
                 print(f"❌ El número {numero} no es un usuario válido de WhatsApp.")
-                driver.get("https://web.whatsapp.com")
+                self.cache_verificacion.guardar(numero, False)
+                driver.get(self.base_url)
                 self.esperar_whatsapp_cargado(wait)
                 return False
             else:
                 print(f"✅ Chat abierto para {numero} usando URL directa.")
+                self.cache_verificacion.guardar(numero, True)
                 return True
                 
         except (TimeoutException, NoSuchWindowException) as e:
             print(f"❌ Falló el método de URL directa para {numero}: {e}.")
-            driver.get("https://web.whatsapp.com")
+            driver.get(self.base_url)
             self.esperar_whatsapp_cargado(wait)
             return False
 
 
+    def estado_numero(self, driver, wait, numero):
+        """
+        Abre la URL directa del número solo para saber si tiene WhatsApp.
+        Retorna True (válido), False (inválido) o None (no se pudo determinar).
+        """
+        try:
+            driver.get(f"{self.base_url}/send?phone={numero}")
+            wait.until(EC.any_of(
+                EC.presence_of_element_located((By.XPATH, self.MESSAGE_BOX_XPATH)),
+                EC.presence_of_element_located((By.XPATH, self.INVALID_PHONE_XPATH))
+            ))
+            return not driver.find_elements(By.XPATH, self.INVALID_PHONE_XPATH)
+        except (TimeoutException, NoSuchWindowException) as e:
+            print(f"⚠️ No se pudo verificar {numero}: {e}")
+            return None
+
+    def verificar_numeros(self, numeros=None, forzar=False):
+        """
+        Pasada de verificación previa: comprueba cada número una sola vez y
+        guarda el resultado en el caché para que el envío salte los inválidos.
+        """
+        numeros = numeros if numeros is not None else [c["numero"] for c in self.CONTACTOS]
+        driver, wait = self.iniciar_driver()
+        if not driver:
+            return {}
+        try:
+            driver.get(self.base_url)
+            if not self.esperar_whatsapp_cargado(wait):
+                return {}
+            return pasada_verificacion(
+                numeros,
+                lambda numero: self.estado_numero(driver, wait, numero),
+                self.cache_verificacion,
+                forzar=forzar
+            )
+        finally:
+            driver.quit()
+
     def generar_mensaje_personalizado(self, nombre):
 
         """Genera un mensaje personalizado y variado"""
@@ -339,73 +549,55 @@ class WhatsAppSafeSender:
         return plantilla.format(nombre=primer_nombre, mensaje=self.MENSAJE)
     
 
+    def cargar_plantilla(self, ruta):
+        """Plantilla en escala de grises, leída del disco una sola vez; None si no existe"""
+        return self.clasificador.plantilla(ruta)
+
+    def precargar_plantillas(self):
+        for rutas in self.clasificador.rutas.values():
+            for ruta in rutas:
+                self.cargar_plantilla(ruta)
+
     def click_image(self, template_paths, confidence=0.8, timeout=10):
         """
-        Busca múltiples templates y hace clic en el que tenga mejor coincidencia.
-        Ahora evalúa TODAS las plantillas antes de decidir cuál usar.
+        Hace clic en la plantilla con mejor coincidencia. Cada intento hace una
+        sola captura y la compara con todas las plantillas.
         """
-        start_time = time.time()
         if isinstance(template_paths, str):
             template_paths = [template_paths]
-
-        # Filtrar plantillas que existen
-        templates_validos = [t for t in template_paths if os.path.exists(t)]
-        if not templates_validos:
+        if not any(self.cargar_plantilla(t) is not None for t in template_paths):
             return False
 
-
-        while time.time() - start_time < timeout:
-            todas_coincidencias = []
-            
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
             try:
-                # Evaluar TODAS las plantillas primero
-                for i, template_path in enumerate(templates_validos):
-                    try:
-                        # Buscar todas las ubicaciones posibles para este template
-                        ubicaciones = list(pyautogui.locateAllOnScreen(
-                            template_path, 
-                            confidence=confidence, 
-                            grayscale=True
-                        ))
-                        
-                        for ubicacion in ubicaciones:
-                            centro = pyautogui.center(ubicacion)
-                            todas_coincidencias.append({
-                                'template_path': template_path,
-                                'template_index': i,
-                                'ubicacion': ubicacion,
-                                'centro': centro,
-                                'nombre': os.path.basename(template_path)
-                            })
-                            
-                    except pyautogui.ImageNotFoundException:
-                        continue
-                    except Exception as e:
-                        continue
-                
-                if todas_coincidencias:
-                    # Usar la primera coincidencia (pyautogui ya las ordena por mejor match)
-                    mejor_match = todas_coincidencias[0]
-                    
-                    # Añadir offset aleatorio para simular comportamiento humano
-                    offset_x = random.randint(-1, 1)
-                    offset_y = random.randint(-1, 1)
-                    
-                    click_x = mejor_match['centro'].x + offset_x
-                    click_y = mejor_match['centro'].y + offset_y
-                    
-                    pyautogui.click(click_x, click_y)
+                captura = self.clasificador.capturar()
+                coincidencia = self.clasificador.mejor_coincidencia(captura, template_paths, confidence)
+                if coincidencia is not None:
+                    self._click_coincidencia(coincidencia)
                     return True
-                    
             except Exception as e:
                 print(f"⚠️ Error general en evaluación de templates: {e}")
-            
-            # Esperar antes del siguiente intento
-            time.sleep(0.5)
-
-        # Si llegamos aquí, no se encontró nada
-        plantillas_nombres = [os.path.basename(t) for t in templates_validos]
+            time.sleep(self.clasificador.INTERVALO_SONDEO)
         return False
+
+    def _click_coincidencia(self, coincidencia):
+        # Añadir offset aleatorio para simular comportamiento humano
+        x, y = coincidencia.centro
+        pyautogui.click(x + random.randint(-1, 1), y + random.randint(-1, 1))
+
+    def click_estado(self, estado, timeout=10):
+        """Espera a ver `estado` en pantalla (una captura por intento) y hace clic en su botón"""
+        try:
+            coincidencia = self.clasificador.esperar(estado, timeout)
+        except Exception as e:
+            print(f"⚠️ Error al revisar la pantalla: {e}")
+            return False
+        if coincidencia is None:
+            self.clase_fallo = FALLO_PLANTILLA
+            return False
+        self._click_coincidencia(coincidencia)
+        return True
     
     
     def verificar_estado_chat(self, driver):
@@ -428,29 +620,106 @@ class WhatsAppSafeSender:
 
 
 
+    def _escribir_mensaje(self, wait, nombre_contacto):
+        """Limpia el cuadro de mensaje y escribe el mensaje personalizado"""
+        mensaje_personalizado = self.generar_mensaje_personalizado(nombre_contacto)
+
+        message_box = wait.until(EC.presence_of_element_located((By.XPATH, self.MESSAGE_BOX_XPATH)))
+        message_box.send_keys(Keys.CONTROL + 'a')
+        message_box.send_keys(Keys.DELETE)
+        time.sleep(random.uniform(0.2, 0.7))
+        self.escribir_como_humano(message_box, mensaje_personalizado)
+        time.sleep(random.uniform(0.5, 1))
+
+    def enviar_documento(self, wait, numero, archivo, nombre_contacto):
+        """Envía el documento con el modo de adjunto configurado"""
+        if self.modo_adjunto == "input":
+            return self.enviar_documento_input(wait, numero, archivo, nombre_contacto)
+        return self.enviar_documento_autogui(wait, numero, archivo, nombre_contacto)
+
+    def _buscar_input_documento(self, driver):
+        """
+        Retorna el input[type=file] para documentos. WhatsApp crea los inputs al
+        abrir el menú de adjuntar; se prefiere el que no está limitado a imágenes.
+        """
+        inputs = driver.find_elements(By.XPATH, self.FILE_INPUT_XPATH)
+        if not inputs:
+            try:
+                driver.find_element(By.XPATH, self.ATTACH_BUTTON_XPATH).click()
+            except NoSuchElementException:
+                pass
+            inputs = driver.find_elements(By.XPATH, self.FILE_INPUT_XPATH)
+        for elemento in inputs:
+            accept = (elemento.get_attribute("accept") or "").lower()
+            if not accept.startswith("image"):
+                return elemento
+        return inputs[-1] if inputs else None
+
+    def enviar_documento_input(self, wait, numero, archivo, nombre_contacto):
+        """
+        Envía el documento entregando la ruta directamente al input[type=file]
+        con Selenium: no abre el diálogo del sistema ni usa la pantalla, por lo
+        que funciona en headless y en varios navegadores a la vez.
+        """
+        driver = wait._driver
+        inicio = time.perf_counter()
+        try:
+            problema, texto = self.detectar_bloqueo_o_problema(driver)
+            if problema:
+                print(f"🚨 PROBLEMA DETECTADO ANTES DEL ENVÍO: {texto}")
+                return False
+
+            self._escribir_mensaje(wait, nombre_contacto)
+
+            entrada = self._buscar_input_documento(driver)
+            if entrada is None:
+                print(f"❌ No se encontró el campo de archivo para {numero}.")
+                self.clase_fallo = FALLO_PLANTILLA
+                return False
+            entrada.send_keys(os.path.abspath(archivo))
+            print(f"✅ Archivo seleccionado: {archivo}")
+
+            boton_enviar = wait.until(EC.element_to_be_clickable((By.XPATH, self.SEND_BUTTON_XPATH)))
+            inicio = self._fin_etapa("adjuntar", inicio)
+            problema, texto = self.detectar_bloqueo_o_problema(driver)
+            if problema:
+                print(f"🚨 PROBLEMA DETECTADO ANTES DEL ENVÍO FINAL: {texto}")
+                return False
+
+            time.sleep(random.uniform(0.3, 0.8))
+            boton_enviar.click()
+            time.sleep(random.uniform(1, 3))
+
+            estado_ok, mensaje_estado = self.verificar_estado_chat(driver)
+            self._fin_etapa("enviar", inicio)
+            if not estado_ok:
+                print(f"⚠️ Posible problema después del envío: {mensaje_estado}")
+
+            print(f"✅ Documento enviado a {numero}")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error al enviar el documento para {numero}: {e}")
+            self.clase_fallo = clasificar_fallo(error=e)
+            return False
+
     def enviar_documento_autogui(self, wait, numero, archivo, nombre_contacto):
+        inicio = time.perf_counter()
         try:
             problema, texto = self.detectar_bloqueo_o_problema(wait._driver)
             if problema:
                 print(f"🚨 PROBLEMA DETECTADO ANTES DEL ENVÍO: {texto}")
                 return False
 
-            mensaje_personalizado = self.generar_mensaje_personalizado(nombre_contacto)
+            self._escribir_mensaje(wait, nombre_contacto)
 
-            message_box = wait.until(EC.presence_of_element_located((By.XPATH, self.MESSAGE_BOX_XPATH)))
-            message_box.send_keys(Keys.CONTROL + 'a')
-            message_box.send_keys(Keys.DELETE)
-            time.sleep(random.uniform(0.2, 0.7))
-            self.escribir_como_humano(message_box, mensaje_personalizado)
-            time.sleep(random.uniform(0.5, 1))
-
-            if not self.click_image(self.ATTACH_BUTTON_TEMPLATE, confidence=0.8, timeout=10):
+            if not self.click_estado(EstadoPantalla.CONTACTO_ENCONTRADO):
                 print(f"❌ Fallo al hacer clic en el botón de adjuntar para {numero}.")
                 return False
             time.sleep(random.uniform(0.5, 1))
 
             print("🔍 Buscando botón de documento...")
-            if not self.click_image(self.DOCUMENT_BUTTON_TEMPLATE, confidence=0.8, timeout=10):
+            if not self.click_estado(EstadoPantalla.ADJUNTAR_LISTO):
                 print(f"❌ Fallo al hacer clic en el botón de documento para {numero}.")
                 return False
             time.sleep(random.uniform(3, 5))
@@ -464,18 +733,20 @@ class WhatsAppSafeSender:
             print(f"✅ Archivo seleccionado: {archivo}")
             time.sleep(random.uniform(2, 5))
 
+            inicio = self._fin_etapa("adjuntar", inicio)
             problema, texto = self.detectar_bloqueo_o_problema(wait._driver)
             if problema:
                 print(f"🚨 PROBLEMA DETECTADO ANTES DEL ENVÍO FINAL: {texto}")
                 return False
 
             print("🔍 Buscando botón de enviar...")
-            if not self.click_image(self.SEND_BUTTON_TEMPLATE, confidence=0.8, timeout=10):
+            if not self.click_estado(EstadoPantalla.ENVIO_LISTO):
                 print(f"❌ No se pudo encontrar el botón de enviar para {numero}.")
                 return False
             time.sleep(random.uniform(1, 3))
 
             estado_ok, mensaje_estado = self.verificar_estado_chat(wait._driver)
+            self._fin_etapa("enviar", inicio)
             if not estado_ok:
                 print(f"⚠️ Posible problema después del envío: {mensaje_estado}")
 
@@ -484,6 +755,7 @@ class WhatsAppSafeSender:
 
         except Exception as e:
             print(f"❌ Error al enviar el documento para {numero}: {e}")
+            self.clase_fallo = clasificar_fallo(error=e)
             return False
 
     def mover_archivo_enviado(self, archivo, index):
@@ -501,37 +773,189 @@ class WhatsAppSafeSender:
             return True
         except Exception as e:
             print(f"❌ Error al mover el archivo {archivo}: {e}")
+            registro_eventos.evento("whatsapp_mover", "error", cedula_de_archivo(archivo), error=e,
+                                    archivo=archivo, destino=ruta_destino)
             return False
         
-    def pausa_inteligente(self):
-        """Implementa pausas inteligentes basadas en el estado actual"""
+    def esperar(self, segundos, comprobar_horario=False, motivo="pausa"):
+        """
+        Duerme exactamente `segundos` (reloj monotónico), salvo que llegue una
+        señal de detención o, si `comprobar_horario`, se salga del horario.
+        Retorna True si la espera se completó.
+        """
+        self._emitir("espera", segundos=segundos, motivo=motivo)
+        limite = time.monotonic() + segundos
+        while True:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return True
+            if self.detener_evento.wait(min(restante, self.INTERVALO_COMPROBACION)):
+                return False
+            if comprobar_horario and not self.quota_manager.es_horario_permitido():
+                return False
+
+    def preparar_contacto(self, contacto):
+        """
+        Trabajo previo al envío que no toca la página: valida el PDF (contra el
+        checksum del generador, si lo tiene), consulta el estado del número en
+        el caché de verificación y deja las plantillas de imagen en memoria.
+        Se ejecuta durante la pausa del contacto anterior.
+        """
+        archivo = contacto["archivo"]
+        motivo = None
+        try:
+            if contacto.get("sha256"):
+                motivo = verificar_pdf(archivo, contacto["sha256"], contacto.get("tamano"))
+            elif os.path.getsize(archivo) == 0:
+                motivo = "archivo vacío"
+            else:
+                with open(archivo, "rb") as f:
+                    if f.read(5) != b"%PDF-":
+                        motivo = "el archivo no es un PDF"
+        except OSError:
+            motivo = "archivo no encontrado"
+
+        self.precargar_plantillas()
+        return {"motivo": motivo, "valido": self.cache_verificacion.obtener(contacto["numero"])}
+
+    def pausa_inteligente(self, siguiente=None):
+        """
+        Pausa entre envíos según el estado de las cuotas. El tiempo de la pausa
+        se aprovecha para preparar el `siguiente` contacto; la espera termina a
+        la hora planeada sin importar cuánto tardó la preparación.
+
+        Returns:
+            False si se salió del horario permitido o se recibió una señal de detención
+        """
         tiempo_espera = self.quota_manager.obtener_tiempo_espera_recomendado()
-        
+
         # Añadir variabilidad adicional
         variacion = random.uniform(0.5, 0.8)
         tiempo_final = tiempo_espera * variacion
-        
-        minutos = tiempo_final / 60*4
-        print(f"⏳ Pausando por {minutos:.1f} minutos ({tiempo_final:.0f}s) para evitar detección...")
-        
-        # Pausa en intervalos para permitir interrupciones
-        intervalos = int(tiempo_final / 30)  # Intervalos de 30 segundos
-        for i in range(intervalos):
-            time.sleep(20)
-            # Verificar si es un buen momento para continuar
-            if not self.quota_manager.es_horario_permitido():
-                print("🚫 Fuera del horario permitido. Pausando hasta mañana...")
-                return False
-        
-        # Tiempo restante
-        tiempo_restante = tiempo_final - (intervalos * 10)
-        if tiempo_restante > 0:
-            time.sleep(tiempo_restante)
-        
-        return True
+        fin_pausa = time.monotonic() + tiempo_final
+
+        print(f"⏳ Pausando por {tiempo_final / 60:.1f} minutos ({tiempo_final:.0f}s) para evitar detección...")
+
+        if siguiente is not None:
+            self._preparados[siguiente["archivo"]] = self.preparar_contacto(siguiente)
 
+        if self.esperar(fin_pausa - time.monotonic(), comprobar_horario=True):
+            return True
+        if not self.detener_evento.is_set():
+            print("🚫 Fuera del horario permitido. Pausando hasta mañana...")
+        return False
+
+    def _al_recibir_senal(self, signum, frame):
+        if self.detener_evento.is_set():
+            # Segunda señal: detención inmediata
+            raise KeyboardInterrupt
+        print(f"\n⏹️ Señal {signum} recibida: se detiene al terminar el contacto en curso.")
+        self.detener_evento.set()
+
+    def _instalar_senales(self):
+        """Redirige SIGINT/SIGTERM al evento de detención; retorna los manejadores previos"""
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        anteriores = {}
+        for nombre in ("SIGINT", "SIGTERM", "SIGBREAK"):
+            senal = getattr(signal, nombre, None)
+            if senal is not None:
+                anteriores[senal] = signal.signal(senal, self._al_recibir_senal)
+        return anteriores
+
+    def procesar_contacto(self, driver, wait, contacto, indice):
+        """
+        Envía el PDF de un contacto.
+
+        Returns:
+            (resultado, motivo): resultado es "enviado", "fallido" (transitorio,
+            se puede reintentar), "omitido" (no tiene sentido reintentar) o
+            "detener" (problema en la sesión: no seguir)
+        """
+        numero = contacto["numero"]
+        archivo = contacto["archivo"]
+        nombre = contacto["nombre"]
+
+        problema, texto = self.detectar_bloqueo_o_problema(driver)
+        if problema:
+            print(f"🚨 DETENIENDO POR SEGURIDAD: {texto}")
+            return "detener", texto
+
+        preparado = self._preparados.pop(archivo, None) or self.preparar_contacto(contacto)
+        if preparado["motivo"]:
+            print(f"❌ {preparado['motivo'].capitalize()} para {numero}: {archivo}")
+            return "omitido", preparado["motivo"]
+
+        if preparado["valido"] is False:
+            print(f"⏭️ {numero} ya verificado sin WhatsApp, se omite.")
+            return "omitido", "número sin WhatsApp"
+
+        inicio = time.perf_counter()
+        abierto = self.abrir_chat_con_contacto(driver, wait, numero)
+        self._fin_etapa("buscar", inicio)
+        if not abierto:
+            if self.cache_verificacion.es_invalido(numero):
+                return "omitido", "número sin WhatsApp"
+            return "fallido", "no se pudo abrir el chat"
+
+        # El cupo se toma antes de enviar; si otro proceso de la línea lo agotó, se detiene.
+        # Si el envío se interrumpe con una excepción la reserva se conserva: pudo haber salido.
+        reserva = self.quota_manager.reservar_envio()
+        if reserva is None:
+            return "detener", "límite de cuota alcanzado"
+
+        if not self.enviar_documento(wait, numero, archivo, nombre):
+            self.quota_manager.cancelar_reserva(reserva)
+            problema, texto = self.detectar_bloqueo_o_problema(driver)
+            if problema:
+                print(f"🚨 DETENIENDO POR PROBLEMA DETECTADO: {texto}")
+                return "detener", texto
+            return "fallido", "no se pudo enviar el documento"
+
+        # El mensaje ya salió: aunque el archivo no se pueda mover, no se debe reenviar
+        if not self.mover_archivo_enviado(archivo, indice):
+            return "enviado", "enviado, pero no se pudo mover el archivo"
+        return "enviado", None
+
+    def _cola_reintentos(self):
+        """Contactos con fallos transitorios, cada uno cuando vence su espera en la bitácora"""
+        while not self.detener_evento.is_set():
+            cola = self.bitacora.reintentos()
+            if not cola:
+                return
+            contacto = cola[0]
+            espera = contacto["reintentar_en"] - time.time()
+            if espera > 0:
+                print(f"🔁 Reintento de {contacto['numero']} en {espera:.0f}s "
+                      f"(intento {contacto['intentos'] + 1}/{self.bitacora.max_intentos})")
+                if not self.esperar(espera, motivo="reintento"):
+                    return
+            yield contacto
+
+    def esperar_turno(self, plan, entrada):
+        """
+        Espera hasta la hora programada del contacto. Si al llegar las cuotas aún
+        no lo permiten (p. ej. otro proceso usó la misma línea), reprograma los
+        pendientes desde ahora y vuelve a esperar. Retorna False si se canceló.
+        """
+        while True:
+            programado = plan.programado(entrada)
+            espera = (programado - datetime.datetime.now()).total_seconds()
+            if espera > 0:
+                print(f"⏰ Próximo envío programado para {programado:%Y-%m-%d %H:%M} "
+                      f"(ETA del plan: {plan.eta:%Y-%m-%d %H:%M})")
+                if not self.esperar(espera, motivo="turno del plan"):
+                    return False
+            if self.quota_manager.puede_enviar():
+                return True
+            plan.programar(self.quota_manager)
 
-    def main(self):
+    def main(self, plan=None):
+        """
+        Envía a todos los contactos. Con un `PlanEnvios` se recorren sus
+        pendientes esperando la hora programada de cada uno, en lugar de
+        detenerse al agotar la cuota o salir del horario.
+        """
         print("🚀 Iniciando WhatsApp Sender Seguro")
         print(f"📊 Estado inicial - Límite diario: {self.quota_manager.limite_diario}, Límite horario: {self.quota_manager.limite_horario}")
 
@@ -549,7 +973,12 @@ class WhatsAppSafeSender:
 
 
 
-        if not self.quota_manager.puede_enviar():
+        contactos = self.CONTACTOS if plan is None else plan.pendientes()
+        # Checkpoint por contacto: lo ya enviado en esta corrida de la bitácora no se vuelve a procesar
+        self.bitacora.registrar_contactos(contactos)
+        ya_enviados = self.bitacora.enviados()
+        contactos = [c for c in contactos if c["archivo"] not in ya_enviados]
+        if plan is None and not self.quota_manager.puede_enviar():
             print("🚫 No se puede enviar en este momento debido a limitaciones de cuota u horario.")
             return
 
@@ -557,74 +986,95 @@ class WhatsAppSafeSender:
         if not driver:
             return
 
+        self.detener_evento.clear()
+        senales_previas = self._instalar_senales()
         try:
-            driver.get("https://web.whatsapp.com")
+            driver.get(self.base_url)
             if not self.esperar_whatsapp_cargado(wait):
                 driver.quit()
                 return
 
             exitosos, fallidos, detenido_por_seguridad = 0, 0, False
-            conteo_enviados = 1
+            conteo_enviados = self.bitacora.siguiente_indice(self.enviados_dir)
+            self._emitir("inicio", total=len(contactos))
+
+            # Primero la lista, luego los fallos transitorios a medida que vence su espera
+            cola = itertools.chain(contactos, self._cola_reintentos())
+            for i, contacto in enumerate(perfilado.por_proveedor(cola)):
+                es_reintento = i >= len(contactos)
+                if i > 0 and not self.pausa_inteligente(contacto):
+                    if self.detener_evento.is_set():
+                        break
+                    # Con plan, el fin del horario no detiene: se espera el siguiente turno
+                    if plan is None:
+                        print("🚫 Deteniendo por horario no permitido.")
+                        detenido_por_seguridad = True
+                        break
+
+                if plan is not None and not es_reintento and not self.esperar_turno(plan, contacto):
+                    break
+                if self.detener_evento.is_set():
+                    break
 
-            for i, contacto in enumerate(self.CONTACTOS):
                 if not self.quota_manager.puede_enviar():
                     print("🚫 Límite de cuotas alcanzado. Deteniendo envíos.")
                     detenido_por_seguridad = True
                     break
 
-                numero = contacto["numero"]
-                archivo = contacto["archivo"]
-                nombre = contacto["nombre"]
-
-                print(f"\n📱 Procesando {i+1}/{len(self.CONTACTOS)}: {numero} ({nombre})")
-
-                problema, texto = self.detectar_bloqueo_o_problema(driver)
-                if problema:
-                    print(f"🚨 DETENIENDO POR SEGURIDAD: {texto}")
+                if es_reintento:
+                    print(f"\n🔁 Reintentando {contacto['numero']} ({contacto['nombre']}): {contacto['motivo']}")
+                else:
+                    print(f"\n📱 Procesando {i+1}/{len(contactos)}: {contacto['numero']} ({contacto['nombre']})")
+
+                self.bitacora.intentando(contacto)
+                inicio_contacto = time.perf_counter()
+                self.clase_fallo = None
+                resultado, motivo = self.procesar_contacto(driver, wait, contacto, conteo_enviados)
+                clase = None
+                if resultado in ("fallido", "omitido"):
+                    clase = self.clase_fallo or clasificar_fallo(motivo)
+                self._emitir("contacto", numero=contacto["numero"], nombre=contacto["nombre"],
+                             archivo=contacto["archivo"], resultado=resultado, motivo=motivo, clase=clase,
+                             reintento=es_reintento, segundos=time.perf_counter() - inicio_contacto)
+                if resultado == "detener":
+                    self.bitacora.devolver(contacto, motivo)
                     detenido_por_seguridad = True
                     break
-
-                if not os.path.exists(archivo):
-                    print(f"❌ Archivo no encontrado para {numero}: {archivo}")
-                    fallidos += 1
-                    continue
-
-                if self.abrir_chat_con_contacto(driver, wait, numero):
-                    if self.enviar_documento_autogui(wait, numero, archivo, nombre):
-                        if self.mover_archivo_enviado(archivo, conteo_enviados):
-                            exitosos += 1
-                            conteo_enviados += 1
-                            self.quota_manager.registrar_envio()
-                        else:
-                            fallidos += 1
-                    else:
-                        fallidos += 1
-                        problema, texto = self.detectar_bloqueo_o_problema(driver)
-                        if problema:
-                            print(f"🚨 DETENIENDO POR PROBLEMA DETECTADO: {texto}")
-                            detenido_por_seguridad = True
-                            break
+                if resultado == "enviado":
+                    self.bitacora.enviado(contacto, conteo_enviados, motivo)
+                    exitosos += 1
+                    conteo_enviados += 1
                 else:
+                    # La clase decide si entra a la cola de reintentos (p. ej. un archivo faltante no)
+                    self.bitacora.fallido(contacto, motivo, clase=clase)
                     fallidos += 1
-
-                if i < len(self.CONTACTOS) - 1:
-                    if not self.pausa_inteligente():
-                        print("🚫 Deteniendo por horario no permitido.")
-                        detenido_por_seguridad = True
-                        break
+                if plan is not None:
+                    plan.marcar(contacto["archivo"], resultado)
 
         except KeyboardInterrupt:
             print("\n⏹️ Proceso interrumpido por el usuario.")
         except Exception as e:
             print(f"\n❌ Error inesperado: {e}")
+            registro_eventos.evento("whatsapp_envio", "error", error=e)
         finally:
+            for senal, manejador in senales_previas.items():
+                signal.signal(senal, manejador)
             driver.quit()
 
+        self._emitir("fin", exitosos=exitosos, fallidos=fallidos, detenido=detenido_por_seguridad)
+        if self.detener_evento.is_set():
+            print("\n⏹️ Envío detenido por señal.")
         print(f"\n📊 === RESUMEN FINAL ===")
         print(f"✅ Enviados exitosamente: {exitosos}")
         print(f"❌ Fallidos: {fallidos}")
         print(f"🛡️ Detenido por seguridad: {'Sí' if detenido_por_seguridad else 'No'}")
         print(f"📈 Total de mensajes hoy: {self.quota_manager.mensajes_hoy}/{self.quota_manager.limite_diario}")
+        if self.clasificador.capturas:
+            print(f"📸 Capturas de pantalla: {self.clasificador.capturas} "
+                  f"({self.clasificador.capturas / max(1, exitosos + fallidos):.1f} por contacto)")
+        self.bitacora.resumen()
+        if plan is not None:
+            plan.resumen()
         if detenido_por_seguridad:
             print("\n⚠️ IMPORTANTE: El proceso se detuvo por medidas de seguridad.")
             print("   Esto ayuda a proteger tu cuenta de posibles bloqueos.")
@@ -0,0 +1,162 @@
+"""
+Benchmark de la Preparación de Reportes PDF
+===========================================
+
+Mide, con proveedores sintéticos, el costo de preparar cada documento antes
+de dibujar nada: construir `ReporteProveedor` directamente (carpetas de salida
+y configuración por documento) frente a pedirlo a `FabricaReportes` (lo común
+preparado una vez por corrida). También mide el documento completo (dibujar
+el proveedor y generar los bytes) para poner la preparación en proporción.
+Se ejecuta en una carpeta temporal con una copia del logo.
+
+Uso:
+    python benchmark_reportes.py --proveedores 1000 --salida bench_reportes.json
+    python benchmark_reportes.py --referencia bench_reportes.json --tolerancia 0.25
+"""
+
+import argparse
+import datetime
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from configuracion import DIRECTORIO_PROYECTO
+from perfilado import percentil
+from Reporte_Proveedor import ConfiguracionReporte, FabricaReportes, RegistroProveedor, ReporteProveedor
+
+EMPRESA = {
+    "nit_empresa": ConfiguracionReporte.EMPRESA_NIT,
+    "nombre_empresa": ConfiguracionReporte.EMPRESA_NOMBRE,
+    "direccion_empresa": ConfiguracionReporte.EMPRESA_DIRECCION,
+    "subtitle": "PRIMERA QUINCENA",
+}
+
+
+def resumir(tiempos: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        etapa: {
+            "n": len(valores),
+            "media": statistics.mean(valores) if valores else 0.0,
+            "p50": percentil(valores, 50),
+            "p95": percentil(valores, 95),
+        }
+        for etapa, valores in tiempos.items()
+    }
+
+
+def crear_proveedores(cantidad: int, filas: int) -> List[RegistroProveedor]:
+    """Proveedores sintéticos con `filas` ingresos cada uno"""
+    fecha = datetime.date(2025, 8, 1).isoformat()
+    proveedores = []
+    for i in range(cantidad):
+        textos = tuple(
+            ("GULUPA", fecha, "1,392.50", "56.00%", "779.70", "612.80", "0.00", "$4,000.00", "$1,700.00",
+             "$0.00", "$3,118,800.00", "$0.00", "$31,188.00", "$3,087,612.00")
+            for _ in range(filas)
+        )
+        proveedores.append(RegistroProveedor(
+            cedula=str(900000000 + i), nombre=f"PROVEEDOR SINTETICO {i:05d} SAS", filas=textos,
+            total_bruto=3118800.0 * filas, total_rete_fuente=0.0, total_fondo_hortifru=31188.0 * filas,
+            descuento_2500=0.0, otros_descuentos=0.0,
+        ))
+    return proveedores
+
+
+def ejecutar(args) -> Dict:
+    directorio = tempfile.mkdtemp(prefix="bench_reportes_")
+    if os.path.exists(os.path.join(DIRECTORIO_PROYECTO, "logo.png")):
+        shutil.copy(os.path.join(DIRECTORIO_PROYECTO, "logo.png"), os.path.join(directorio, "logo.png"))
+    original = os.getcwd()
+    os.chdir(directorio)
+    try:
+        proveedores = crear_proveedores(args.proveedores, args.filas)
+        info = {"direccion": "VEREDA EL TABLAZO", "municipio": "RIONEGRO", "telefono": "3001234567"}
+        certificaciones = {"flo": "", "gap": "GLOBALG.A.P.\n4063061000000"}
+        tiempos: Dict[str, List[float]] = {"preparar_directo": [], "preparar_fabrica": [], "documento_completo": []}
+
+        for _ in proveedores:
+            t = time.perf_counter()
+            ReporteProveedor(**EMPRESA, optimizar_tamano=args.optimizar_tamano)
+            tiempos["preparar_directo"].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        fabrica = FabricaReportes(**EMPRESA, optimizar_tamano=args.optimizar_tamano)
+        preparacion_fabrica = time.perf_counter() - t
+        for _ in proveedores:
+            t = time.perf_counter()
+            fabrica.nuevo()
+            tiempos["preparar_fabrica"].append(time.perf_counter() - t)
+
+        for proveedor in proveedores:
+            t = time.perf_counter()
+            reporte = fabrica.nuevo()
+            reporte.agregar_proveedor(proveedor, info, certificaciones)
+            reporte.output()
+            tiempos["documento_completo"].append(time.perf_counter() - t)
+    finally:
+        os.chdir(original)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    return {
+        "proveedores": args.proveedores,
+        "filas_por_proveedor": args.filas,
+        "optimizar_tamano": args.optimizar_tamano,
+        "preparacion_fabrica_s": preparacion_fabrica,
+        "etapas": resumir(tiempos),
+    }
+
+
+def comparar(actual: Dict, referencia: Dict, tolerancia: float) -> bool:
+    """Imprime la comparación por etapa; retorna False si hubo regresión"""
+    sin_regresion = True
+    for etapa, valores in actual["etapas"].items():
+        base = referencia.get("etapas", {}).get(etapa)
+        if not base or not base["p50"]:
+            continue
+        cambio = valores["p50"] / base["p50"] - 1
+        marca = "✅"
+        if cambio > tolerancia:
+            marca = "❌"
+            sin_regresion = False
+        print(f"{marca} {etapa}: p50 {base['p50'] * 1e3:.3f}ms -> {valores['p50'] * 1e3:.3f}ms ({cambio:+.0%})")
+    return sin_regresion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la preparación de reportes PDF")
+    parser.add_argument("--proveedores", type=int, default=1000)
+    parser.add_argument("--filas", type=int, default=3, help="Ingresos por proveedor")
+    parser.add_argument("--optimizar-tamano", action="store_true")
+    parser.add_argument("--salida", default="bench_reportes.json")
+    parser.add_argument("--referencia", default=None, help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2)
+
+    etapas = resultado["etapas"]
+    print(f"\n📊 === COSTO POR DOCUMENTO ({args.proveedores} proveedores) ===")
+    for etapa, valores in etapas.items():
+        print(f"{etapa:>20}: p50 {valores['p50'] * 1e3:.3f}ms | p95 {valores['p95'] * 1e3:.3f}ms"
+              f" | media {valores['media'] * 1e3:.3f}ms")
+    ahorro = etapas["preparar_directo"]["media"] - etapas["preparar_fabrica"]["media"]
+    print(f"⚡ Preparación: {ahorro * 1e6:.0f} µs menos por documento "
+          f"({ahorro * args.proveedores:.2f}s en la corrida; la fábrica tarda "
+          f"{resultado['preparacion_fabrica_s'] * 1e3:.1f}ms en prepararse)")
+
+    if args.referencia:
+        with open(args.referencia, "r", encoding="utf-8") as f:
+            referencia = json.load(f)
+        if not comparar(resultado, referencia, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
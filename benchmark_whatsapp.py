@@ -0,0 +1,162 @@
+"""
+Benchmark del Emisor de WhatsApp contra el Simulador Local
+==========================================================
+
+Levanta `simulador_whatsapp.py`, apunta `WhatsAppSafeSender` a él con Chrome
+headless y mide la latencia por contacto de cada etapa del envío. Los
+resultados se guardan en JSON; con `--referencia` se comparan contra una
+corrida anterior y el proceso termina con código 1 si alguna etapa empeoró
+más que la tolerancia.
+
+Uso:
+    python benchmark_whatsapp.py --contactos 20 --salida bench_whatsapp.json
+    python benchmark_whatsapp.py --referencia bench_whatsapp.json --tolerancia 0.25
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from perfilado import percentil
+from simulador_whatsapp import SimuladorWhatsApp
+from bitacora_envios import BitacoraEnvios
+from verificacion_whatsapp import CacheVerificacion
+from WhatsAppSender import WhatsAppSafeSender
+
+
+def resumir(tiempos: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        etapa: {
+            "n": len(valores),
+            "media": statistics.mean(valores) if valores else 0.0,
+            "p50": percentil(valores, 50),
+            "p95": percentil(valores, 95),
+        }
+        for etapa, valores in tiempos.items()
+    }
+
+
+def crear_contactos(cantidad: int, directorio: str) -> List[Dict[str, str]]:
+    """Contactos sintéticos con un PDF mínimo cada uno"""
+    contactos = []
+    for i in range(cantidad):
+        ruta = os.path.join(directorio, f"bench_{i:04d}.pdf")
+        with open(ruta, "wb") as f:
+            f.write(b"%PDF-1.4\n%%EOF\n")
+        contactos.append({"numero": f"+57300{i:07d}", "archivo": ruta, "nombre": f"Proveedor {i}"})
+    return contactos
+
+
+def ejecutar(args) -> Dict:
+    directorio = tempfile.mkdtemp(prefix="bench_whatsapp_")
+    contactos = crear_contactos(args.contactos, directorio)
+    conocidos = [c["numero"] for c in contactos[: int(len(contactos) * args.fraccion_conocidos)]]
+
+    simulador = SimuladorWhatsApp({
+        "latencia_carga_ms": args.latencia_ms,
+        "latencia_busqueda_ms": args.latencia_ms,
+        "latencia_chat_ms": args.latencia_ms,
+        "latencia_adjunto_ms": args.latencia_ms,
+        "latencia_envio_ms": args.latencia_ms,
+        "jitter": 0.0,
+        "contactos_conocidos": conocidos,
+    })
+    base_url = simulador.iniciar()
+
+    sender = WhatsAppSafeSender(
+        contacts=contactos, mensaje="reporte de prueba", profile_path=None,
+        attach_buttons=[], document_buttons=[], no_contact_buttons=[], send_buttons=[],
+        enviados_dir=os.path.join(directorio, "enviados"),
+        cache_verificacion=CacheVerificacion(os.path.join(directorio, "verificacion.db")),
+        bitacora=BitacoraEnvios(os.path.join(directorio, "bitacora.db")),
+        base_url=base_url, headless=True, chrome_binario=args.chrome_binario, modo_adjunto="input"
+    )
+
+    tiempos: Dict[str, List[float]] = {"problemas": [], "abrir_chat": [], "documento": [], "total": []}
+    driver, wait = sender.iniciar_driver()
+    if not driver:
+        simulador.detener()
+        raise SystemExit("❌ No se pudo iniciar Chrome")
+
+    try:
+        driver.get(base_url)
+        sender.esperar_whatsapp_cargado(wait)
+        for contacto in contactos:
+            inicio = time.perf_counter()
+
+            t = time.perf_counter()
+            sender.detectar_bloqueo_o_problema(driver)
+            tiempos["problemas"].append(time.perf_counter() - t)
+
+            t = time.perf_counter()
+            abierto = sender.abrir_chat_con_contacto(driver, wait, contacto["numero"])
+            tiempos["abrir_chat"].append(time.perf_counter() - t)
+
+            if abierto:
+                t = time.perf_counter()
+                sender.enviar_documento_input(wait, contacto["numero"], contacto["archivo"], contacto["nombre"])
+                tiempos["documento"].append(time.perf_counter() - t)
+
+            tiempos["total"].append(time.perf_counter() - inicio)
+    finally:
+        driver.quit()
+        simulador.detener()
+
+    return {
+        "contactos": args.contactos,
+        "entregados": len(simulador.enviados),
+        "latencia_simulada_ms": args.latencia_ms,
+        "etapas": resumir(tiempos),
+    }
+
+
+def comparar(actual: Dict, referencia: Dict, tolerancia: float) -> bool:
+    """Imprime la comparación por etapa; retorna False si hubo regresión"""
+    sin_regresion = True
+    for etapa, valores in actual["etapas"].items():
+        base = referencia.get("etapas", {}).get(etapa)
+        if not base or not base["p50"]:
+            continue
+        cambio = valores["p50"] / base["p50"] - 1
+        marca = "✅"
+        if cambio > tolerancia:
+            marca = "❌"
+            sin_regresion = False
+        print(f"{marca} {etapa}: p50 {base['p50']:.3f}s -> {valores['p50']:.3f}s ({cambio:+.0%})")
+    return sin_regresion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del emisor de WhatsApp con el simulador local")
+    parser.add_argument("--contactos", type=int, default=20)
+    parser.add_argument("--latencia-ms", type=int, default=100, help="Latencia simulada de cada paso")
+    parser.add_argument("--fraccion-conocidos", type=float, default=0.5,
+                        help="Fracción de contactos que la búsqueda encuentra (el resto va por URL)")
+    parser.add_argument("--chrome-binario", default=None)
+    parser.add_argument("--salida", default="bench_whatsapp.json")
+    parser.add_argument("--referencia", default=None, help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2)
+
+    print(f"\n📊 === LATENCIA POR CONTACTO ({args.contactos} contactos) ===")
+    for etapa, valores in resultado["etapas"].items():
+        print(f"{etapa:>12}: p50 {valores['p50']:.3f}s | p95 {valores['p95']:.3f}s | media {valores['media']:.3f}s")
+
+    if args.referencia:
+        with open(args.referencia, "r", encoding="utf-8") as f:
+            referencia = json.load(f)
+        if not comparar(resultado, referencia, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Bitácora de Envíos
+==================
+
+Registro por contacto del avance del envío, guardado en SQLite (WAL) después
+de cada intento: qué se intentó, qué se envió y qué falló y por qué. Con ella
+una corrida interrumpida se retoma exactamente donde quedó (sin volver a
+listar carpetas ni abrir chats ya enviados), la numeración de los archivos
+movidos a `enviados/` continúa en lugar de reiniciar en 1, y los fallos
+transitorios quedan en una cola de reintentos con espera exponencial.
+
+Los nombres de los PDFs se repiten cada quincena, así que los contactos se
+guardan por corrida (la generación de PDFs, ver
+`manifiesto.huella_generacion`) y archivo. Un envío nuevo llama a
+`iniciar_corrida`: si los PDFs cambiaron empieza una bitácora limpia y la
+anterior queda como historial; `--reanudar` y `--reintentar-fallidos` siguen
+con la corrida guardada. El último prefijo de `enviados/` también se guarda
+aquí, así que la carpeta no se vuelve a listar.
+
+Cada fallo guarda además su clase (ver clasificacion_fallos), con la que
+`fallos()` arma el lote de reenvío por prioridad. La usan WhatsApp y, con su
+propio archivo, el correo (el destinatario va en la columna `numero`).
+"""
+
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from clasificacion_fallos import PRIORIDAD_REINTENTO, es_reintentable
+from configuracion import DIRECTORIO_PROYECTO
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_INTENTANDO = "intentando"
+ESTADO_ENVIADO = "enviado"
+ESTADO_FALLIDO = "fallido"
+ESTADO_OMITIDO = "omitido"
+
+
+class BitacoraEnvios:
+    """Estado de cada contacto (por corrida y archivo) y el historial de sus intentos"""
+
+    ARCHIVO_DEFECTO = os.path.join(DIRECTORIO_PROYECTO, "bitacora_envios.db")
+    MAX_INTENTOS_DEFECTO = 3
+    SEGUNDOS_REINTENTO_DEFECTO = 300
+
+    def __init__(self, archivo: Optional[str] = None, max_intentos: Optional[int] = None,
+                 segundos_reintento: Optional[float] = None):
+        self.archivo = archivo or self.ARCHIVO_DEFECTO
+        self.max_intentos = max_intentos or self.MAX_INTENTOS_DEFECTO
+        self.segundos_reintento = segundos_reintento or self.SEGUNDOS_REINTENTO_DEFECTO
+        self.conexion = sqlite3.connect(self.archivo, timeout=30)
+        self.conexion.row_factory = sqlite3.Row
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self._migrar_sin_corrida()
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS contactos ("
+            " corrida TEXT NOT NULL DEFAULT '',"
+            " archivo TEXT NOT NULL,"
+            " orden INTEGER NOT NULL,"
+            " numero TEXT NOT NULL,"
+            " nombre TEXT,"
+            " estado TEXT NOT NULL,"
+            " intentos INTEGER NOT NULL DEFAULT 0,"
+            " motivo TEXT,"
+            " indice_envio INTEGER,"
+            " reintentar_en REAL,"
+            " clase TEXT,"
+            " actualizado REAL NOT NULL,"
+            " PRIMARY KEY (corrida, archivo))"
+        )
+        columnas = {fila["name"] for fila in self.conexion.execute("PRAGMA table_info(contactos)")}
+        if "clase" not in columnas:
+            # Bitácoras creadas antes de clasificar los fallos
+            self.conexion.execute("ALTER TABLE contactos ADD COLUMN clase TEXT")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS eventos ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " ts REAL NOT NULL,"
+            " archivo TEXT NOT NULL,"
+            " numero TEXT NOT NULL,"
+            " estado TEXT NOT NULL,"
+            " motivo TEXT,"
+            " corrida TEXT NOT NULL DEFAULT '')"
+        )
+        if "corrida" not in {fila["name"] for fila in self.conexion.execute("PRAGMA table_info(eventos)")}:
+            self.conexion.execute("ALTER TABLE eventos ADD COLUMN corrida TEXT NOT NULL DEFAULT ''")
+        self.conexion.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+        self.conexion.commit()
+        self.corrida = self._meta("corrida") or ""
+
+    def _migrar_sin_corrida(self):
+        """Bitácoras de antes de las corridas: sus contactos pasan a la corrida '' con la misma información"""
+        columnas = [fila["name"] for fila in self.conexion.execute("PRAGMA table_info(contactos)")]
+        if not columnas or "corrida" in columnas:
+            return
+        with self.conexion:
+            self.conexion.execute("ALTER TABLE contactos RENAME TO contactos_sin_corrida")
+            self.conexion.execute(
+                "CREATE TABLE contactos ("
+                " corrida TEXT NOT NULL DEFAULT '', archivo TEXT NOT NULL, orden INTEGER NOT NULL,"
+                " numero TEXT NOT NULL, nombre TEXT, estado TEXT NOT NULL, intentos INTEGER NOT NULL DEFAULT 0,"
+                " motivo TEXT, indice_envio INTEGER, reintentar_en REAL, clase TEXT, actualizado REAL NOT NULL,"
+                " PRIMARY KEY (corrida, archivo))"
+            )
+            comunes = ", ".join(c for c in columnas if c != "corrida")
+            self.conexion.execute(f"INSERT INTO contactos ({comunes}) SELECT {comunes} FROM contactos_sin_corrida")
+            self.conexion.execute("DROP TABLE contactos_sin_corrida")
+
+    def _meta(self, clave: str) -> Optional[str]:
+        fila = self.conexion.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return None if fila is None else fila[0]
+
+    def _guardar_meta(self, clave: str, valor: Any):
+        with self.conexion:
+            self.conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)", (clave, str(valor)))
+
+    def iniciar_corrida(self, corrida: str) -> bool:
+        """
+        Pasa a la corrida (generación de PDFs) dada. Si es otra, la bitácora
+        empieza limpia y la anterior queda como historial. Retorna True si cambió.
+        """
+        if corrida == self.corrida:
+            return False
+        if self.conexion.execute("SELECT 1 FROM contactos WHERE corrida = ? LIMIT 1", (self.corrida,)).fetchone():
+            print(f"🆕 Los PDFs cambiaron: nueva bitácora de envío ({corrida}); la anterior queda en el historial")
+        self._guardar_meta("corrida", corrida)
+        self.corrida = corrida
+        return True
+
+    def _actualizar(self, contacto: Dict[str, str], estado: str, motivo: Optional[str] = None, **campos):
+        ahora = time.time()
+        asignaciones = "".join(f", {campo} = ?" for campo in campos)
+        with self.conexion:
+            self.conexion.execute(
+                f"UPDATE contactos SET estado = ?, motivo = ?, actualizado = ?{asignaciones}"
+                f" WHERE corrida = ? AND archivo = ?",
+                (estado, motivo, ahora, *campos.values(), self.corrida, contacto["archivo"])
+            )
+            self.conexion.execute(
+                "INSERT INTO eventos (ts, corrida, archivo, numero, estado, motivo) VALUES (?, ?, ?, ?, ?, ?)",
+                (ahora, self.corrida, contacto["archivo"], contacto["numero"], estado, motivo)
+            )
+
+    def registrar_contactos(self, contactos: List[Dict[str, str]]) -> int:
+        """Agrega como pendientes los contactos que aún no estén en la corrida; retorna cuántos"""
+        siguiente = self.conexion.execute(
+            "SELECT COALESCE(MAX(orden), 0) FROM contactos WHERE corrida = ?", (self.corrida,)
+        ).fetchone()[0] + 1
+        antes = self.conexion.total_changes
+        with self.conexion:
+            self.conexion.executemany(
+                "INSERT OR IGNORE INTO contactos (corrida, archivo, orden, numero, nombre, estado, actualizado)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(self.corrida, c["archivo"], siguiente + i, c["numero"], c["nombre"], ESTADO_PENDIENTE, time.time())
+                 for i, c in enumerate(contactos)]
+            )
+        return self.conexion.total_changes - antes
+
+    def _contactos(self, condicion: str, parametros=()) -> List[Dict[str, Any]]:
+        filas = self.conexion.execute(
+            f"SELECT archivo, numero, nombre, estado, intentos, motivo, reintentar_en, clase"
+            f" FROM contactos WHERE corrida = ? AND {condicion} ORDER BY orden", (self.corrida, *parametros)
+        ).fetchall()
+        return [dict(fila) for fila in filas]
+
+    def pendientes(self) -> List[Dict[str, Any]]:
+        """
+        Contactos por procesar, en el orden original. Un contacto que quedó
+        'intentando' (corte a mitad del envío) vuelve a la cola, salvo que su
+        archivo ya no esté: se movió a enviados, así que el envío sí ocurrió.
+        """
+        for contacto in self._contactos("estado = ?", (ESTADO_INTENTANDO,)):
+            if not os.path.exists(contacto["archivo"]):
+                self._actualizar(contacto, ESTADO_ENVIADO, "recuperado: el archivo ya se había movido")
+        return self._contactos("estado IN (?, ?)", (ESTADO_PENDIENTE, ESTADO_INTENTANDO))
+
+    def reintentos(self) -> List[Dict[str, Any]]:
+        """Fallos transitorios con intentos disponibles, del más próximo al más lejano"""
+        contactos = self._contactos(
+            "estado = ? AND reintentar_en IS NOT NULL AND intentos < ?", (ESTADO_FALLIDO, self.max_intentos)
+        )
+        return sorted(contactos, key=lambda c: c["reintentar_en"])
+
+    def enviados(self) -> set:
+        return {fila[0] for fila in self.conexion.execute(
+            "SELECT archivo FROM contactos WHERE corrida = ? AND estado = ?", (self.corrida, ESTADO_ENVIADO)
+        )}
+
+    def intentando(self, contacto: Dict[str, str]):
+        """Se marca antes de abrir el chat: si el proceso muere aquí, la bitácora lo sabe"""
+        with self.conexion:
+            self.conexion.execute(
+                "UPDATE contactos SET intentos = intentos + 1 WHERE corrida = ? AND archivo = ?",
+                (self.corrida, contacto["archivo"])
+            )
+        self._actualizar(contacto, ESTADO_INTENTANDO)
+
+    def devolver(self, contacto: Dict[str, str], motivo: Optional[str] = None):
+        """Vuelve a dejar pendiente un contacto que no se llegó a enviar (p. ej. la sesión se detuvo)"""
+        self._actualizar(contacto, ESTADO_PENDIENTE, motivo)
+
+    def enviado(self, contacto: Dict[str, str], indice_envio: int, motivo: Optional[str] = None):
+        self._actualizar(contacto, ESTADO_ENVIADO, motivo, indice_envio=indice_envio, reintentar_en=None, clase=None)
+        if indice_envio >= self.siguiente_indice():
+            self._guardar_meta("ultimo_indice", indice_envio)
+
+    def fallido(self, contacto: Dict[str, str], motivo: str, reintentable: Optional[bool] = None,
+                clase: Optional[str] = None):
+        """
+        Registra el fallo con su clase. Si es transitorio (por defecto, según la
+        clase), programa el reintento con espera exponencial
+        (segundos_reintento * 2^(intentos-1)); si no, queda omitido.
+        """
+        if reintentable is None:
+            reintentable = es_reintentable(clase)
+        if not reintentable:
+            self._actualizar(contacto, ESTADO_OMITIDO, motivo, reintentar_en=None, clase=clase)
+            return
+        intentos = self.conexion.execute(
+            "SELECT intentos FROM contactos WHERE corrida = ? AND archivo = ?", (self.corrida, contacto["archivo"])
+        ).fetchone()[0]
+        reintentar_en = None
+        if intentos < self.max_intentos:
+            reintentar_en = time.time() + self.segundos_reintento * 2 ** max(0, intentos - 1)
+        self._actualizar(contacto, ESTADO_FALLIDO, motivo, reintentar_en=reintentar_en, clase=clase)
+
+    def fallos(self, clases: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Contactos fallidos u omitidos de las `clases` dadas (por defecto, las
+        reintentables), por prioridad de la clase y luego en el orden original.
+        Incluye los que agotaron sus reintentos automáticos.
+        """
+        clases = set(clases) if clases else set(PRIORIDAD_REINTENTO)
+        contactos = [c for c in self._contactos("estado IN (?, ?)", (ESTADO_FALLIDO, ESTADO_OMITIDO))
+                     if c["clase"] in clases]
+        return sorted(contactos, key=lambda c: PRIORIDAD_REINTENTO.get(c["clase"], len(PRIORIDAD_REINTENTO)))
+
+    def reencolar(self, contactos: List[Dict[str, Any]]):
+        """Deja los contactos pendientes y con los intentos en cero para un reenvío manual"""
+        with self.conexion:
+            self.conexion.executemany(
+                "UPDATE contactos SET intentos = 0, reintentar_en = NULL WHERE corrida = ? AND archivo = ?",
+                [(self.corrida, c["archivo"]) for c in contactos]
+            )
+        for contacto in contactos:
+            self._actualizar(contacto, ESTADO_PENDIENTE, "reencolado para reenvío")
+
+    def siguiente_indice(self, enviados_dir: Optional[str] = None) -> int:
+        """
+        Próximo prefijo para los archivos movidos a enviados, tras el último
+        guardado en la bitácora (de cualquier corrida). Solo una bitácora que
+        aún no lo tiene (nueva o anterior a este contador) lo calcula una vez
+        desde sus registros y los prefijos presentes en `enviados_dir`.
+        """
+        ultimo = self._meta("ultimo_indice")
+        if ultimo is not None:
+            return int(ultimo) + 1
+        mayor = self.conexion.execute("SELECT COALESCE(MAX(indice_envio), 0) FROM contactos").fetchone()[0]
+        if enviados_dir and os.path.isdir(enviados_dir):
+            for nombre in os.listdir(enviados_dir):
+                prefijo = re.match(r"(\d+)_", nombre)
+                if prefijo:
+                    mayor = max(mayor, int(prefijo.group(1)))
+        self._guardar_meta("ultimo_indice", mayor)
+        return mayor + 1
+
+    def resumen(self):
+        conteos = dict(self.conexion.execute(
+            "SELECT estado, COUNT(*) FROM contactos WHERE corrida = ? GROUP BY estado", (self.corrida,)
+        ).fetchall())
+        print(f"\n📒 === BITÁCORA ({self.archivo}) ===")
+        print(f"✅ Enviados: {conteos.get(ESTADO_ENVIADO, 0)} | ❌ Fallidos: {conteos.get(ESTADO_FALLIDO, 0)}"
+              f" | ⏭️ Omitidos: {conteos.get(ESTADO_OMITIDO, 0)}"
+              f" | ⏳ Pendientes: {conteos.get(ESTADO_PENDIENTE, 0) + conteos.get(ESTADO_INTENTANDO, 0)}")
+        fallos = self._contactos("estado IN (?, ?)", (ESTADO_FALLIDO, ESTADO_OMITIDO))
+        for contacto in fallos:
+            print(f"   {contacto['numero']} ({contacto['nombre']}): {contacto['motivo']} [{contacto['clase'] or '-'}]")
+        por_clase = {}
+        for contacto in fallos:
+            por_clase[contacto["clase"] or "-"] = por_clase.get(contacto["clase"] or "-", 0) + 1
+        if por_clase:
+            print("   Por clase: " + ", ".join(
+                f"{clase} {cantidad}{' (reintentable)' if es_reintentable(clase) else ''}"
+                for clase, cantidad in sorted(por_clase.items(), key=lambda item: -item[1])
+            ))
+
+    def cerrar(self):
+        self.conexion.close()
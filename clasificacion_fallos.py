@@ -0,0 +1,92 @@
+"""
+Clasificación de Fallos de Envío
+================================
+
+Cada fallo de un envío (WhatsApp o correo) se guarda en la bitácora con una
+clase, además del motivo en texto. La clase decide si vale la pena reintentar
+y en qué orden: `--reintentar-fallidos` reenvía en un solo lote solo las
+clases reintentables, de la más a la menos probable de salir bien.
+"""
+
+import smtplib
+import socket
+from typing import Iterable, Optional
+
+FALLO_NUMERO_INVALIDO = "numero_invalido"
+FALLO_PLANTILLA = "plantilla_no_encontrada"
+FALLO_TIEMPO = "tiempo_agotado"
+FALLO_ARCHIVO = "archivo_faltante"
+FALLO_SMTP_AUTENTICACION = "smtp_autenticacion"
+FALLO_SMTP_TRANSITORIO = "smtp_transitorio"
+FALLO_SMTP_RECHAZO = "smtp_rechazo"
+FALLO_RED = "red"
+FALLO_OTRO = "otro"
+
+# Clases reintentables y su prioridad (menor primero). Las demás necesitan que
+# alguien corrija algo antes (el número, el archivo, la contraseña del correo,
+# el mensaje o el destinatario que el servidor rechazó de forma permanente).
+PRIORIDAD_REINTENTO = {
+    FALLO_SMTP_TRANSITORIO: 0,
+    FALLO_RED: 0,
+    FALLO_TIEMPO: 1,
+    FALLO_PLANTILLA: 2,
+    FALLO_OTRO: 3,
+}
+
+CLASES = (FALLO_NUMERO_INVALIDO, FALLO_PLANTILLA, FALLO_TIEMPO, FALLO_ARCHIVO, FALLO_SMTP_AUTENTICACION,
+          FALLO_SMTP_TRANSITORIO, FALLO_SMTP_RECHAZO, FALLO_RED, FALLO_OTRO)
+
+# Motivos en texto que ya usan el emisor de WhatsApp y el de correo
+_CLASE_POR_MOTIVO = {
+    "número sin whatsapp": FALLO_NUMERO_INVALIDO,
+    "correo inválido": FALLO_NUMERO_INVALIDO,
+    "archivo no encontrado": FALLO_ARCHIVO,
+    "archivo vacío": FALLO_ARCHIVO,
+    "el archivo no es un pdf": FALLO_ARCHIVO,
+    "no se pudo abrir el chat": FALLO_TIEMPO,
+}
+
+
+def clasificar_fallo(motivo: Optional[str] = None, error: Optional[BaseException] = None) -> str:
+    """Clase del fallo según la excepción (si la hay) o el motivo en texto"""
+    if error is not None:
+        if isinstance(error, smtplib.SMTPAuthenticationError):
+            return FALLO_SMTP_AUTENTICACION
+        if isinstance(error, FileNotFoundError):
+            return FALLO_ARCHIVO
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return FALLO_NUMERO_INVALIDO
+        if isinstance(error, smtplib.SMTPResponseException):
+            # 4xx: el servidor pide volver a intentar; 5xx: rechazo permanente
+            return FALLO_SMTP_TRANSITORIO if 400 <= error.smtp_code < 500 else FALLO_SMTP_RECHAZO
+        # TimeoutException de selenium sin importar selenium aquí
+        if isinstance(error, (TimeoutError, socket.timeout)) or type(error).__name__ == "TimeoutException":
+            return FALLO_TIEMPO
+        # El servidor SMTP cortó la sesión (p. ej. SMTPServerDisconnected)
+        if isinstance(error, smtplib.SMTPException):
+            return FALLO_SMTP_TRANSITORIO
+        # Errores de red de cualquier canal (sin conexión, DNS, conexión rechazada)
+        if isinstance(error, OSError):
+            return FALLO_RED
+    texto = (motivo or "").lower()
+    for prefijo, clase in _CLASE_POR_MOTIVO.items():
+        if texto.startswith(prefijo):
+            return clase
+    if "checksum" in texto or "tamaño" in texto:
+        return FALLO_ARCHIVO
+    return FALLO_OTRO
+
+
+def es_reintentable(clase: Optional[str]) -> bool:
+    return clase in PRIORIDAD_REINTENTO
+
+
+def validar_clases(clases: Optional[Iterable[str]]) -> Optional[list]:
+    """Clases pedidas por el usuario (p. ej. en `--clases`); ValueError si alguna no existe"""
+    if not clases:
+        return None
+    clases = list(clases)
+    desconocidas = [clase for clase in clases if clase not in CLASES]
+    if desconocidas:
+        raise ValueError(f"Clases de fallo desconocidas: {', '.join(desconocidas)} (opciones: {', '.join(CLASES)})")
+    return clases
@@ -0,0 +1,44 @@
+"""
+Configuración compartida
+========================
+
+Carga `config.json` una sola vez y resuelve las rutas de trabajo para que
+todos los puntos de entrada (generador, envío por correo y por WhatsApp)
+usen los mismos valores sin depender del directorio desde el que se ejecuten.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+DIRECTORIO_PROYECTO = os.path.dirname(os.path.abspath(__file__))
+RUTA_CONFIG_DEFECTO = os.path.join(DIRECTORIO_PROYECTO, "config.json")
+# Carpeta de salida del generador, relativa al directorio de trabajo (la de `ConfiguracionReporte`)
+DIRECTORIO_SALIDA = "output"
+
+
+def cargar_config(ruta: Optional[str] = None) -> Dict[str, Any]:
+    """Lee el archivo de configuración (por defecto el `config.json` del proyecto)"""
+    ruta = ruta or RUTA_CONFIG_DEFECTO
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ruta_excel(config: Dict[str, Any]) -> str:
+    """Ruta completa del libro de Excel con la liquidación"""
+    return config['base_dir'] + config['ruta_file']
+
+
+def directorio_whatsapp(config: Dict[str, Any]) -> str:
+    """Carpeta donde el envío por WhatsApp busca los PDFs"""
+    return config.get('directorio_tel') or os.path.join(config['base_dir'], "dist", "output", "prueba")
+
+
+def directorio_email(config: Dict[str, Any]) -> str:
+    """Carpeta donde el envío por correo busca los PDFs"""
+    return config.get('directorio_email') or os.path.join(DIRECTORIO_PROYECTO, "dist", "output", "email")
+
+
+def directorio_verificacion(config: Dict[str, Any]) -> str:
+    """Carpeta donde se guarda el Excel de verificación de teléfonos"""
+    return os.path.join(config['base_dir'], "output", "tel_verif")
@@ -0,0 +1,122 @@
+"""
+Consulta del Registro de Eventos
+================================
+
+Resume uno o varios `eventos.jsonl` (ver registro_eventos.py): por etapa, la
+cantidad de eventos, los resultados, los percentiles de duración y las clases
+de error más frecuentes. Por defecto solo considera la última corrida de cada
+archivo.
+
+Uso:
+    python consultar_eventos.py output/eventos.jsonl
+    python consultar_eventos.py output/whatsapp/eventos_*.jsonl --todas --etapa whatsapp_enviar
+    python consultar_eventos.py output/eventos.jsonl --corrida 20250815-093012-4120 --json
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from configuracion import DIRECTORIO_SALIDA
+from perfilado import percentil
+from registro_eventos import ARCHIVO_EVENTOS
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def leer_eventos(archivo: str, corrida: Optional[str] = None, todas: bool = False) -> List[Dict[str, Any]]:
+    """Eventos del archivo: los de `corrida`, todos con `todas`, o los de la última corrida"""
+    eventos = []
+    with open(archivo, "r", encoding="utf-8") as f:
+        for numero, linea in enumerate(f, 1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                eventos.append(json.loads(linea))
+            except json.JSONDecodeError:
+                # Una línea cortada (p. ej. el proceso terminó a la fuerza) no invalida el resto
+                print(f"⚠️ Línea {numero} inválida en {archivo}, se ignora", file=sys.stderr)
+    if todas:
+        return eventos
+    if corrida is None and eventos:
+        corrida = eventos[-1].get("corrida")
+    return [e for e in eventos if e.get("corrida") == corrida]
+
+
+def resumir(eventos: Iterable[Dict[str, Any]], etapas: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    duraciones: Dict[str, List[float]] = defaultdict(list)
+    resultados: Dict[str, Counter] = defaultdict(Counter)
+    errores: Dict[str, Counter] = defaultdict(Counter)
+    for evento in eventos:
+        etapa = evento.get("etapa")
+        if etapas and etapa not in etapas:
+            continue
+        resultados[etapa][evento.get("resultado")] += 1
+        if evento.get("segundos") is not None:
+            duraciones[etapa].append(evento["segundos"])
+        if evento.get("error"):
+            errores[etapa][evento["error"]] += 1
+    resumen = {}
+    for etapa in resultados:
+        valores = duraciones[etapa]
+        resumen[etapa] = {
+            "n": sum(resultados[etapa].values()),
+            "resultados": dict(resultados[etapa]),
+            "errores": dict(errores[etapa].most_common()),
+            "total_s": sum(valores),
+            "max_s": max(valores) if valores else 0.0,
+            **{f"p{p}_s": percentil(valores, p) for p in PERCENTILES},
+        }
+    return resumen
+
+
+def imprimir(resumen: Dict[str, Dict[str, Any]]):
+    print(f"{'etapa':<22}{'n':>7}" + "".join(f"{f'p{p}':>10}" for p in PERCENTILES) + f"{'máx':>10}{'total':>11}")
+    for etapa, datos in sorted(resumen.items(), key=lambda item: item[1]["total_s"], reverse=True):
+        print(f"{etapa:<22}{datos['n']:>7}"
+              + "".join(f"{datos[f'p{p}_s']:>9.3f}s" for p in PERCENTILES)
+              + f"{datos['max_s']:>9.3f}s{datos['total_s']:>10.1f}s")
+        resultados = ", ".join(f"{resultado}: {cantidad}" for resultado, cantidad in datos["resultados"].items())
+        print(f"    {resultados}")
+        if datos["errores"]:
+            print("    ❌ " + ", ".join(f"{error} x{cantidad}" for error, cantidad in datos["errores"].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Percentiles por etapa a partir del registro de eventos")
+    parser.add_argument("archivos", nargs="*",
+                        default=[os.path.join(DIRECTORIO_SALIDA, ARCHIVO_EVENTOS)],
+                        help="Archivos eventos*.jsonl (acepta comodines)")
+    parser.add_argument("--corrida", default=None, help="Identificador de la corrida (por defecto la última)")
+    parser.add_argument("--todas", action="store_true", help="Considera todas las corridas del archivo")
+    parser.add_argument("--etapa", action="append", help="Solo estas etapas (se puede repetir)")
+    parser.add_argument("--json", action="store_true", help="Imprime el resumen como JSON")
+    args = parser.parse_args(argv)
+
+    archivos = sorted({ruta for patron in args.archivos for ruta in (glob.glob(patron) or [patron])})
+    eventos = []
+    for archivo in archivos:
+        if not os.path.exists(archivo):
+            print(f"❌ No existe {archivo}", file=sys.stderr)
+            sys.exit(1)
+        eventos.extend(leer_eventos(archivo, args.corrida, args.todas))
+    if not eventos:
+        print("⚠️ No hay eventos que resumir.")
+        return
+
+    resumen = resumir(eventos, args.etapa)
+    if args.json:
+        print(json.dumps(resumen, indent=2, ensure_ascii=False))
+        return
+    corridas = sorted({evento.get("corrida") for evento in eventos})
+    print(f"📊 {len(eventos)} eventos de {len(corridas)} corrida(s): {', '.join(corridas)}\n")
+    imprimir(resumen)
+
+
+if __name__ == "__main__":
+    main()
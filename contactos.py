@@ -0,0 +1,182 @@
+"""
+Normalización de Contactos
+==========================
+
+Limpia y valida de una sola vez (operaciones vectorizadas de pandas) los
+teléfonos y correos de la hoja 'INFO PRO'. Para cada cédula produce el
+celular en formato E.164, el correo validado y el canal por el que se debe
+enviar el reporte ('tel', 'email' o 'impresion'). Los valores presentes pero
+inválidos quedan en una tabla de rechazados para revisión manual.
+
+Para un valor suelto (un proveedor o un archivo) están `clave_cedula`,
+`normalizar_telefono` y `es_email_valido`, que aplican las mismas reglas sobre
+`str` sin construir una Series por llamada.
+"""
+
+import re
+import pandas as pd
+from typing import Any, Tuple
+
+
+class ConfiguracionContactos:
+    """Reglas de validación de contactos"""
+
+    PREFIJO_PAIS = '57'
+    # Celulares colombianos: 10 dígitos empezando por 3
+    PATRON_CELULAR = r'^3\d{9}$'
+    PATRON_EMAIL = r'^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$'
+    EMAILS_BASURA = {'no@no.com', '2@2.com'}
+    # Valores que en la hoja significan "sin dato"
+    VALORES_VACIOS = {'', '0', 'nan', 'none', 'nat'}
+
+    COLUMNA_CEDULA = 'CEDULA'
+    COLUMNA_NOMBRE = 'NOMBRE'
+    COLUMNA_WHATSAPP = 'WHATSAPP'
+    COLUMNAS_EMAIL = ['EMAIL 1', 'EMAIL 2']
+
+    CANAL_TEL = 'tel'
+    CANAL_EMAIL = 'email'
+    CANAL_IMPRESION = 'impresion'
+
+
+def normalizar_cedula(serie: pd.Series) -> pd.Series:
+    """Convierte cédulas numéricas o de texto a una clave de texto uniforme"""
+    return (
+        serie.fillna('').astype(str)
+        .str.strip()
+        .str.replace(r'\.0+$', '', regex=True)
+    )
+
+
+def clave_cedula(valor: Any) -> str:
+    """Como `normalizar_cedula`, para una sola cédula"""
+    if valor is None or valor != valor:
+        return ''
+    return re.sub(r'\.0+$', '', str(valor).strip())
+
+
+def _texto_limpio(serie: pd.Series) -> pd.Series:
+    """Texto sin espacios, con los marcadores de 'sin dato' convertidos en cadena vacía"""
+    texto = serie.fillna('').astype(str).str.strip().str.replace(r'\.0+$', '', regex=True)
+    return texto.mask(texto.str.lower().isin(ConfiguracionContactos.VALORES_VACIOS), '')
+
+
+def normalizar_telefonos(serie: pd.Series) -> pd.Series:
+    """
+    Retorna el número nacional de 10 dígitos, o cadena vacía si el valor no es
+    un celular válido. Acepta números con o sin indicativo 57 y con separadores.
+    """
+    digitos = _texto_limpio(serie).str.replace(r'\D', '', regex=True)
+    prefijo = ConfiguracionContactos.PREFIJO_PAIS
+    con_prefijo = (digitos.str.len() == 10 + len(prefijo)) & digitos.str.startswith(prefijo)
+    digitos = digitos.mask(con_prefijo, digitos.str[len(prefijo):])
+    validos = digitos.str.match(ConfiguracionContactos.PATRON_CELULAR)
+    return digitos.where(validos, '')
+
+
+def normalizar_telefono(valor: Any) -> str:
+    """Como `normalizar_telefonos`, para un solo valor"""
+    texto = clave_cedula(valor)
+    if texto.lower() in ConfiguracionContactos.VALORES_VACIOS:
+        return ''
+    digitos = re.sub(r'\D', '', texto)
+    prefijo = ConfiguracionContactos.PREFIJO_PAIS
+    if len(digitos) == 10 + len(prefijo) and digitos.startswith(prefijo):
+        digitos = digitos[len(prefijo):]
+    return digitos if re.match(ConfiguracionContactos.PATRON_CELULAR, digitos) else ''
+
+
+def a_e164(numero_nacional: str) -> str:
+    """Formatea un número nacional como E.164 (+57XXXXXXXXXX)"""
+    nacional = normalizar_telefono(numero_nacional)
+    return f"+{ConfiguracionContactos.PREFIJO_PAIS}{nacional}" if nacional else ''
+
+
+def normalizar_emails(serie: pd.Series) -> pd.Series:
+    """Retorna el correo en minúsculas, o cadena vacía si es inválido o de relleno"""
+    email = _texto_limpio(serie).str.strip(' ;,').str.lower()
+    validos = (
+        email.str.match(ConfiguracionContactos.PATRON_EMAIL)
+        & ~email.isin(ConfiguracionContactos.EMAILS_BASURA)
+    )
+    return email.where(validos, '')
+
+
+def normalizar_contactos(df_info: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Normaliza toda la hoja 'INFO PRO' de una vez.
+
+    Returns:
+        (contactos, rechazados) donde `contactos` está indexado por cédula con
+        las columnas telefono, telefono_e164, email y canal, y `rechazados`
+        lista los valores descartados con el motivo.
+    """
+    cfg = ConfiguracionContactos
+    columnas_salida = ['telefono', 'telefono_e164', 'email', 'canal']
+    columnas_rechazo = ['cedula', 'nombre', 'campo', 'valor', 'motivo']
+
+    if df_info is None or df_info.empty or cfg.COLUMNA_CEDULA not in df_info.columns:
+        vacio = pd.DataFrame(columns=columnas_salida)
+        vacio.index.name = 'cedula'
+        return vacio, pd.DataFrame(columns=columnas_rechazo)
+
+    cedulas = normalizar_cedula(df_info[cfg.COLUMNA_CEDULA])
+    nombres = df_info.get(cfg.COLUMNA_NOMBRE, pd.Series('', index=df_info.index)).fillna('').astype(str)
+    vacia = pd.Series('', index=df_info.index)
+    rechazos = []
+
+    # Teléfonos
+    crudo_tel = _texto_limpio(df_info.get(cfg.COLUMNA_WHATSAPP, vacia))
+    telefono = normalizar_telefonos(crudo_tel)
+    malos = (crudo_tel != '') & (telefono == '')
+    rechazos.append(pd.DataFrame({
+        'cedula': cedulas[malos], 'nombre': nombres[malos],
+        'campo': cfg.COLUMNA_WHATSAPP, 'valor': crudo_tel[malos],
+        'motivo': 'celular inválido'
+    }))
+
+    # Correos: el primero válido entre EMAIL 1 y EMAIL 2
+    email = vacia.copy()
+    for columna in cfg.COLUMNAS_EMAIL:
+        if columna not in df_info.columns:
+            continue
+        crudo = _texto_limpio(df_info[columna])
+        limpio = normalizar_emails(crudo)
+        malos = (crudo != '') & (limpio == '')
+        rechazos.append(pd.DataFrame({
+            'cedula': cedulas[malos], 'nombre': nombres[malos],
+            'campo': columna, 'valor': crudo[malos],
+            'motivo': crudo[malos].str.lower().isin(cfg.EMAILS_BASURA).map(
+                {True: 'correo de relleno', False: 'correo inválido'}
+            )
+        }))
+        email = email.mask(email == '', limpio)
+
+    contactos = pd.DataFrame({
+        'cedula': cedulas,
+        'telefono': telefono,
+        'email': email,
+    })
+    contactos['telefono_e164'] = ('+' + cfg.PREFIJO_PAIS + contactos['telefono']).where(contactos['telefono'] != '', '')
+    contactos['canal'] = cfg.CANAL_IMPRESION
+    contactos.loc[contactos['email'] != '', 'canal'] = cfg.CANAL_EMAIL
+    contactos.loc[contactos['telefono'] != '', 'canal'] = cfg.CANAL_TEL
+
+    # Una fila por cédula, prefiriendo la que tenga el mejor canal
+    prioridad = contactos['canal'].map({cfg.CANAL_TEL: 0, cfg.CANAL_EMAIL: 1, cfg.CANAL_IMPRESION: 2})
+    contactos = (
+        contactos.assign(_prioridad=prioridad)
+        .sort_values('_prioridad', kind='stable')
+        .drop_duplicates('cedula')
+        .drop(columns='_prioridad')
+        .set_index('cedula')[columnas_salida]
+    )
+
+    rechazados = pd.concat(rechazos, ignore_index=True)[columnas_rechazo]
+    return contactos, rechazados
+
+
+def es_email_valido(email: str) -> bool:
+    """Valida un correo suelto con las mismas reglas de la normalización"""
+    return bool(email) and re.match(ConfiguracionContactos.PATRON_EMAIL, email) is not None \
+        and email.lower() not in ConfiguracionContactos.EMAILS_BASURA
@@ -12,8 +12,15 @@ class ReportEmailSender:
         self.password = password
         self.asunto = asunto
         self.cuerpo = cuerpo
+        # Excepción del último envío fallido (None si no falló), para el registro de eventos
+        self.ultimo_error = None
 
-    def send_mail(self, destinatario, archivo):
+    def send_mail(self, destinatario, archivo, contenido=None):
+        """
+        Envía el correo con `archivo` adjunto. Si se pasa `contenido` (bytes ya
+        en memoria) se adjunta directamente sin volver a leer el disco.
+        """
+        self.ultimo_error = None
         mensaje = MIMEMultipart()
         mensaje["From"] = self.remitente
         mensaje["To"] = destinatario
@@ -21,20 +28,23 @@ class ReportEmailSender:
         mensaje.attach(MIMEText(self.cuerpo, "plain"))
 
         # Adjuntar archivo
-        if os.path.exists(archivo):
-            with open(archivo, "rb") as adj:
-                if archivo.lower().endswith((".png", ".jpg", ".jpeg", ".gif")):
-                    imagen = MIMEImage(adj.read(), name=os.path.basename(archivo))
-                    mensaje.attach(imagen)
-                else:
-                    parte = MIMEBase("application", "octet-stream")
-                    parte.set_payload(adj.read())
-                    encoders.encode_base64(parte)
-                    parte.add_header("Content-Disposition", f"attachment; filename={os.path.basename(archivo)}")
-                    mensaje.attach(parte)
+        if contenido is not None or os.path.exists(archivo):
+            if contenido is None:
+                with open(archivo, "rb") as adj:
+                    contenido = adj.read()
+            if archivo.lower().endswith((".png", ".jpg", ".jpeg", ".gif")):
+                imagen = MIMEImage(contenido, name=os.path.basename(archivo))
+                mensaje.attach(imagen)
+            else:
+                parte = MIMEBase("application", "octet-stream")
+                parte.set_payload(contenido)
+                encoders.encode_base64(parte)
+                parte.add_header("Content-Disposition", f"attachment; filename={os.path.basename(archivo)}")
+                mensaje.attach(parte)
             print(f"📎 Archivo adjuntado: {archivo}")
         else:
             print(f"⚠ Archivo no encontrado: {archivo}")
+            self.ultimo_error = FileNotFoundError(archivo)
             return False
 
         # Enviar correo
@@ -48,4 +58,5 @@ class ReportEmailSender:
             return True
         except Exception as e:
             print(f"❌ Error al enviar el correo a {destinatario}: {e}")
+            self.ultimo_error = e
             return False
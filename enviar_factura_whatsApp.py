@@ -1,71 +1,241 @@
 import os
+import argparse
 import pandas as pd
-import json
-from WhatsAppSender import WhatsAppSafeSender
-from Reporte_Proveedor import ReporteProveedor
+import perfilado
+import registro_eventos
+from contactos import ConfiguracionContactos
+from manifiesto import huella_generacion, pdfs_por_enviar
+from verificacion_whatsapp import CacheVerificacion
+from bitacora_envios import BitacoraEnvios
+from clasificacion_fallos import validar_clases
+from configuracion import cargar_config, directorio_whatsapp, directorio_verificacion
 
-# Cargar configuración
-with open("config.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
 
-def procesar_contactos():
+def crear_cache_verificacion(config):
+    """Caché de verificación de números según la configuración"""
+    return CacheVerificacion(
+        archivo=config.get('archivo_verificacion'),
+        dias_vigencia=config.get('dias_vigencia_verificacion')
+    )
+
+
+def crear_bitacora(config, archivo=None):
+    """Bitácora de envíos (checkpoint por contacto y cola de reintentos) según la configuración"""
+    return BitacoraEnvios(
+        archivo=archivo or config.get('archivo_bitacora'),
+        max_intentos=config.get('max_intentos_envio'),
+        segundos_reintento=config.get('segundos_reintento')
+    )
+
+
+def procesar_contactos(config, reportes=None):
+    """
+    Arma la lista de contactos para WhatsApp y guarda el Excel de verificación.
+    Si se reciben los registros del generador se usan directamente; si no,
+    se toman del manifiesto de la carpeta de envío.
+    """
     base_dir = config['base_dir']
     print(base_dir)
 
     # Carpeta donde se guardará el Excel de verificación
-    output_dir = os.path.join(base_dir, "output", "tel_verif")
+    output_dir = directorio_verificacion(config)
     os.makedirs(output_dir, exist_ok=True)
 
-    # Carpeta donde buscará los PDFs
-    directorio_tel = os.path.join(base_dir,"dist", "output", "prueba")
-
     contactos_archivos = []
     contactos = []
+    cache = crear_cache_verificacion(config)
 
-    for archivo in os.listdir(directorio_tel):
-        if archivo.lower().endswith(".pdf") and "!" in archivo:
-            ruta_completa = os.path.join(directorio_tel, archivo)
-            base = archivo.removesuffix(".pdf")
-            partes = base.split("!")
-            if len(partes) == 3:
-                nombre, cc, telefono = partes
-                contactos.append({
-                    "C.c": cc,
-                    "nombre": nombre,
-                    "celular": telefono,
-                    "verificado": None
-                })
-                numero_formateado = "+57" + telefono
-                contactos_archivos.append({
-                    "numero": numero_formateado,
-                    "archivo": ruta_completa,
-                    "nombre": nombre
-                })
+    if reportes is not None:
+        entradas = [
+            (r['ruta'], r['nombre'], r['cedula'], r['telefono'], r.get('sha256'), r.get('tamano'), None)
+            for r in reportes if r['canal'] == 'tel'
+        ]
+    else:
+        # PDFs de la carpeta de envío, según su manifiesto (o escaneándola si no lo tiene)
+        entradas = [
+            (e['ruta'], e['nombre'], e['cedula'], e['destino'], e['sha256'], e['tamano'], e.get('generado'))
+            for e in pdfs_por_enviar(directorio_whatsapp(config), ConfiguracionContactos.CANAL_TEL)
+        ]
+
+    for ruta_completa, nombre, cc, numero_formateado, sha256, tamano, generado in entradas:
+        if not numero_formateado:
+            print(f"⚠️ Celular inválido para {nombre} ({cc}), se omite: {os.path.basename(ruta_completa)}")
+            continue
+        contactos.append({
+            "C.c": cc,
+            "nombre": nombre,
+            "celular": numero_formateado,
+            "verificado": cache.obtener(numero_formateado)
+        })
+        contactos_archivos.append({
+            "numero": numero_formateado,
+            "archivo": ruta_completa,
+            "nombre": nombre,
+            # Checksum del generador: el emisor verifica el PDF antes de adjuntarlo
+            "sha256": sha256,
+            "tamano": tamano,
+            # Identifica la generación del PDF junto con el hash (ver manifiesto.huella_generacion)
+            "generado": generado
+        })
 
     # Guardar en Excel
     output_path = os.path.join(output_dir, "tel_verificacion.xlsx")
     pd.DataFrame(contactos).to_excel(output_path, index=False)
+    cache.cerrar()
 
     return contactos_archivos
 
-if __name__ == "__main__":
-    contactos_archivos = procesar_contactos()
-
-    if contactos_archivos:
-        # Se crean las rutas para la carpeta de enviados
-        directorio_tel = os.path.join(config['base_dir'], "dist", "output", "prueba")
-        enviados_dir = os.path.join(directorio_tel, "enviados")
-        
-        # Se pasa la ruta de la carpeta de enviados al constructor
-        sender = WhatsAppSafeSender(contacts=contactos_archivos,
-                                send_buttons=config['send_buttons'],
-                                mensaje=config["menssage_whatsApp"],
-                                profile_path=config['profile_path'],
-                                attach_buttons=config["attach_buttons"],
-                                document_buttons=config["document_buttons"],
-                                no_contact_buttons=config["no_contact_buttons"],
-                                enviados_dir=enviados_dir)
-        
+
+def crear_sender(config, contactos_archivos, enviados_dir=None, **opciones):
+    """
+    Construye el emisor de WhatsApp con los valores de la configuración.
+    `opciones` sobrescribe cualquier argumento del constructor (p. ej. por línea).
+    """
+    # Importación diferida: el emisor arrastra selenium/pyautogui, que no hacen falta para armar contactos
+    from WhatsAppSender import WhatsAppSafeSender
+
+    # Se crean las rutas para la carpeta de enviados
+    enviados_dir = enviados_dir or os.path.join(directorio_whatsapp(config), "enviados")
+
+    argumentos = dict(contacts=contactos_archivos,
+                      send_buttons=config['send_buttons'],
+                      mensaje=config["menssage_whatsApp"],
+                      profile_path=config['profile_path'],
+                      attach_buttons=config["attach_buttons"],
+                      document_buttons=config["document_buttons"],
+                      no_contact_buttons=config["no_contact_buttons"],
+                      preview_buttons=config.get("preview_buttons"),
+                      archivo_escala=config.get("archivo_escala_pantalla"),
+                      enviados_dir=enviados_dir,
+                      base_url=config.get('whatsapp_base_url'),
+                      headless=config.get('whatsapp_headless', False),
+                      chrome_binario=config.get('chrome_binario'),
+                      modo_adjunto=config.get('modo_adjunto', 'autogui'))
+    argumentos.update(opciones)
+    argumentos.setdefault('cache_verificacion', crear_cache_verificacion(config))
+    argumentos.setdefault('bitacora', crear_bitacora(config))
+
+    # Se pasa la ruta de la carpeta de enviados al constructor
+    sender = WhatsAppSafeSender(**argumentos)
+    sender.agregar_oyente(registro_eventos.OyenteEnvios())
+    return sender
+
+
+def crear_monitor(config, sender, plan=None, panel=False, archivo=None, nombre=""):
+    """Monitor de progreso (status.json y, con `panel`, la terminal) suscrito a los eventos del emisor"""
+    from panel_envios import MonitorEnvios
+
+    monitor = MonitorEnvios(
+        sender.quota_manager,
+        archivo_estado=(archivo or config.get('archivo_estado')
+                        or os.path.join(directorio_whatsapp(config), MonitorEnvios.ARCHIVO_ESTADO_DEFECTO)),
+        panel=panel,
+        intervalo=config.get('intervalo_estado'),
+        plan=plan,
+        nombre=nombre
+    )
+    sender.agregar_oyente(monitor)
+    return monitor
+
+
+def verificar_whatsapp(config, contactos_archivos, forzar=False):
+    """Comprueba en WhatsApp Web cada número una sola vez y guarda el resultado en caché"""
+    if not contactos_archivos:
+        print("⚠️ No hay números para verificar.")
+        return {}
+    return crear_sender(config, contactos_archivos).verificar_numeros(forzar=forzar)
+
+
+def enviar_whatsapp(config, contactos_archivos, enviados_dir=None, usar_plan=False, panel=False):
+    """
+    Envía los PDFs por WhatsApp a la lista de contactos. La bitácora (y el
+    plan, con `usar_plan`) se retoma si los PDFs son los mismos del envío
+    anterior y empieza de cero si son de otra generación. Con `usar_plan` se
+    espera cada turno del plan. El progreso se publica en status.json y, con
+    `panel`, en la terminal.
+    """
+    if not contactos_archivos:
+        print("⚠️ No se encontraron archivos PDF válidos para enviar.")
+        return
+
+    generacion = huella_generacion(contactos_archivos)
+    sender = crear_sender(config, contactos_archivos, enviados_dir)
+    sender.bitacora.iniciar_corrida(generacion)
+    plan = None
+    if usar_plan:
+        from planificador_envios import obtener_plan
+        plan = obtener_plan(config, contactos_archivos, sender.quota_manager, generacion=generacion)
+        plan.resumen()
+    with crear_monitor(config, sender, plan, panel):
+        sender.main(plan=plan)
+
+
+def reanudar_whatsapp(config, enviados_dir=None, usar_plan=False, panel=False):
+    """
+    Retoma el último envío desde la bitácora (su corrida guardada): los
+    pendientes (incluido el que quedó a medias) y luego la cola de reintentos,
+    sin volver a listar carpetas.
+    """
+    bitacora = crear_bitacora(config)
+    contactos_archivos = bitacora.pendientes()
+    if not contactos_archivos and not bitacora.reintentos():
+        print("✅ No hay envíos pendientes en la bitácora.")
+        bitacora.resumen()
+        return
+
+    print(f"🔁 Reanudando: {len(contactos_archivos)} pendientes, {len(bitacora.reintentos())} en cola de reintentos")
+    sender = crear_sender(config, contactos_archivos, enviados_dir, bitacora=bitacora)
+    plan = None
+    if usar_plan:
+        from planificador_envios import obtener_plan
+        plan = obtener_plan(config, contactos_archivos, sender.quota_manager, generacion=bitacora.corrida)
+    with crear_monitor(config, sender, plan, panel):
+        sender.main(plan=plan)
+
+
+def reintentar_whatsapp(config, clases=None, enviados_dir=None, panel=False):
+    """
+    Reenvía en un solo lote los fallos de la bitácora de las `clases` dadas
+    (por defecto las reintentables), primero los de mayor prioridad, sin volver
+    a listar carpetas ni esperar la espera exponencial de cada uno.
+    """
+    bitacora = crear_bitacora(config)
+    fallos = bitacora.fallos(validar_clases(clases))
+    if not fallos:
+        print("✅ No hay fallos para reenviar en la bitácora.")
+        bitacora.resumen()
+        return
+
+    bitacora.reencolar(fallos)
+    print(f"🔁 Reenviando {len(fallos)} fallos por prioridad de clase")
+    contactos_archivos = [{"numero": f["numero"], "archivo": f["archivo"], "nombre": f["nombre"]} for f in fallos]
+    sender = crear_sender(config, contactos_archivos, enviados_dir, bitacora=bitacora)
+    with crear_monitor(config, sender, panel=panel):
         sender.main()
-    else:
-        print("⚠️ No se encontraron archivos PDF válidos para enviar.")
\ No newline at end of file
+
+
+def planificar_whatsapp(config, contactos_archivos, nuevo=False):
+    """Calcula (o recalcula) el plan de envío y muestra su ETA, sin enviar nada"""
+    from WhatsAppSender import QuotaManager
+    from planificador_envios import obtener_plan
+
+    plan = obtener_plan(config, contactos_archivos, QuotaManager(), nuevo=nuevo)
+    plan.resumen()
+    return plan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Envía los PDFs por WhatsApp")
+    parser.add_argument('--panel', action='store_true',
+                        help="Muestra el progreso del envío en la terminal (además de status.json)")
+    perfilado.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    # Cargar configuración
+    config = cargar_config()
+    with registro_eventos.corrida(config, directorio_whatsapp(config)), \
+            perfilado.corrida(args.profile, directorio_whatsapp(config), args.profile_cada):
+        with perfilado.etapa('preparar_contactos'):
+            contactos_archivos = procesar_contactos(config)
+        with perfilado.etapa('enviar_whatsapp'):
+            enviar_whatsapp(config, contactos_archivos, panel=args.panel)
@@ -0,0 +1,117 @@
+"""
+Escritura Atómica de PDFs
+=========================
+
+Cada PDF se escribe primero en un temporal de la misma carpeta y solo se
+renombra al nombre final después de `fsync`, de modo que ni un corte del
+proceso ni el cliente de sincronización de OneDrive ven nunca un PDF a
+medias con el nombre definitivo.
+
+Para no quedar limitados por `fsync`, los archivos se confirman por lotes en
+un hilo aparte: el generador sigue renderizando mientras el lote anterior se
+sincroniza, se renombra y se sincroniza la carpeta una sola vez por lote.
+
+Los temporales que dejó una corrida anterior interrumpida se borran la primera
+vez que el escritor usa cada carpeta (solo los de la misma extensión).
+"""
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+SUFIJO_TEMPORAL = ".tmp"
+
+
+def _sincronizar_directorio(directorio: str):
+    """fsync de la carpeta para que los renombres sean durables (no disponible en Windows)"""
+    try:
+        descriptor = os.open(directorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class EscritorAtomico:
+    """Escribe archivos completos por lotes: temporal -> fsync -> renombre atómico"""
+
+    TAMANO_LOTE_DEFECTO = 32
+
+    def __init__(self, tamano_lote: Optional[int] = None):
+        self.tamano_lote = tamano_lote or self.TAMANO_LOTE_DEFECTO
+        self._lote: List[Tuple[str, str]] = []
+        self._hilo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="escritor-pdf")
+        self._confirmaciones: List[Future] = []
+        self._directorios: Set[Tuple[str, str]] = set()
+        self._cerrado = False
+
+    def _limpiar_temporales(self, ruta: str):
+        """Borra, una vez por carpeta y extensión, los temporales huérfanos de una corrida interrumpida"""
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        sufijo = os.path.splitext(ruta)[1].lower() + SUFIJO_TEMPORAL
+        if (directorio, sufijo) in self._directorios:
+            return
+        self._directorios.add((directorio, sufijo))
+        try:
+            with os.scandir(directorio) as iterador:
+                huerfanos = [item.path for item in iterador if item.name.lower().endswith(sufijo)]
+        except OSError:
+            return
+        for huerfano in huerfanos:
+            try:
+                os.remove(huerfano)
+            except OSError:
+                pass
+        if huerfanos:
+            print(f"🧹 {len(huerfanos)} temporales de una corrida interrumpida borrados en {directorio}")
+
+    def escribir(self, ruta: str, contenido: bytes):
+        """Escribe el contenido en el temporal; el nombre final aparece al confirmar el lote"""
+        self._limpiar_temporales(ruta)
+        temporal = ruta + SUFIJO_TEMPORAL
+        with open(temporal, "wb") as f:
+            f.write(contenido)
+        self._lote.append((temporal, ruta))
+        if len(self._lote) >= self.tamano_lote:
+            self._enviar_lote()
+
+    def _enviar_lote(self):
+        lote, self._lote = self._lote, []
+        self._confirmaciones.append(self._hilo.submit(self._confirmar, lote))
+
+    @staticmethod
+    def _confirmar(lote: List[Tuple[str, str]]):
+        for temporal, _ in lote:
+            with open(temporal, "rb+") as f:
+                os.fsync(f.fileno())
+        for temporal, ruta in lote:
+            os.replace(temporal, ruta)
+        for directorio in {os.path.dirname(os.path.abspath(ruta)) for _, ruta in lote}:
+            _sincronizar_directorio(directorio)
+
+    def cerrar(self):
+        """
+        Confirma lo pendiente y espera a que todos los lotes queden en disco.
+        Se puede llamar más de una vez: las siguientes no hacen nada.
+        """
+        if self._cerrado:
+            return
+        self._cerrado = True
+        if self._lote:
+            self._enviar_lote()
+        try:
+            for confirmacion in self._confirmaciones:
+                confirmacion.result()
+        finally:
+            self._confirmaciones = []
+            self._hilo.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
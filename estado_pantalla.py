@@ -0,0 +1,269 @@
+"""
+Estado de la Pantalla de WhatsApp por Plantillas
+================================================
+
+En el modo de adjunto "autogui" el emisor decide qué hacer mirando la
+pantalla. Antes cada plantilla hacía su propia captura (`locateOnScreen` y
+`locateAllOnScreen` capturan en cada llamada), así que un contacto podía
+costar decenas de capturas. `ClasificadorPantalla` toma una sola captura por
+paso, la compara con todas las plantillas relevantes con `cv2.matchTemplate`
+y entrega el estado de la interfaz con la ubicación de cada botón encontrado.
+
+Las plantillas se recortaron a una escala de pantalla concreta; con otro
+monitor, otra escala de Windows u otro tema dejan de coincidir. Por eso cada
+plantilla se lee una vez y se precalcula en varias escalas (`ESCALAS`), en
+gris y como mapa de bordes (Canny, que no depende de los colores del tema).
+La escala que coincide se guarda en `escala_pantalla.json`: las siguientes
+búsquedas en esta máquina prueban solo esa escala: la escala es de la
+pantalla, no del botón, y que un botón no esté visible es lo normal. Solo si
+nada coincide a esa escala durante un minuto (p. ej. otro monitor) se vuelve
+a barrer todas, como mucho una vez por minuto.
+"""
+
+import datetime
+import enum
+import json
+import os
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+try:
+    import pyautogui
+except Exception:
+    pyautogui = None
+
+
+class EstadoPantalla(str, enum.Enum):
+    """Estados de la interfaz, de menos a más avanzado en el envío de un documento"""
+
+    DESCONOCIDO = "desconocido"
+    CONTACTO_ENCONTRADO = "contacto_encontrado"  # chat abierto: botón de adjuntar visible
+    SIN_CONTACTO = "sin_contacto"                # la búsqueda no encontró el contacto
+    ADJUNTAR_LISTO = "adjuntar_listo"            # menú de adjuntar abierto: botón de documento visible
+    VISTA_PREVIA = "vista_previa"                # vista previa del documento abierta
+    ENVIO_LISTO = "envio_listo"                  # botón de enviar visible
+
+
+# Si hay varias coincidencias en la misma captura gana el estado más avanzado
+PRIORIDAD = (
+    EstadoPantalla.ENVIO_LISTO,
+    EstadoPantalla.VISTA_PREVIA,
+    EstadoPantalla.ADJUNTAR_LISTO,
+    EstadoPantalla.SIN_CONTACTO,
+    EstadoPantalla.CONTACTO_ENCONTRADO,
+)
+
+
+class Coincidencia:
+    """Mejor ubicación de una plantilla en una captura"""
+
+    __slots__ = ("ruta", "puntaje", "x", "y", "ancho", "alto", "escala")
+
+    def __init__(self, ruta: str, puntaje: float, x: int, y: int, ancho: int, alto: int, escala: float = 1.0):
+        self.ruta = ruta
+        self.puntaje = puntaje
+        self.x = x
+        self.y = y
+        self.ancho = ancho
+        self.alto = alto
+        self.escala = escala
+
+    @property
+    def centro(self):
+        return self.x + self.ancho // 2, self.y + self.alto // 2
+
+    def __repr__(self):
+        return (f"Coincidencia({os.path.basename(self.ruta)}, {self.puntaje:.2f}, escala={self.escala}, "
+                f"centro={self.centro})")
+
+
+class ResultadoPantalla:
+    """Estado clasificado de una captura y las coincidencias por estado"""
+
+    def __init__(self, estado: EstadoPantalla, coincidencias: Dict[EstadoPantalla, Coincidencia]):
+        self.estado = estado
+        self.coincidencias = coincidencias
+
+    def ve(self, estado: EstadoPantalla) -> bool:
+        return estado in self.coincidencias
+
+    def __repr__(self):
+        return f"ResultadoPantalla({self.estado.value}, {list(self.coincidencias.values())})"
+
+
+# Factores aplicados a las plantillas, de más a menos probable (la escala recortada primero)
+ESCALAS = (1.0, 1.25, 0.8, 1.5, 0.67, 1.1, 0.9, 1.75, 0.75, 2.0, 1.2, 0.6, 1.33, 0.5)
+LADO_MINIMO = 8
+
+
+def bordes(imagen: np.ndarray) -> np.ndarray:
+    return cv2.Canny(imagen, 50, 150)
+
+
+@lru_cache(maxsize=None)
+def piramide(ruta: str) -> Optional[Tuple[Tuple[float, np.ndarray, np.ndarray], ...]]:
+    """(escala, gris, bordes) de la plantilla en cada escala, calculado una vez por proceso; None si no existe"""
+    imagen = cv2.imread(ruta, cv2.IMREAD_GRAYSCALE) if os.path.exists(ruta) else None
+    if imagen is None:
+        return None
+    niveles = []
+    for escala in ESCALAS:
+        alto, ancho = round(imagen.shape[0] * escala), round(imagen.shape[1] * escala)
+        if min(alto, ancho) < LADO_MINIMO:
+            continue
+        interpolacion = cv2.INTER_AREA if escala < 1 else cv2.INTER_LINEAR
+        gris = imagen if escala == 1.0 else cv2.resize(imagen, (ancho, alto), interpolation=interpolacion)
+        niveles.append((escala, gris, bordes(gris)))
+    return tuple(niveles)
+
+
+class Captura:
+    """Captura en gris; su mapa de bordes se calcula solo si alguna búsqueda lo necesita"""
+
+    __slots__ = ("gris", "_bordes")
+
+    def __init__(self, gris: np.ndarray):
+        self.gris = gris
+        self._bordes = None
+
+    @property
+    def bordes(self) -> np.ndarray:
+        if self._bordes is None:
+            self._bordes = bordes(self.gris)
+        return self._bordes
+
+
+class BibliotecaPlantillas:
+    """Búsqueda multiescala de plantillas con la escala de esta máquina recordada en disco"""
+
+    ARCHIVO_ESCALA_DEFECTO = "escala_pantalla.json"
+    # Los bordes correlacionan menos que el gris aun con la plantilla correcta
+    CONFIANZA_BORDES = 0.55
+    SEGUNDOS_ENTRE_BARRIDOS = 60
+
+    def __init__(self, archivo_escala: Optional[str] = None):
+        self.archivo_escala = archivo_escala or self.ARCHIVO_ESCALA_DEFECTO
+        self.escala: Optional[float] = None
+        # Última coincidencia a la escala conocida y último barrido completo (reloj monotónico)
+        self._ultimo_acierto = time.monotonic()
+        self._ultimo_barrido = float("-inf")
+        try:
+            with open(self.archivo_escala, "r", encoding="utf-8") as f:
+                self.escala = json.load(f).get("escala")
+        except (OSError, ValueError):
+            pass
+
+    def _guardar_escala(self, escala: float):
+        if escala == self.escala:
+            return
+        print(f"📐 Escala de plantillas: {escala} (guardada en {self.archivo_escala})")
+        self.escala = escala
+        try:
+            with open(self.archivo_escala, "w", encoding="utf-8") as f:
+                json.dump({"escala": escala, "actualizado": datetime.datetime.now().isoformat(timespec="seconds")}, f)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la escala de plantillas: {e}")
+
+    def _escalas(self) -> Sequence[float]:
+        if self.escala is None:
+            return ESCALAS
+        ahora = time.monotonic()
+        if (ahora - self._ultimo_acierto < self.SEGUNDOS_ENTRE_BARRIDOS
+                or ahora - self._ultimo_barrido < self.SEGUNDOS_ENTRE_BARRIDOS):
+            return (self.escala,)
+        self._ultimo_barrido = ahora
+        return (self.escala,) + tuple(escala for escala in ESCALAS if escala != self.escala)
+
+    def buscar(self, captura: Captura, rutas: Iterable[str], confianza: float) -> Optional["Coincidencia"]:
+        """Mejor coincidencia de `rutas`, escala por escala: primero en gris y, si no, por bordes"""
+        niveles_por_ruta = [(ruta, piramide(ruta)) for ruta in rutas]
+        niveles_por_ruta = [(ruta, niveles) for ruta, niveles in niveles_por_ruta if niveles]
+        alto_captura, ancho_captura = captura.gris.shape
+        for escala in self._escalas():
+            for usar_bordes in (False, True):
+                mejor = None
+                for ruta, niveles in niveles_por_ruta:
+                    nivel = next((n for n in niveles if n[0] == escala), None)
+                    if nivel is None or nivel[1].shape[0] > alto_captura or nivel[1].shape[1] > ancho_captura:
+                        continue
+                    if usar_bordes:
+                        resultado = cv2.matchTemplate(captura.bordes, nivel[2], cv2.TM_CCOEFF_NORMED)
+                    else:
+                        resultado = cv2.matchTemplate(captura.gris, nivel[1], cv2.TM_CCOEFF_NORMED)
+                    _, puntaje, _, (x, y) = cv2.minMaxLoc(resultado)
+                    umbral = min(confianza, self.CONFIANZA_BORDES) if usar_bordes else confianza
+                    if puntaje >= umbral and (mejor is None or puntaje > mejor.puntaje):
+                        alto, ancho = nivel[1].shape
+                        mejor = Coincidencia(ruta, puntaje, x, y, ancho, alto, escala)
+                if mejor is not None:
+                    self._ultimo_acierto = time.monotonic()
+                    self._guardar_escala(escala)
+                    return mejor
+        return None
+
+
+class ClasificadorPantalla:
+    """Clasifica capturas de pantalla según las plantillas de cada estado"""
+
+    CONFIANZA_DEFECTO = 0.8
+    INTERVALO_SONDEO = 0.5
+
+    def __init__(self, plantillas: Dict[EstadoPantalla, Union[str, Sequence[str]]],
+                 confianza: Optional[float] = None, biblioteca: Optional[BibliotecaPlantillas] = None):
+        self.confianza = confianza or self.CONFIANZA_DEFECTO
+        self.biblioteca = biblioteca or BibliotecaPlantillas()
+        self.rutas: Dict[EstadoPantalla, List[str]] = {
+            estado: [rutas] if isinstance(rutas, str) else list(rutas)
+            for estado, rutas in plantillas.items() if rutas
+        }
+        self.capturas = 0
+
+    @staticmethod
+    def plantilla(ruta: str) -> Optional[np.ndarray]:
+        """Plantilla en gris a su escala original (leída una sola vez por proceso)"""
+        niveles = piramide(ruta)
+        return next((gris for escala, gris, _ in niveles if escala == 1.0), None) if niveles else None
+
+    def capturar(self) -> Captura:
+        """Una captura de la pantalla completa en escala de grises"""
+        if pyautogui is None:
+            raise RuntimeError("pyautogui no está disponible (sin pantalla)")
+        self.capturas += 1
+        return Captura(cv2.cvtColor(np.asarray(pyautogui.screenshot()), cv2.COLOR_RGB2GRAY))
+
+    def mejor_coincidencia(self, captura: Union[Captura, np.ndarray], rutas: Iterable[str],
+                           confianza: Optional[float] = None) -> Optional[Coincidencia]:
+        """La plantilla de `rutas` con mayor puntaje en la captura, a cualquier escala, si supera la confianza"""
+        if not isinstance(captura, Captura):
+            captura = Captura(captura)
+        return self.biblioteca.buscar(captura, rutas, confianza or self.confianza)
+
+    def clasificar(self, estados: Optional[Iterable[EstadoPantalla]] = None,
+                   captura: Union[Captura, np.ndarray, None] = None) -> ResultadoPantalla:
+        """Compara una sola captura con las plantillas de `estados` (por defecto todos)"""
+        if captura is None:
+            captura = self.capturar()
+        elif not isinstance(captura, Captura):
+            captura = Captura(captura)
+        estados = set(estados) if estados is not None else set(self.rutas)
+        coincidencias = {}
+        for estado in PRIORIDAD:
+            if estado in estados and estado in self.rutas:
+                coincidencia = self.mejor_coincidencia(captura, self.rutas[estado])
+                if coincidencia is not None:
+                    coincidencias[estado] = coincidencia
+        estado = next(iter(coincidencias), EstadoPantalla.DESCONOCIDO)
+        return ResultadoPantalla(estado, coincidencias)
+
+    def esperar(self, estado: EstadoPantalla, timeout: float = 10) -> Optional[Coincidencia]:
+        """Sondea con una captura por intento hasta ver el estado; None si se agota el tiempo"""
+        limite = time.monotonic() + timeout
+        while True:
+            coincidencia = self.clasificar([estado]).coincidencias.get(estado)
+            if coincidencia is not None or time.monotonic() >= limite:
+                return coincidencia
+            time.sleep(self.INTERVALO_SONDEO)
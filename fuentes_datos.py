@@ -0,0 +1,161 @@
+"""
+Fuentes de Datos para el Generador
+==================================
+
+`GestorDatos` trabaja con cuatro tablas lógicas: la liquidación, los datos de
+proveedores (direcciones), las certificaciones y los teléfonos/correos. Por
+defecto salen de las hojas del libro de Excel de contabilidad, pero leer XLSX
+es lo más lento de toda la carga; el ERP puede exportar las mismas tablas como
+CSV, Parquet o una base SQLite, que se leen sin interpretar XML.
+
+La fuente se elige en `config.json`:
+
+    "fuente_datos": {"tipo": "csv", "ruta": "C:/.../exportacion_erp"}
+    "fuente_datos": {"tipo": "parquet", "ruta": "C:/.../exportacion_erp"}
+    "fuente_datos": {"tipo": "sqlite", "ruta": "C:/.../erp.db"}
+
+Con CSV y Parquet cada tabla es un archivo de la carpeta (`liquidacion.csv`,
+`bd_pro.csv`, `cer_fl_gl.csv`, `info_pro.csv`); con SQLite, una tabla con ese
+nombre. `"tablas": {"liquidacion": "LIQ_2025", ...}` cambia los nombres. Los
+encabezados son los mismos de las hojas de Excel. Parquet requiere `pyarrow`
+(o `fastparquet`), que no está en requirements.txt: si falta, `crear_fuente`
+lo avisa antes de empezar a cargar.
+"""
+
+import abc
+import importlib.util
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+TABLA_LIQUIDACION = "liquidacion"
+TABLA_BD_PRO = "bd_pro"
+TABLA_CERTIFICACIONES = "cer_fl_gl"
+TABLA_CONTACTOS = "info_pro"
+
+HOJAS_EXCEL = {
+    TABLA_LIQUIDACION: "BD LIQUIDACION",
+    TABLA_BD_PRO: "BD PRO",
+    TABLA_CERTIFICACIONES: "CER FL GL",
+    TABLA_CONTACTOS: "INFO PRO",
+}
+
+# Columnas que en Excel llegan como fecha y en texto hay que convertir
+COLUMNAS_FECHA = ("FECHA FACTURA", "FCHA INGRESO")
+
+
+class FuenteDatos(abc.ABC):
+    """Base de las fuentes: `leer(tabla)` retorna la tabla lógica o lanza ValueError si no existe"""
+
+    tipo = ""
+    # Módulos opcionales de los que basta uno para leer esta fuente
+    dependencias = ()
+
+    def __init__(self, ruta: str, tablas: Optional[Dict[str, str]] = None):
+        self.ruta = ruta
+        self.tablas = tablas or {}
+
+    def nombre(self, tabla: str) -> str:
+        return self.tablas.get(tabla, tabla)
+
+    @abc.abstractmethod
+    def leer(self, tabla: str) -> pd.DataFrame:
+        """Tabla lógica `tabla` como DataFrame con los encabezados de la hoja de Excel"""
+
+    @staticmethod
+    def _convertir_fechas(df: pd.DataFrame) -> pd.DataFrame:
+        for columna in COLUMNAS_FECHA:
+            if columna in df.columns and not pd.api.types.is_datetime64_any_dtype(df[columna]):
+                df[columna] = pd.to_datetime(df[columna], errors='coerce')
+        return df
+
+    def __str__(self):
+        return f"{self.tipo}:{self.ruta}"
+
+
+class FuenteExcel(FuenteDatos):
+    """Hojas del libro de Excel de contabilidad (la fuente de siempre)"""
+
+    tipo = "excel"
+
+    def __init__(self, ruta: str, tablas: Optional[Dict[str, str]] = None):
+        super().__init__(ruta, dict(HOJAS_EXCEL, **(tablas or {})))
+        self._libro: Optional[pd.ExcelFile] = None
+
+    def leer(self, tabla: str) -> pd.DataFrame:
+        # Un solo ExcelFile para las cuatro hojas: el libro se abre una vez
+        if self._libro is None:
+            if not os.path.exists(self.ruta):
+                raise FileNotFoundError(f"El archivo '{self.ruta}' no se encontró.")
+            self._libro = pd.ExcelFile(self.ruta)
+        hoja = self.nombre(tabla)
+        if hoja not in self._libro.sheet_names:
+            raise ValueError(f"Worksheet named '{hoja}' not found")
+        return self._libro.parse(hoja)
+
+
+class FuenteCSV(FuenteDatos):
+    """Carpeta con un CSV (UTF-8) por tabla"""
+
+    tipo = "csv"
+    extension = ".csv"
+
+    def _archivo(self, tabla: str) -> str:
+        archivo = os.path.join(self.ruta, self.nombre(tabla) + self.extension)
+        if not os.path.isdir(self.ruta):
+            raise FileNotFoundError(f"La carpeta '{self.ruta}' no se encontró.")
+        if not os.path.exists(archivo):
+            raise ValueError(f"No existe '{archivo}'")
+        return archivo
+
+    def leer(self, tabla: str) -> pd.DataFrame:
+        return self._convertir_fechas(pd.read_csv(self._archivo(tabla), encoding='utf-8-sig'))
+
+
+class FuenteParquet(FuenteCSV):
+    """Carpeta con un Parquet por tabla (tipos conservados)"""
+
+    tipo = "parquet"
+    extension = ".parquet"
+    dependencias = ("pyarrow", "fastparquet")
+
+    def leer(self, tabla: str) -> pd.DataFrame:
+        return self._convertir_fechas(pd.read_parquet(self._archivo(tabla)))
+
+
+class FuenteSQLite(FuenteDatos):
+    """Base SQLite exportada por el ERP, una tabla por tabla lógica"""
+
+    tipo = "sqlite"
+
+    def leer(self, tabla: str) -> pd.DataFrame:
+        if not os.path.exists(self.ruta):
+            raise FileNotFoundError(f"El archivo '{self.ruta}' no se encontró.")
+        nombre = self.nombre(tabla)
+        with sqlite3.connect(self.ruta) as conexion:
+            existe = conexion.execute(
+                "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (nombre,)
+            ).fetchone()
+            if not existe:
+                raise ValueError(f"No existe la tabla '{nombre}' en {self.ruta}")
+            df = pd.read_sql_query(f'SELECT * FROM "{nombre}"', conexion)
+        return self._convertir_fechas(df)
+
+
+FUENTES = {fuente.tipo: fuente for fuente in (FuenteExcel, FuenteCSV, FuenteParquet, FuenteSQLite)}
+
+
+def crear_fuente(config: Dict[str, Any], archivo_excel: str) -> FuenteDatos:
+    """Fuente configurada en `fuente_datos`; sin esa clave, el libro de Excel"""
+    opciones = config.get('fuente_datos') or {}
+    tipo = opciones.get('tipo', FuenteExcel.tipo)
+    if tipo not in FUENTES:
+        raise ValueError(f"Tipo de fuente de datos desconocido: '{tipo}' (opciones: {', '.join(FUENTES)})")
+    clase = FUENTES[tipo]
+    if clase.dependencias and not any(importlib.util.find_spec(modulo) for modulo in clase.dependencias):
+        raise ImportError(f"La fuente de datos '{tipo}' requiere {' o '.join(clase.dependencias)}: "
+                          f"pip install {clase.dependencias[0]}")
+    ruta = opciones.get('ruta') or archivo_excel
+    return clase(ruta, opciones.get('tablas'))
@@ -1,22 +1,63 @@
-from Reporte_Proveedor import ReporteProveedor
-import json
+import argparse
 
+import perfilado
+import registro_eventos
+from Reporte_Proveedor import ConfiguracionReporte, ReporteProveedor, GestorDatos
+from configuracion import cargar_config, ruta_excel
+from fuentes_datos import crear_fuente
 
-# Cargar configuración
-with open("config.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
 
-if __name__ == '__main__':
-    
-    
-    base_dir = config['base_dir']
-    # Ruta de tu archivo Excel
-    ruta_archivo_excel = base_dir + config['ruta_file']
-    
-    ReporteProveedor.generar_reportes(
-        archivo_excel=ruta_archivo_excel,
-        nit_empresa=config['nit_empresa'], 
+def crear_gestor_datos(config):
+    """
+    Gestor de datos según la configuración: `fuente_datos` elige de dónde se leen
+    las tablas (Excel, CSV, Parquet o SQLite; ver fuentes_datos) y con
+    `lectura_streaming` la hoja de liquidación se lee por bloques de
+    `tamano_bloque_lectura` filas y se vuelca a disco.
+    """
+    return GestorDatos(
+        ruta_excel(config),
+        streaming=config.get('lectura_streaming', False),
+        tamano_bloque=config.get('tamano_bloque_lectura'),
+        fuente=crear_fuente(config, ruta_excel(config))
+    )
+
+
+def generar(config, gestor_datos=None, conservar_pdf=False, agrupar_impresion=None, optimizar_tamano=None):
+    """
+    Genera los reportes PDF usando la configuración dada y retorna los registros generados.
+    `agrupar_impresion` (o la clave del mismo nombre en la configuración) junta los
+    proveedores sin teléfono ni correo en un solo PDF para imprimir; `optimizar_tamano`
+    (o `optimizar_tamano_pdf`) genera PDFs más livianos para WhatsApp y correo.
+    """
+    if agrupar_impresion is None:
+        agrupar_impresion = config.get('agrupar_impresion', False)
+    if optimizar_tamano is None:
+        optimizar_tamano = config.get('optimizar_tamano_pdf', False)
+    if gestor_datos is None:
+        with perfilado.etapa('cargar_datos'), registro_eventos.medir('cargar_datos'):
+            gestor_datos = crear_gestor_datos(config)
+            gestor_datos.cargar_datos()
+    return ReporteProveedor.generar_reportes(
+        archivo_excel=ruta_excel(config),
+        nit_empresa=config['nit_empresa'],
         nombre_empresa=config['nombre_empresa'],
         direccion_empresa=config['direccion_empresa'],
-        subtitle = config['nombre_documento']
-    )
\ No newline at end of file
+        subtitle = config['nombre_documento'],
+        gestor_datos=gestor_datos,
+        conservar_pdf=conservar_pdf,
+        agrupar_impresion=agrupar_impresion,
+        optimizar_tamano=optimizar_tamano
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Genera los reportes PDF")
+    perfilado.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    # Cargar configuración
+    config = cargar_config()
+    with registro_eventos.corrida(config, ConfiguracionReporte.DIRECTORIO_SALIDA), \
+            perfilado.corrida(args.profile, ConfiguracionReporte.DIRECTORIO_SALIDA, args.profile_cada):
+        with perfilado.etapa('generar'):
+            generar(config)
@@ -0,0 +1,137 @@
+"""
+Lectura por Bloques de la Hoja de Liquidación
+=============================================
+
+Con libros acumulados del año, cargar 'BD LIQUIDACION' completa como
+DataFrame ocupa mucha memoria y retrasa el primer PDF. Este lector recorre la
+hoja con openpyxl en modo `read_only` (`iter_rows`), en bloques de filas, y
+vuelca cada bloque a una base SQLite temporal indexada por cédula. Después
+entrega un proveedor a la vez, con todas sus filas en el orden original, en el
+mismo orden que `groupby('CEDULA')`. La memoria queda acotada por un bloque y
+un proveedor, sin importar el tamaño del libro.
+"""
+
+import itertools
+import math
+import os
+import pickle
+import sqlite3
+import tempfile
+from typing import Any, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+
+def _convertir_celda(valor: Any) -> Any:
+    """Mismo tratamiento que `pd.read_excel`: enteros exactos como int y vacíos como NaN"""
+    if valor is None:
+        return math.nan
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def _nombres_columnas(encabezado: Tuple[Any, ...]) -> List[str]:
+    """Encabezados como los deja `pd.read_excel` (repetidos con sufijo .1, .2...) y sin espacios"""
+    nombres = []
+    vistos = {}
+    for i, valor in enumerate(encabezado):
+        nombre = f"Unnamed: {i}" if valor is None else str(valor)
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f"{nombre}.{vistos[nombre]}"
+        else:
+            vistos[nombre] = 0
+        nombres.append(nombre.strip())
+    return nombres
+
+
+class LectorLiquidacion:
+    """Vuelca la hoja de liquidación a disco por bloques y la entrega agrupada por cédula"""
+
+    TAMANO_BLOQUE_DEFECTO = 5000
+
+    def __init__(self, archivo_excel: str, hoja: str = 'BD LIQUIDACION', columna_clave: str = 'CEDULA',
+                 clave_vacia: Any = '000000', tamano_bloque: Optional[int] = None):
+        self.archivo_excel = archivo_excel
+        self.hoja = hoja
+        self.columna_clave = columna_clave
+        self.clave_vacia = clave_vacia
+        self.tamano_bloque = tamano_bloque or self.TAMANO_BLOQUE_DEFECTO
+        self.columnas: List[str] = []
+        self.total_filas = 0
+        self.total_proveedores = 0
+        self._archivo_spill: Optional[str] = None
+        self._conexion: Optional[sqlite3.Connection] = None
+
+    def cargar(self):
+        """Recorre la hoja una vez, bloque por bloque, y la deja en la base temporal"""
+        self.cerrar()
+        descriptor, self._archivo_spill = tempfile.mkstemp(prefix="liquidacion_", suffix=".db")
+        os.close(descriptor)
+        self._conexion = sqlite3.connect(self._archivo_spill)
+        self._conexion.execute("PRAGMA journal_mode=OFF")
+        self._conexion.execute("PRAGMA synchronous=OFF")
+        # Sin tipo en 'cedula': SQLite conserva int o texto y ordena como groupby con claves numéricas
+        self._conexion.execute("CREATE TABLE filas (cedula, orden INTEGER NOT NULL, fila BLOB NOT NULL)")
+
+        libro = load_workbook(self.archivo_excel, read_only=True, data_only=True)
+        try:
+            if self.hoja not in libro.sheetnames:
+                raise ValueError(f"Worksheet named '{self.hoja}' not found")
+            filas = libro[self.hoja].iter_rows(values_only=True)
+            encabezado = next(filas, None)
+            if encabezado is None:
+                return
+            self.columnas = _nombres_columnas(encabezado)
+            indice_clave = self.columnas.index(self.columna_clave)
+            self.total_filas = 0
+
+            while True:
+                bloque = []
+                for fila in itertools.islice(filas, self.tamano_bloque):
+                    if all(valor is None for valor in fila):
+                        continue
+                    fila = tuple(_convertir_celda(valor) for valor in fila)
+                    clave = fila[indice_clave] if indice_clave < len(fila) else math.nan
+                    if isinstance(clave, float) and math.isnan(clave):
+                        clave = self.clave_vacia
+                    bloque.append((clave, self.total_filas + len(bloque), pickle.dumps(fila)))
+                if not bloque:
+                    break
+                with self._conexion:
+                    self._conexion.executemany("INSERT INTO filas VALUES (?, ?, ?)", bloque)
+                self.total_filas += len(bloque)
+        finally:
+            libro.close()
+
+        self._conexion.execute("CREATE INDEX idx_filas_cedula ON filas (cedula, orden)")
+        self.total_proveedores = self._conexion.execute("SELECT COUNT(DISTINCT cedula) FROM filas").fetchone()[0]
+        print(f"📚 '{self.hoja}' leída por bloques de {self.tamano_bloque}: "
+              f"{self.total_filas} filas, {self.total_proveedores} proveedores")
+
+    def _dataframe(self, filas: List[tuple]) -> pd.DataFrame:
+        ancho = len(self.columnas)
+        filas = [fila[:ancho] + (math.nan,) * (ancho - len(fila)) for fila in filas]
+        return pd.DataFrame.from_records(filas, columns=self.columnas)
+
+    def grupos(self) -> Iterator[Tuple[Any, pd.DataFrame]]:
+        """(cédula, filas del proveedor) ordenados por cédula, uno a la vez"""
+        if self._conexion is None:
+            return
+        cursor = self._conexion.execute("SELECT cedula, fila FROM filas ORDER BY cedula, orden")
+        for cedula, registros in itertools.groupby(cursor, key=lambda registro: registro[0]):
+            yield cedula, self._dataframe([pickle.loads(fila) for _, fila in registros])
+
+    def cerrar(self):
+        """Cierra y borra la base temporal"""
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+        if self._archivo_spill and os.path.exists(self._archivo_spill):
+            os.remove(self._archivo_spill)
+        self._archivo_spill = None
+
+    def __del__(self):
+        self.cerrar()
@@ -0,0 +1,234 @@
+"""
+Punto de entrada unificado
+==========================
+
+Agrupa en un solo comando las etapas que antes eran scripts separados:
+
+    python main.py generate        # genera los PDFs
+    python main.py send-email      # envía los PDFs por correo
+    python main.py send-whatsapp   # envía los PDFs por WhatsApp
+    python main.py verify-phones   # verifica en WhatsApp los números (con caché)
+    python main.py plan            # calcula el plan de envío por WhatsApp y su ETA
+    python main.py all             # todo el flujo en un solo proceso
+
+Con `all` el libro de Excel se lee una sola vez y los registros de los PDFs
+generados (incluido su contenido en memoria) pasan directamente a las etapas
+de envío, sin volver a listar ni leer las carpetas de salida.
+"""
+
+import argparse
+import os
+from typing import Any, Dict, List, Optional
+
+import perfilado
+import registro_eventos
+from clasificacion_fallos import CLASES, validar_clases
+from configuracion import cargar_config, directorio_email
+from Reporte_Proveedor import ConfiguracionReporte, GestorDatos
+
+
+class ContextoPipeline:
+    """Estado compartido entre etapas dentro de un mismo proceso"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self._gestor_datos: Optional[GestorDatos] = None
+        self.reportes: Optional[List[Dict[str, Any]]] = None
+        self.contactos_whatsapp: Optional[List[Dict[str, str]]] = None
+
+    @property
+    def gestor_datos(self) -> GestorDatos:
+        """Carga el libro de Excel la primera vez que alguna etapa lo necesita"""
+        if self._gestor_datos is None:
+            from generate_report_pro import crear_gestor_datos
+            with perfilado.etapa('cargar_datos'), registro_eventos.medir('cargar_datos'):
+                self._gestor_datos = crear_gestor_datos(self.config)
+                self._gestor_datos.cargar_datos()
+        return self._gestor_datos
+
+
+def etapa_generar(ctx: ContextoPipeline, conservar_pdf: bool = False, agrupar_impresion: Optional[bool] = None,
+                  optimizar_tamano: Optional[bool] = None):
+    """Genera los PDFs y guarda los registros en el contexto"""
+    from generate_report_pro import generar
+    gestor_datos = ctx.gestor_datos
+    with perfilado.etapa('generar'):
+        ctx.reportes = generar(ctx.config, gestor_datos=gestor_datos, conservar_pdf=conservar_pdf,
+                               agrupar_impresion=agrupar_impresion, optimizar_tamano=optimizar_tamano)
+
+
+def etapa_preparar_contactos(ctx: ContextoPipeline):
+    """Arma la lista de contactos de WhatsApp y el Excel de verificación"""
+    from enviar_factura_whatsApp import procesar_contactos
+    with perfilado.etapa('preparar_contactos'):
+        ctx.contactos_whatsapp = procesar_contactos(ctx.config, ctx.reportes)
+
+
+def etapa_verificar_telefonos(ctx: ContextoPipeline, forzar: bool = False, sin_navegador: bool = False):
+    """
+    Verifica en WhatsApp Web los números que no tengan un resultado vigente en
+    caché y vuelve a escribir el Excel de verificación con los resultados.
+    """
+    from enviar_factura_whatsApp import verificar_whatsapp
+    etapa_preparar_contactos(ctx)
+    if sin_navegador:
+        return
+    with perfilado.etapa('verificar_telefonos'):
+        verificar_whatsapp(ctx.config, ctx.contactos_whatsapp, forzar=forzar)
+    etapa_preparar_contactos(ctx)
+
+
+def etapa_enviar_email(ctx: ContextoPipeline, reintentar_fallidos: bool = False,
+                       clases: Optional[List[str]] = None):
+    """
+    Envía por correo los PDFs del canal email. Con `reintentar_fallidos` solo
+    reenvía los fallos de la bitácora (de las `clases` dadas o las reintentables).
+    """
+    from EmailGenerator import recolectar_archivos_email, enviar_correos, reintentar_correos
+    if ctx.reportes is not None:
+        directorio = ConfiguracionReporte.DIRECTORIO_SALIDA_EMAIL
+    else:
+        directorio = directorio_email(ctx.config)
+    if reintentar_fallidos:
+        with perfilado.etapa('enviar_correos'):
+            reintentar_correos(ctx.config, os.path.join(directorio, "enviados"), clases)
+        return
+    with perfilado.etapa('recolectar_archivos'):
+        email_archivos = recolectar_archivos_email(directorio, ctx.reportes)
+    with perfilado.etapa('enviar_correos'):
+        enviar_correos(ctx.config, email_archivos, os.path.join(directorio, "enviados"))
+
+
+def etapa_planificar(ctx: ContextoPipeline, nuevo: bool = False):
+    """Calcula (o retoma) el plan de envío por WhatsApp y muestra su ETA"""
+    from enviar_factura_whatsApp import planificar_whatsapp
+    etapa_preparar_contactos(ctx)
+    with perfilado.etapa('planificar'):
+        planificar_whatsapp(ctx.config, ctx.contactos_whatsapp, nuevo=nuevo)
+
+
+def etapa_enviar_whatsapp(ctx: ContextoPipeline, multilinea: bool = False, usar_plan: bool = False,
+                          reanudar: bool = False, panel: bool = False, reintentar_fallidos: bool = False,
+                          clases: Optional[List[str]] = None):
+    """
+    Envía por WhatsApp los PDFs del canal tel, con una sola sesión o
+    repartiendo entre las líneas de `lineas_whatsapp` si `multilinea`.
+    Con `usar_plan` cada sesión sigue su plan de envío persistido; con
+    `reanudar` se continúa desde la bitácora del envío anterior y con
+    `reintentar_fallidos` se reenvían solo sus fallos (de las `clases` dadas o
+    las reintentables). Con `panel` el progreso se dibuja en la terminal.
+    """
+    from enviar_factura_whatsApp import enviar_whatsapp, reanudar_whatsapp, reintentar_whatsapp
+    if reintentar_fallidos:
+        with perfilado.etapa('enviar_whatsapp'):
+            reintentar_whatsapp(ctx.config, clases, panel=panel)
+        return
+    if reanudar:
+        with perfilado.etapa('enviar_whatsapp'):
+            reanudar_whatsapp(ctx.config, usar_plan=usar_plan, panel=panel)
+        return
+    if ctx.contactos_whatsapp is None:
+        etapa_preparar_contactos(ctx)
+    enviados_dir = None
+    if ctx.reportes is not None:
+        enviados_dir = os.path.join(ConfiguracionReporte.DIRECTORIO_SALIDA_TEL, "enviados")
+    with perfilado.etapa('enviar_whatsapp'):
+        if multilinea:
+            from orquestador_whatsapp import enviar_multilinea
+            enviar_multilinea(ctx.config, ctx.contactos_whatsapp, enviados_dir=enviados_dir, usar_plan=usar_plan)
+        else:
+            enviar_whatsapp(ctx.config, ctx.contactos_whatsapp, enviados_dir=enviados_dir, usar_plan=usar_plan,
+                            panel=panel)
+
+
+def etapa_todo(ctx: ContextoPipeline, multilinea: bool = False, usar_plan: bool = False, panel: bool = False,
+               agrupar_impresion: Optional[bool] = None, optimizar_tamano: Optional[bool] = None):
+    """Ejecuta el flujo completo reutilizando datos y PDFs en memoria"""
+    etapa_generar(ctx, conservar_pdf=True, agrupar_impresion=agrupar_impresion, optimizar_tamano=optimizar_tamano)
+    etapa_preparar_contactos(ctx)
+    etapa_enviar_email(ctx)
+    etapa_enviar_whatsapp(ctx, multilinea, usar_plan, panel=panel)
+
+
+ETAPAS = {
+    'generate': lambda ctx, args: etapa_generar(ctx, agrupar_impresion=args.impresion_agrupada or None,
+                                                optimizar_tamano=args.optimizar_tamano or None),
+    'send-email': lambda ctx, args: etapa_enviar_email(ctx, args.reintentar_fallidos, args.clases),
+    'send-whatsapp': lambda ctx, args: etapa_enviar_whatsapp(ctx, args.multilinea, args.plan, args.reanudar,
+                                                               args.panel, args.reintentar_fallidos, args.clases),
+    'verify-phones': lambda ctx, args: etapa_verificar_telefonos(ctx, args.forzar, args.sin_navegador),
+    'plan': lambda ctx, args: etapa_planificar(ctx, args.nuevo),
+    'all': lambda ctx, args: etapa_todo(ctx, args.multilinea, args.plan, args.panel,
+                                        agrupar_impresion=args.impresion_agrupada or None,
+                                        optimizar_tamano=args.optimizar_tamano or None),
+}
+
+
+def agregar_opciones_generacion(parser: argparse.ArgumentParser):
+    """Opciones de generación de PDFs, compartidas por `generate` y `all`"""
+    parser.add_argument('--impresion-agrupada', action='store_true',
+                        help="Junta los proveedores sin teléfono ni correo en un solo PDF para imprimir")
+    parser.add_argument('--optimizar-tamano', action='store_true',
+                        help="PDFs más livianos: logo reducido y recomprimido")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Lee la hoja de liquidación por bloques (libros muy grandes, memoria acotada)")
+
+
+def construir_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generación y envío de reportes de facturación")
+    parser.add_argument('--config', default=None, help="Ruta de config.json (por defecto la del proyecto)")
+    perfilado.agregar_argumentos(parser)
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    agregar_opciones_generacion(subparsers.add_parser('generate', help="Genera los reportes PDF"))
+    correo = subparsers.add_parser('send-email', help="Envía los PDFs por correo")
+    whatsapp = subparsers.add_parser('send-whatsapp', help="Envía los PDFs por WhatsApp")
+    whatsapp.add_argument('--multilinea', action='store_true',
+                          help="Reparte los contactos entre las líneas de 'lineas_whatsapp' (headless, en paralelo)")
+    whatsapp.add_argument('--plan', action='store_true',
+                          help="Sigue (o retoma) el plan de envío, esperando cada turno en vez de detenerse")
+    whatsapp.add_argument('--reanudar', action='store_true',
+                          help="Continúa desde la bitácora del último envío (una sola línea), sin listar carpetas")
+    for subparser in (correo, whatsapp):
+        subparser.add_argument('--reintentar-fallidos', action='store_true',
+                               help="Reenvía en un lote solo los fallos reintentables de la bitácora, por prioridad")
+        subparser.add_argument('--clases', nargs='+', default=None, metavar='CLASE',
+                               help="Con --reintentar-fallidos, reenvía estas clases de fallo "
+                                    f"({', '.join(CLASES)})")
+    whatsapp.add_argument('--panel', action='store_true',
+                          help="Muestra en la terminal el progreso, las cuotas y la ETA (con --multilinea, solo status_<línea>.json)")
+    verificar = subparsers.add_parser('verify-phones', help="Verifica en WhatsApp los números y arma el Excel de verificación")
+    verificar.add_argument('--forzar', action='store_true', help="Ignora los resultados vigentes en caché")
+    verificar.add_argument('--sin-navegador', action='store_true', help="Solo arma el Excel con lo que ya hay en caché")
+    planificar = subparsers.add_parser('plan', help="Calcula el plan de envío por WhatsApp y su ETA")
+    planificar.add_argument('--nuevo', action='store_true', help="Descarta el plan guardado y lo calcula de cero")
+    todo = subparsers.add_parser('all', help="Ejecuta todo el flujo en un solo proceso")
+    todo.add_argument('--multilinea', action='store_true', help="Envía por WhatsApp con todas las líneas configuradas")
+    todo.add_argument('--plan', action='store_true', help="Envía por WhatsApp siguiendo el plan de envío")
+    todo.add_argument('--panel', action='store_true', help="Muestra en la terminal el progreso del envío por WhatsApp")
+    agregar_opciones_generacion(todo)
+    return parser
+
+
+def main(argv=None):
+    parser = construir_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'reanudar', False) and args.multilinea:
+        parser.error("--reanudar retoma una sola línea; no se puede combinar con --multilinea")
+    if getattr(args, 'reintentar_fallidos', False) and getattr(args, 'multilinea', False):
+        parser.error("--reintentar-fallidos usa la bitácora de una sola línea; no se puede combinar con --multilinea")
+    if getattr(args, 'clases', None):
+        try:
+            validar_clases(args.clases)
+        except ValueError as e:
+            parser.error(str(e))
+    config = cargar_config(args.config)
+    if getattr(args, 'streaming', False):
+        config['lectura_streaming'] = True
+    ctx = ContextoPipeline(config)
+    with registro_eventos.corrida(config, ConfiguracionReporte.DIRECTORIO_SALIDA), \
+            perfilado.corrida(args.profile, ConfiguracionReporte.DIRECTORIO_SALIDA, args.profile_cada):
+        ETAPAS[args.comando](ctx, args)
+
+
+if __name__ == '__main__':
+    main()
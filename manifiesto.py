@@ -0,0 +1,172 @@
+"""
+Manifiesto de PDFs Generados
+============================
+
+El generador deja en cada carpeta de salida un `manifiesto.jsonl` con una
+línea por PDF: archivo, cédula, nombre, canal, destino (celular E.164 o
+correo), tamaño y hash SHA-256. Los envíos leen el manifiesto en lugar de
+listar la carpeta y partir cada nombre de archivo, lo que en una carpeta
+sincronizada con OneDrive es lento. Si el manifiesto no existe se recurre a
+una sola pasada con `os.scandir`, interpretando los nombres como antes.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+ARCHIVO_MANIFIESTO = "manifiesto.jsonl"
+
+
+def registro_manifiesto(reporte: Dict[str, Any], contenido: bytes) -> Dict[str, Any]:
+    """Entrada del manifiesto para un registro del generador y el contenido de su PDF"""
+    return {
+        "ruta": reporte["ruta"],
+        "archivo": os.path.basename(reporte["ruta"]),
+        "cedula": reporte["cedula"],
+        "nombre": reporte["nombre"],
+        "canal": reporte["canal"],
+        "destino": reporte.get("telefono") or reporte.get("email") or "",
+        "tamano": len(contenido),
+        "sha256": hashlib.sha256(contenido).hexdigest(),
+        "generado": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def escribir_manifiestos(registros: Iterable[Dict[str, Any]], directorios: Iterable[str]) -> Dict[str, int]:
+    """
+    Reescribe el manifiesto de cada carpeta con los PDFs de esta generación
+    (un manifiesto vacío si la carpeta no recibió ninguno).
+
+    Args:
+        registros: Entradas armadas con `registro_manifiesto`
+        directorios: Carpetas de salida del generador
+
+    Returns:
+        Cantidad de entradas escritas por carpeta
+    """
+    por_directorio: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for directorio in directorios:
+        por_directorio.setdefault(os.path.abspath(directorio), [])
+    for registro in registros:
+        entrada = {clave: valor for clave, valor in registro.items() if clave != "ruta"}
+        por_directorio[os.path.dirname(os.path.abspath(registro["ruta"]))].append(entrada)
+
+    for directorio, entradas in por_directorio.items():
+        ruta = os.path.join(directorio, ARCHIVO_MANIFIESTO)
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            for entrada in entradas:
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        os.replace(temporal, ruta)
+    return {directorio: len(entradas) for directorio, entradas in por_directorio.items()}
+
+
+def leer_manifiesto(directorio: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Entradas del manifiesto de la carpeta con su ruta completa. None si no hay
+    manifiesto. No se comprueba que cada PDF siga ahí (sería un acceso al disco
+    por archivo, lo que el manifiesto evita): los ya movidos a enviados los
+    descarta la bitácora y un archivo faltante lo detecta `verificar_pdf` o el
+    envío al abrirlo.
+    """
+    ruta = os.path.join(directorio, ARCHIVO_MANIFIESTO)
+    if not os.path.exists(ruta):
+        return None
+    entradas = []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            if not linea.strip():
+                continue
+            entrada = json.loads(linea)
+            entrada["ruta"] = os.path.join(directorio, entrada["archivo"])
+            entradas.append(entrada)
+    return entradas
+
+
+def huella_generacion(entradas: Iterable[Dict[str, Any]]) -> str:
+    """
+    Identificador de una generación de PDFs: hash del nombre y el SHA-256 de
+    cada entrada (sin manifiesto, del tamaño y la fecha del archivo). Los
+    nombres se repiten cada quincena; el contenido, no. El plan y la bitácora
+    de envíos se atan a este valor para no confundir una quincena con otra.
+    """
+    claves = sorted(
+        (os.path.basename(e["archivo"]), e["sha256"]) if e.get("sha256")
+        else (os.path.basename(e["archivo"]), f"{e.get('tamano')}@{e.get('generado')}")
+        for e in entradas
+    )
+    resumen = hashlib.sha256()
+    for archivo, contenido in claves:
+        resumen.update(f"{archivo}\x1f{contenido}\x1e".encode("utf-8"))
+    return resumen.hexdigest()[:16]
+
+
+def cedula_de_archivo(ruta: str) -> Optional[str]:
+    """Cédula de un PDF con nombre `nombre!cedula[!destino].pdf`, o None si no sigue ese formato"""
+    partes = os.path.basename(ruta).rsplit(".", 1)[0].split("!")
+    return partes[1] if len(partes) >= 2 else None
+
+
+def escanear_directorio(directorio: str, canal: str) -> List[Dict[str, Any]]:
+    """
+    Respaldo sin manifiesto: una pasada de `os.scandir` sobre los PDFs con
+    nombre `nombre!cedula!destino.pdf`. No hay hash; los celulares se pasan a
+    E.164 y la fecha de modificación hace de fecha de generación.
+    """
+    # Importación diferida: contactos arrastra pandas, que el resto del módulo no necesita
+    from contactos import ConfiguracionContactos, a_e164
+
+    entradas = []
+    with os.scandir(directorio) as iterador:
+        for item in iterador:
+            if not (item.is_file() and item.name.lower().endswith(".pdf") and "!" in item.name):
+                continue
+            partes = item.name[:-len(".pdf")].split("!")
+            if len(partes) != 3:
+                continue
+            nombre, cedula, destino = partes
+            if canal == ConfiguracionContactos.CANAL_TEL:
+                destino = a_e164(destino)
+            estado = item.stat()
+            entradas.append({
+                "archivo": item.name,
+                "ruta": item.path,
+                "cedula": cedula,
+                "nombre": nombre,
+                "canal": canal,
+                "destino": destino,
+                "tamano": estado.st_size,
+                "sha256": None,
+                "generado": datetime.datetime.fromtimestamp(estado.st_mtime).isoformat(timespec="seconds"),
+            })
+    return entradas
+
+
+def verificar_pdf(ruta: str, sha256: Optional[str], tamano: Optional[int] = None) -> Optional[str]:
+    """
+    Comprueba el PDF contra el tamaño y el hash registrados al generarlo.
+    Retorna el motivo del problema, o None si el archivo está íntegro (o no hay hash).
+    """
+    if not sha256:
+        return None
+    try:
+        if tamano is not None and os.path.getsize(ruta) != tamano:
+            return "el PDF no tiene el tamaño registrado (posible archivo truncado)"
+        with open(ruta, "rb") as f:
+            if hashlib.sha256(f.read()).hexdigest() != sha256:
+                return "el PDF no coincide con su checksum"
+    except OSError:
+        return "archivo no encontrado"
+    return None
+
+
+def pdfs_por_enviar(directorio: str, canal: str) -> List[Dict[str, Any]]:
+    """PDFs del canal en la carpeta: desde el manifiesto, o escaneando si no existe"""
+    entradas = leer_manifiesto(directorio)
+    if entradas is None:
+        print(f"⚠️ Sin {ARCHIVO_MANIFIESTO} en {directorio}; se escanea la carpeta.")
+        return escanear_directorio(directorio, canal)
+    return [e for e in entradas if e["canal"] == canal]
@@ -0,0 +1,141 @@
+"""
+Orquestador de Envíos por Varias Líneas de WhatsApp
+===================================================
+
+Reparte la lista de contactos entre las líneas configuradas en
+`config.json` (`lineas_whatsapp`) y ejecuta cada una en su propio proceso,
+con su propio perfil de Chrome en modo headless y su propio archivo de
+cuotas. Cada línea conserva sus límites y pausas; el rendimiento total
+crece con el número de líneas. Los PDFs enviados por cada línea se mueven a
+su propia subcarpeta (`enviados/<línea>`), con la numeración de su bitácora.
+
+Ejemplo de configuración:
+
+    "lineas_whatsapp": [
+        {"nombre": "ventas", "profile_path": "C:/.../WhatsAppVentas",
+         "limite_diario": 100, "limite_horario": 50, "archivo_cuota": "quota_ventas.db"},
+        {"nombre": "compras", "profile_path": "C:/.../WhatsAppCompras"}
+    ]
+"""
+
+import multiprocessing
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+import registro_eventos
+from configuracion import DIRECTORIO_PROYECTO, directorio_whatsapp
+from enviar_factura_whatsApp import crear_bitacora, crear_monitor, crear_sender
+from manifiesto import huella_generacion
+
+
+def repartir_contactos(contactos: List[Dict[str, str]], num_lineas: int) -> List[List[Dict[str, str]]]:
+    """
+    Reparte los contactos por hash del número: un mismo proveedor cae siempre
+    en la misma línea entre corridas, y el reparto queda aproximadamente parejo.
+    """
+    grupos: List[List[Dict[str, str]]] = [[] for _ in range(num_lineas)]
+    for contacto in contactos:
+        indice = zlib.crc32(contacto["numero"].encode("utf-8")) % num_lineas
+        grupos[indice].append(contacto)
+    return grupos
+
+
+def ejecutar_linea(config: Dict[str, Any], linea: Dict[str, Any], contactos: List[Dict[str, str]],
+                   enviados_dir: str, usar_plan: bool = False, generacion: Optional[str] = None):
+    """Proceso de una línea: su propio navegador, perfil, cuotas, carpeta de enviados y (opcionalmente) plan"""
+    from WhatsAppSender import QuotaManager
+
+    nombre = linea["nombre"]
+    generacion = generacion or huella_generacion(contactos)
+    # Cada línea numera sus enviados por su cuenta: en una carpeta compartida los prefijos NNN_ se repetirían
+    enviados_dir = os.path.join(enviados_dir, nombre)
+    quota_manager = QuotaManager(
+        limite_diario=linea.get("limite_diario", 100),
+        limite_horario=linea.get("limite_horario", 50),
+        archivo_datos=linea.get("archivo_cuota", f"quota_data_{nombre}.db")
+    )
+    sender = crear_sender(
+        config, contactos, enviados_dir,
+        profile_path=linea["profile_path"],
+        headless=linea.get("headless", True),
+        modo_adjunto=linea.get("modo_adjunto", "input"),
+        quota_manager=quota_manager,
+        bitacora=crear_bitacora(config, linea.get("archivo_bitacora",
+                                                      os.path.join(DIRECTORIO_PROYECTO, f"bitacora_envios_{nombre}.db")))
+    )
+    sender.bitacora.iniciar_corrida(generacion)
+    plan = None
+    if usar_plan:
+        from planificador_envios import obtener_plan
+        plan = obtener_plan(config, contactos, quota_manager,
+                            archivo=linea.get("archivo_plan", f"plan_envio_{nombre}.json"), generacion=generacion)
+    print(f"🚀 Línea {nombre}: {len(contactos)} contactos")
+    # Las líneas comparten la terminal: cada una publica su progreso y sus eventos en sus propios archivos
+    archivo_eventos = linea.get("archivo_eventos",
+                                os.path.join(directorio_whatsapp(config), f"eventos_{nombre}.jsonl"))
+    archivo_estado = linea.get("archivo_estado", os.path.join(directorio_whatsapp(config), f"status_{nombre}.json"))
+    with registro_eventos.corrida(config, directorio_whatsapp(config), archivo=archivo_eventos), \
+            crear_monitor(config, sender, plan, archivo=archivo_estado,
+                          nombre=nombre):
+        sender.main(plan=plan)
+
+
+class OrquestadorWhatsApp:
+    """Lanza un proceso por línea configurada y espera a que terminen"""
+
+    def __init__(self, config: Dict[str, Any], contactos: List[Dict[str, str]], enviados_dir: str,
+                 usar_plan: bool = False):
+        self.config = config
+        self.usar_plan = usar_plan
+        self.lineas = config.get("lineas_whatsapp", [])
+        self.contactos = contactos
+        self.enviados_dir = enviados_dir
+        if not self.lineas:
+            raise ValueError("No hay 'lineas_whatsapp' en la configuración")
+
+    def ejecutar(self) -> Dict[str, int]:
+        """Ejecuta todas las líneas en paralelo; retorna el código de salida de cada una"""
+        grupos = repartir_contactos(self.contactos, len(self.lineas))
+        # Todas las líneas atan su bitácora y su plan a la misma generación de PDFs
+        generacion = huella_generacion(self.contactos)
+        procesos = []
+        for linea, contactos in zip(self.lineas, grupos):
+            if not contactos:
+                print(f"⏭️ Línea {linea['nombre']}: sin contactos asignados")
+                continue
+            proceso = multiprocessing.Process(
+                target=ejecutar_linea,
+                args=(self.config, linea, contactos, self.enviados_dir, self.usar_plan, generacion),
+                name=f"whatsapp-{linea['nombre']}"
+            )
+            proceso.start()
+            procesos.append((linea["nombre"], proceso))
+
+        resultados = {}
+        try:
+            for nombre, proceso in procesos:
+                proceso.join()
+                resultados[nombre] = proceso.exitcode
+        except KeyboardInterrupt:
+            print("\n⏹️ Interrumpido: deteniendo todas las líneas...")
+            for _, proceso in procesos:
+                proceso.terminate()
+            for nombre, proceso in procesos:
+                proceso.join()
+                resultados[nombre] = proceso.exitcode
+
+        print(f"\n📊 === RESUMEN POR LÍNEA ===")
+        for nombre, codigo in resultados.items():
+            print(f"{'✅' if codigo == 0 else '❌'} {nombre}: código de salida {codigo}")
+        return resultados
+
+
+def enviar_multilinea(config: Dict[str, Any], contactos: List[Dict[str, str]], enviados_dir: str = None,
+                      usar_plan: bool = False):
+    """Punto de entrada para enviar repartiendo entre todas las líneas configuradas"""
+    if not contactos:
+        print("⚠️ No se encontraron archivos PDF válidos para enviar.")
+        return {}
+    enviados_dir = enviados_dir or os.path.join(directorio_whatsapp(config), "enviados")
+    return OrquestadorWhatsApp(config, contactos, enviados_dir, usar_plan).ejecutar()
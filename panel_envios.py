@@ -0,0 +1,265 @@
+"""
+Panel de Progreso del Envío por WhatsApp
+========================================
+
+Un envío por WhatsApp dura horas. `MonitorEnvios` escucha los eventos del
+emisor (`WhatsAppSafeSender.agregar_oyente`) y mantiene el estado de la
+corrida:
+
+- enviados, fallidos, omitidos y pendientes;
+- uso de las cuotas frente a los límites de `QuotaManager`;
+- latencia reciente por etapa (buscar, adjuntar, enviar);
+- ETA.
+
+El estado se reescribe cada pocos segundos en `status.json` (en la carpeta
+de envío de WhatsApp) para consultarlo desde otra terminal o un script.
+Escriben el hilo del emisor (en cada contacto) y el del monitor (en cada
+ciclo), así que cada escritura usa su propio temporal y se serializa. Con
+`--panel` se dibuja además en la terminal, con las últimas líneas del
+registro debajo.
+
+Eventos que entiende (diccionarios con `tipo` y `ts`):
+    inicio    total
+    etapa     etapa, segundos
+    contacto  numero, nombre, archivo, resultado, motivo, clase, reintento, segundos
+    espera    segundos, motivo
+    fin       exitosos, fallidos, detenido
+"""
+
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+ETAPAS = ("buscar", "adjuntar", "enviar")
+
+
+class _SalidaPanel:
+    """Reemplazo de stdout mientras se dibuja el panel: guarda las últimas líneas"""
+
+    def __init__(self, original, lineas: int):
+        self.original = original
+        self.lineas: Deque[str] = deque(maxlen=lineas)
+        self._pendiente = ""
+
+    def write(self, texto: str) -> int:
+        self._pendiente += texto
+        *completas, self._pendiente = self._pendiente.split("\n")
+        self.lineas.extend(completas)
+        return len(texto)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+class MonitorEnvios:
+    """Oyente de eventos del emisor que publica el progreso en status.json y, opcionalmente, en la terminal"""
+
+    ARCHIVO_ESTADO_DEFECTO = "status.json"
+    INTERVALO_DEFECTO = 2.0
+    VENTANA_LATENCIAS = 20
+    LINEAS_REGISTRO = 12
+
+    def __init__(self, quota_manager, archivo_estado: Optional[str] = None, panel: bool = False,
+                 intervalo: Optional[float] = None, plan=None, nombre: str = ""):
+        self.quota_manager = quota_manager
+        self.archivo_estado = archivo_estado or self.ARCHIVO_ESTADO_DEFECTO
+        self.panel = panel
+        self.intervalo = intervalo or self.INTERVALO_DEFECTO
+        self.plan = plan
+        self.nombre = nombre
+        self._bloqueo = threading.Lock()
+        self._bloqueo_escritura = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._salida: Optional[_SalidaPanel] = None
+        self.inicio = time.time()
+        self.total = 0
+        self.enviados = 0
+        self.fallidos = 0
+        self.omitidos = 0
+        self.procesados = 0
+        self.ultimo: Optional[Dict[str, Any]] = None
+        self.espera_hasta: Optional[float] = None
+        self.motivo_espera = ""
+        self.terminado = False
+        self.latencias: Dict[str, Deque[float]] = {etapa: deque(maxlen=self.VENTANA_LATENCIAS) for etapa in ETAPAS}
+        self._intervalos: Deque[float] = deque(maxlen=self.VENTANA_LATENCIAS)
+        self._ultimo_contacto_ts: Optional[float] = None
+
+    def __call__(self, evento: Dict[str, Any]):
+        with self._bloqueo:
+            tipo = evento["tipo"]
+            if tipo == "inicio":
+                self.total = evento["total"]
+                self.inicio = evento["ts"]
+            elif tipo == "etapa":
+                self.latencias.setdefault(evento["etapa"], deque(maxlen=self.VENTANA_LATENCIAS)).append(evento["segundos"])
+            elif tipo == "espera":
+                self.espera_hasta = evento["ts"] + evento["segundos"]
+                self.motivo_espera = evento.get("motivo", "")
+            elif tipo == "contacto":
+                self._registrar_contacto(evento)
+            elif tipo == "fin":
+                self.terminado = True
+        if tipo in ("contacto", "fin"):
+            self.escribir_estado()
+
+    def _registrar_contacto(self, evento: Dict[str, Any]):
+        resultado = evento["resultado"]
+        if resultado == "detener":
+            # El contacto vuelve a pendientes: el envío se detiene por seguridad
+            self.ultimo = {clave: evento.get(clave) for clave in ("numero", "nombre", "resultado", "motivo", "clase")}
+            return
+        if not evento.get("reintento"):
+            self.procesados += 1
+        elif resultado == "enviado":
+            # Un reintento que sale deja de contar como fallido
+            self.fallidos = max(0, self.fallidos - 1)
+        if resultado == "enviado":
+            self.enviados += 1
+        elif resultado == "fallido" and not evento.get("reintento"):
+            self.fallidos += 1
+        elif resultado == "omitido":
+            self.omitidos += 1
+        if self._ultimo_contacto_ts is not None:
+            self._intervalos.append(evento["ts"] - self._ultimo_contacto_ts)
+        self._ultimo_contacto_ts = evento["ts"]
+        self.espera_hasta = None
+        self.ultimo = {clave: evento.get(clave) for clave in ("numero", "nombre", "resultado", "motivo", "clase")}
+
+    def _eta(self, pendientes: int) -> Optional[datetime.datetime]:
+        if self.plan is not None and self.plan.eta is not None:
+            return self.plan.eta
+        if not pendientes:
+            return None
+        if not self._intervalos:
+            return None
+        return datetime.datetime.now() + datetime.timedelta(seconds=statistics.mean(self._intervalos) * pendientes)
+
+    def estado(self) -> Dict[str, Any]:
+        with self._bloqueo:
+            pendientes = max(0, self.total - self.procesados)
+            eta = self._eta(pendientes)
+            ahora = time.time()
+            return {
+                "linea": self.nombre,
+                "actualizado": datetime.datetime.now().isoformat(timespec="seconds"),
+                "inicio": datetime.datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+                "terminado": self.terminado,
+                "total": self.total,
+                "enviados": self.enviados,
+                "fallidos": self.fallidos,
+                "omitidos": self.omitidos,
+                "pendientes": pendientes,
+                "cuota": {
+                    "hoy": self.quota_manager.mensajes_hoy,
+                    "limite_diario": self.quota_manager.limite_diario,
+                    "ultima_hora": len(self.quota_manager.historial_horas),
+                    "limite_horario": self.quota_manager.limite_horario,
+                },
+                "latencia_s": {
+                    etapa: {
+                        "n": len(valores),
+                        "media": round(statistics.mean(valores), 2) if valores else None,
+                        "max": round(max(valores), 2) if valores else None,
+                    }
+                    for etapa, valores in self.latencias.items()
+                },
+                "segundos_por_contacto": round(statistics.mean(self._intervalos), 1) if self._intervalos else None,
+                "esperando": {
+                    "motivo": self.motivo_espera,
+                    "restante_s": round(self.espera_hasta - ahora),
+                } if self.espera_hasta and self.espera_hasta > ahora else None,
+                "ultimo": self.ultimo,
+                "eta": eta.isoformat(timespec="minutes") if eta else None,
+            }
+
+    def escribir_estado(self):
+        """
+        Reescribe status.json de una vez (temporal propio + reemplazo) para no
+        dejarlo a medias; una escritura a la vez, desde cualquier hilo.
+        """
+        directorio, nombre = os.path.split(os.path.abspath(self.archivo_estado))
+        with self._bloqueo_escritura:
+            temporal = None
+            try:
+                descriptor, temporal = tempfile.mkstemp(prefix=nombre + ".", suffix=".tmp", dir=directorio)
+                with open(descriptor, "w", encoding="utf-8") as f:
+                    json.dump(self.estado(), f, ensure_ascii=False, indent=2)
+                os.replace(temporal, self.archivo_estado)
+            except OSError as e:
+                print(f"⚠️ No se pudo escribir {self.archivo_estado}: {e}")
+                if temporal and os.path.exists(temporal):
+                    os.remove(temporal)
+
+    @staticmethod
+    def _barra(valor: int, limite: int, ancho: int = 20) -> str:
+        llenas = min(ancho, round(ancho * valor / limite)) if limite else 0
+        return "█" * llenas + "░" * (ancho - llenas)
+
+    def _dibujar(self, estado: Dict[str, Any]):
+        cuota = estado["cuota"]
+        lineas = [
+            f"📡 ENVÍO POR WHATSAPP {estado['linea']}".rstrip() + f"   (actualizado {estado['actualizado'][11:]})",
+            "",
+            f"✅ Enviados: {estado['enviados']}   ❌ Fallidos: {estado['fallidos']}   "
+            f"⏭️ Omitidos: {estado['omitidos']}   ⏳ Pendientes: {estado['pendientes']}/{estado['total']}",
+            f"📊 Hoy     {self._barra(cuota['hoy'], cuota['limite_diario'])} {cuota['hoy']}/{cuota['limite_diario']}",
+            f"📊 Hora    {self._barra(cuota['ultima_hora'], cuota['limite_horario'])} "
+            f"{cuota['ultima_hora']}/{cuota['limite_horario']}",
+        ]
+        for etapa, valores in estado["latencia_s"].items():
+            if valores["n"]:
+                lineas.append(f"⏱️ {etapa:<9} media {valores['media']:6.2f}s | máx {valores['max']:6.2f}s "
+                              f"(últimos {valores['n']})")
+        if estado["segundos_por_contacto"]:
+            lineas.append(f"⏱️ {'contacto':<9} {estado['segundos_por_contacto']:.1f}s entre envíos (con pausas)")
+        if estado["esperando"]:
+            lineas.append(f"💤 Esperando ({estado['esperando']['motivo']}): {estado['esperando']['restante_s']}s")
+        lineas.append(f"🏁 ETA: {estado['eta'].replace('T', ' ') if estado['eta'] else '-'}")
+        lineas.append("─" * 60)
+        lineas.extend(self._salida.lineas)
+        # Limpia la pantalla y dibuja desde la esquina superior
+        self._salida.original.write("\x1b[2J\x1b[H" + "\n".join(lineas) + "\n")
+        self._salida.original.flush()
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            self.escribir_estado()
+            if self._salida is not None:
+                self._dibujar(self.estado())
+
+    def iniciar(self):
+        if self.panel and sys.stdout.isatty():
+            self._salida = _SalidaPanel(sys.stdout, self.LINEAS_REGISTRO)
+            sys.stdout = self._salida
+        self.escribir_estado()
+        self._hilo = threading.Thread(target=self._ciclo, name="monitor-envios", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+        if self._salida is not None:
+            self._dibujar(self.estado())
+            sys.stdout = self._salida.original
+            self._salida = None
+        self.escribir_estado()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()
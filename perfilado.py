@@ -0,0 +1,213 @@
+"""
+Perfilado Opcional por Etapa
+============================
+
+Con `--profile` cada punto de entrada mide sus etapas (carga de datos,
+generación, escritura, envío...) con cProfile y, con `--profile-cada N`,
+también cada N-ésimo proveedor por separado. Por cada medición se escriben en
+`<salida>/perfil/<fecha-hora>/`:
+
+- `<nombre>.pstats`: para `python -m pstats`, snakeviz, etc.
+- `<nombre>.collapsed`: pilas muestreadas en formato colapsado (el de py-spy
+  `--format raw`), listas para flamegraph.pl o speedscope.
+
+Al terminar se escribe `resumen.txt` (también por consola) con el tiempo de
+cada etapa y las funciones que más tiempo propio consumieron. Una etapa
+anidada o un proveedor medido se suma también a la etapa que lo contiene.
+
+Sin `--profile` los ganchos (`etapa`, `por_proveedor`) no hacen nada. En el envío
+multilínea cada línea corre en su propio proceso y no se perfila.
+"""
+
+import cProfile
+import datetime
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DIRECTORIO_PERFIL = "perfil"
+ARCHIVO_RESUMEN = "resumen.txt"
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil `p` (0-100) por el rango más cercano; 0.0 sin valores. Lo usan los benchmarks y consultar_eventos"""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+class Perfilador:
+    """Mediciones anidadas con cProfile más un muestreo de pilas del hilo principal"""
+
+    INTERVALO_MUESTREO = 0.005
+    FUNCIONES_RESUMEN = 10
+
+    def __init__(self, directorio: str, cada: int = 0):
+        self.directorio = directorio
+        self.cada = cada
+        os.makedirs(directorio, exist_ok=True)
+        # Pila de mediciones activas: (nombre, perfil, inicio, hijos)
+        self._activas: List[tuple] = []
+        self._etapas: Dict[str, Dict] = {}
+        self._proveedores: List[Dict] = []
+        self._muestras: Dict[str, Counter] = defaultdict(Counter)
+        self._hilo_principal = threading.get_ident()
+        self._detener = threading.Event()
+        self._muestreador = threading.Thread(target=self._muestrear, name="perfilador", daemon=True)
+        self._muestreador.start()
+
+    def _muestrear(self):
+        while not self._detener.wait(self.INTERVALO_MUESTREO):
+            activas = tuple(nombre for nombre, *_ in self._activas)
+            if not activas:
+                continue
+            frame = sys._current_frames().get(self._hilo_principal)
+            pila = []
+            while frame is not None:
+                codigo = frame.f_code
+                pila.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                frame = frame.f_back
+            colapsada = ";".join(reversed(pila))
+            for nombre in activas:
+                self._muestras[nombre][colapsada] += 1
+
+    @contextmanager
+    def medir(self, nombre: str, es_proveedor: bool = False):
+        """Mide el bloque con su propio cProfile; la medición que lo contiene se pausa mientras tanto"""
+        if self._activas:
+            self._activas[-1][1].disable()
+        perfil = cProfile.Profile()
+        hijos: List[cProfile.Profile] = []
+        if not es_proveedor:
+            # El resumen lista las etapas en el orden en que empiezan
+            self._etapas.setdefault(nombre, None)
+        inicio = time.perf_counter()
+        self._activas.append((nombre, perfil, inicio, hijos))
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            duracion = time.perf_counter() - inicio
+            self._activas.pop()
+            estadisticas = pstats.Stats(perfil, stream=io.StringIO())
+            for hijo in hijos:
+                estadisticas.add(hijo)
+            estadisticas.dump_stats(os.path.join(self.directorio, f"{nombre}.pstats"))
+            self._escribir_colapsadas(nombre)
+            registro = {"nombre": nombre, "segundos": duracion, "estadisticas": estadisticas}
+            if es_proveedor:
+                self._proveedores.append(registro)
+            else:
+                anterior = self._etapas.get(nombre)
+                if anterior:
+                    # La misma etapa puede ejecutarse varias veces en una corrida: se acumula
+                    anterior["estadisticas"].add(perfil, *hijos)
+                    anterior["segundos"] += duracion
+                    anterior["estadisticas"].dump_stats(os.path.join(self.directorio, f"{nombre}.pstats"))
+                else:
+                    self._etapas[nombre] = registro
+            if self._activas:
+                self._activas[-1][3].extend([perfil, *hijos])
+                self._activas[-1][1].enable()
+
+    def _escribir_colapsadas(self, nombre: str):
+        with open(os.path.join(self.directorio, f"{nombre}.collapsed"), "w", encoding="utf-8") as f:
+            for pila, cantidad in self._muestras[nombre].most_common():
+                f.write(f"{pila} {cantidad}\n")
+
+    def proveedor(self, indice: int):
+        """Mide el proveedor si es uno de cada `cada` (índice desde 1)"""
+        if not self.cada or indice % self.cada:
+            return nullcontext()
+        return self.medir(f"proveedor_{indice:05d}", es_proveedor=True)
+
+    def _top(self, estadisticas: pstats.Stats) -> List[str]:
+        filas = sorted(estadisticas.stats.items(), key=lambda item: item[1][2], reverse=True)
+        lineas = []
+        for (archivo, linea, funcion), (_, llamadas, propio, acumulado, _) in filas[:self.FUNCIONES_RESUMEN]:
+            ubicacion = f"{os.path.basename(archivo)}:{linea}" if linea else archivo
+            lineas.append(f"      {propio:8.3f}s propio | {acumulado:8.3f}s acumulado | {llamadas:>8} llamadas | "
+                          f"{funcion} ({ubicacion})")
+        return lineas
+
+    def resumen(self) -> str:
+        lineas = [f"Perfil de la corrida: {os.path.abspath(self.directorio)}", ""]
+        for nombre, etapa in self._etapas.items():
+            if etapa is None:
+                continue
+            lineas.append(f"== {nombre}: {etapa['segundos']:.2f}s "
+                          f"({nombre}.pstats, {nombre}.collapsed)")
+            lineas.extend(self._top(etapa["estadisticas"]))
+            lineas.append("")
+        if self._proveedores:
+            lineas.append(f"== Proveedores medidos (1 de cada {self.cada}), del más lento al más rápido:")
+            for proveedor in sorted(self._proveedores, key=lambda p: p["segundos"], reverse=True)[:self.FUNCIONES_RESUMEN]:
+                lineas.append(f"      {proveedor['segundos']:8.3f}s {proveedor['nombre']}.pstats")
+        return "\n".join(lineas)
+
+    def finalizar(self):
+        """Detiene el muestreo y escribe el resumen con las funciones más costosas"""
+        self._detener.set()
+        self._muestreador.join()
+        for nombre in self._etapas:
+            self._escribir_colapsadas(nombre)
+        texto = self.resumen()
+        with open(os.path.join(self.directorio, ARCHIVO_RESUMEN), "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+        print(f"\n🔬 === PERFIL ===\n{texto}")
+        print(f"🔬 Resumen en {os.path.join(self.directorio, ARCHIVO_RESUMEN)}")
+
+
+_activo: Optional[Perfilador] = None
+
+
+def etapa(nombre: str):
+    """Gancho de etapa: mide el bloque si hay un perfilado activo"""
+    return _activo.medir(nombre) if _activo else nullcontext()
+
+
+def por_proveedor(elementos: Iterable) -> Iterator:
+    """
+    Recorre `elementos` midiendo, si hay un perfilado activo, uno de cada
+    `--profile-cada` como un proveedor: lo que el ciclo hace con ese elemento
+    hasta pedir el siguiente.
+    """
+    if _activo is None or not _activo.cada:
+        yield from elementos
+        return
+    for indice, elemento in enumerate(elementos, 1):
+        with _activo.proveedor(indice):
+            yield elemento
+
+
+@contextmanager
+def corrida(activar: bool, directorio_salida: str, cada: int = 0):
+    """Activa el perfilado para todo el bloque (si `activar`) y escribe el resumen al salir"""
+    global _activo
+    if not activar:
+        yield None
+        return
+    marca = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    _activo = Perfilador(os.path.join(directorio_salida, DIRECTORIO_PERFIL, marca), cada)
+    try:
+        yield _activo
+    finally:
+        perfilador, _activo = _activo, None
+        perfilador.finalizar()
+
+
+def agregar_argumentos(parser):
+    """Opciones `--profile` y `--profile-cada` comunes a todos los puntos de entrada"""
+    parser.add_argument('--profile', action='store_true',
+                        help="Perfila cada etapa con cProfile (.pstats y pilas colapsadas en <salida>/perfil/)")
+    parser.add_argument('--profile-cada', type=int, default=0, metavar='N',
+                        help="Con --profile, perfila además uno de cada N proveedores por separado")
@@ -0,0 +1,240 @@
+"""
+Planificador de Envíos de WhatsApp
+==================================
+
+Calcula por adelantado el horario completo de envío: a partir de la lista de
+contactos, los límites de `QuotaManager` (diario y por hora), el horario
+permitido y el ritmo por contacto, asigna a cada contacto una hora programada
+que puede caer en días siguientes. El plan se guarda en JSON y se retoma en
+la siguiente ejecución: el emisor espera la hora de cada contacto en lugar de
+detenerse al llegar al límite o al fin del horario, y el plan da una hora
+estimada (ETA) para terminar la quincena.
+
+Cada plan pertenece a una generación de PDFs (`manifiesto.huella_generacion`):
+los nombres de archivo se repiten cada quincena, así que al cambiar los PDFs
+se descarta el plan anterior y se crea uno nuevo en lugar de retomarlo.
+
+Uso:
+    python main.py plan                  # calcula y muestra el plan con su ETA
+    python main.py send-whatsapp --plan  # envía siguiendo (o retomando) el plan
+"""
+
+import datetime
+import json
+import os
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from manifiesto import huella_generacion
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_ENVIADO = "enviado"
+ESTADO_FALLIDO = "fallido"
+ESTADO_OMITIDO = "omitido"
+
+
+def _siguiente_inicio(momento: datetime.datetime, hora_inicio: int, dias: int = 1) -> datetime.datetime:
+    fecha = momento.date() + datetime.timedelta(days=dias)
+    return datetime.datetime.combine(fecha, datetime.time(hora_inicio))
+
+
+def ajustar_a_horario(momento: datetime.datetime, hora_inicio: int, hora_fin: int) -> datetime.datetime:
+    """Primer instante permitido a partir de `momento` (hora_fin incluida hasta :59)"""
+    if momento.hour < hora_inicio:
+        return _siguiente_inicio(momento, hora_inicio, dias=0)
+    if momento.hour > hora_fin:
+        return _siguiente_inicio(momento, hora_inicio)
+    return momento
+
+
+def calcular_horario(cantidad: int, limite_diario: int, limite_horario: int, hora_inicio: int, hora_fin: int,
+                     segundos_por_contacto: float, inicio: datetime.datetime, envios_hoy: int = 0,
+                     envios_ultima_hora: Iterable[float] = ()) -> List[datetime.datetime]:
+    """
+    Simula el envío respetando las mismas reglas que `QuotaManager.puede_enviar`.
+
+    Args:
+        cantidad: Número de envíos a programar
+        limite_diario: Máximo de envíos por día calendario
+        limite_horario: Máximo de envíos en cualquier ventana de una hora
+        hora_inicio: Primera hora permitida del día
+        hora_fin: Última hora permitida del día (incluida hasta :59)
+        segundos_por_contacto: Duración media de un envío más su pausa
+        inicio: Momento desde el que se planifica
+        envios_hoy: Envíos ya registrados hoy
+        envios_ultima_hora: Marcas de tiempo (epoch) de los envíos de la última hora
+
+    Returns:
+        Lista con la hora programada de cada envío, en orden
+
+    Raises:
+        ValueError: Si los límites o el horario no permiten ningún envío
+            (la simulación no terminaría nunca)
+    """
+    if limite_diario <= 0 or limite_horario <= 0:
+        raise ValueError(f"Los límites de envío deben ser positivos (diario: {limite_diario}, "
+                         f"por hora: {limite_horario})")
+    if not 0 <= hora_inicio <= hora_fin <= 23:
+        raise ValueError(f"Horario permitido inválido: {hora_inicio}:00-{hora_fin}:59")
+    if segundos_por_contacto < 0:
+        raise ValueError(f"Los segundos por contacto no pueden ser negativos ({segundos_por_contacto})")
+    paso = datetime.timedelta(seconds=segundos_por_contacto)
+    hora = datetime.timedelta(hours=1)
+    ventana = deque(sorted(datetime.datetime.fromtimestamp(ts) for ts in envios_ultima_hora))
+    dia = inicio.date()
+    enviados_dia = envios_hoy
+    momento = inicio
+    horario = []
+
+    for _ in range(cantidad):
+        while True:
+            momento = ajustar_a_horario(momento, hora_inicio, hora_fin)
+            if momento.date() != dia:
+                dia, enviados_dia = momento.date(), 0
+            if enviados_dia >= limite_diario:
+                momento = _siguiente_inicio(momento, hora_inicio)
+                continue
+            while ventana and ventana[0] <= momento - hora:
+                ventana.popleft()
+            if len(ventana) >= limite_horario:
+                momento = ventana[0] + hora
+                continue
+            break
+
+        horario.append(momento)
+        ventana.append(momento)
+        enviados_dia += 1
+        momento += paso
+
+    return horario
+
+
+class PlanEnvios:
+    """Plan persistido: una entrada por contacto con su hora programada y estado"""
+
+    ARCHIVO_DEFECTO = "plan_envio.json"
+    SEGUNDOS_POR_CONTACTO_DEFECTO = 60
+
+    def __init__(self, archivo: Optional[str] = None, segundos_por_contacto: Optional[float] = None,
+                 generacion: Optional[str] = None):
+        self.archivo = archivo or self.ARCHIVO_DEFECTO
+        self.segundos_por_contacto = segundos_por_contacto or self.SEGUNDOS_POR_CONTACTO_DEFECTO
+        self.generacion = generacion
+        self.entradas: List[Dict[str, Any]] = []
+        self.creado = datetime.datetime.now().isoformat(timespec="seconds")
+
+    @classmethod
+    def cargar(cls, archivo: Optional[str] = None) -> Optional["PlanEnvios"]:
+        """Plan guardado en `archivo`, o None si no existe"""
+        plan = cls(archivo)
+        if not os.path.exists(plan.archivo):
+            return None
+        with open(plan.archivo, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        plan.segundos_por_contacto = datos.get("segundos_por_contacto", plan.segundos_por_contacto)
+        plan.creado = datos.get("creado", plan.creado)
+        plan.generacion = datos.get("generacion")
+        plan.entradas = datos.get("entradas", [])
+        return plan
+
+    def guardar(self):
+        """Escribe el plan completo; se reemplaza de una vez para no dejarlo a medias"""
+        temporal = self.archivo + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({
+                "creado": self.creado,
+                "generacion": self.generacion,
+                "segundos_por_contacto": self.segundos_por_contacto,
+                "eta": self.eta.isoformat(timespec="seconds") if self.eta else None,
+                "entradas": self.entradas,
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(temporal, self.archivo)
+
+    def agregar_contactos(self, contactos: List[Dict[str, str]]) -> int:
+        """Incorpora los contactos que aún no están en el plan (por archivo); retorna cuántos"""
+        conocidos = {entrada["archivo"] for entrada in self.entradas}
+        nuevos = [c for c in contactos if c["archivo"] not in conocidos]
+        for contacto in nuevos:
+            self.entradas.append(dict(contacto, programado=None, estado=ESTADO_PENDIENTE))
+        return len(nuevos)
+
+    def pendientes(self) -> List[Dict[str, Any]]:
+        return [e for e in self.entradas if e["estado"] == ESTADO_PENDIENTE]
+
+    def programar(self, quota_manager, inicio: Optional[datetime.datetime] = None):
+        """(Re)calcula la hora de todos los pendientes desde `inicio` según el estado de las cuotas"""
+        quota_manager.cargar_datos()
+        pendientes = self.pendientes()
+        horario = calcular_horario(
+            len(pendientes),
+            limite_diario=quota_manager.limite_diario,
+            limite_horario=quota_manager.limite_horario,
+            hora_inicio=quota_manager.HORA_INICIO,
+            hora_fin=quota_manager.HORA_FIN,
+            segundos_por_contacto=self.segundos_por_contacto,
+            inicio=inicio or datetime.datetime.now(),
+            envios_hoy=quota_manager.mensajes_hoy,
+            envios_ultima_hora=quota_manager.historial_horas,
+        )
+        for entrada, momento in zip(pendientes, horario):
+            entrada["programado"] = momento.isoformat(timespec="seconds")
+        self.guardar()
+
+    def programado(self, entrada: Dict[str, Any]) -> datetime.datetime:
+        return datetime.datetime.fromisoformat(entrada["programado"])
+
+    def marcar(self, archivo: str, estado: str):
+        """Registra el resultado del contacto (por archivo), también si llega desde un reintento"""
+        for entrada in self.entradas:
+            if entrada["archivo"] == archivo:
+                entrada["estado"] = estado
+                entrada["procesado"] = datetime.datetime.now().isoformat(timespec="seconds")
+                self.guardar()
+                return
+
+    @property
+    def eta(self) -> Optional[datetime.datetime]:
+        """Hora estimada de fin: último envío programado más la duración de un contacto"""
+        programados = [self.programado(e) for e in self.pendientes() if e.get("programado")]
+        if not programados:
+            return None
+        return max(programados) + datetime.timedelta(seconds=self.segundos_por_contacto)
+
+    def resumen(self):
+        pendientes = self.pendientes()
+        enviados = sum(1 for e in self.entradas if e["estado"] == ESTADO_ENVIADO)
+        fallidos = sum(1 for e in self.entradas if e["estado"] in (ESTADO_FALLIDO, ESTADO_OMITIDO))
+        print(f"\n🗓️ === PLAN DE ENVÍO ({self.archivo}) ===")
+        print(f"✅ Enviados: {enviados} | ❌ Fallidos: {fallidos} | ⏳ Pendientes: {len(pendientes)}")
+        if not pendientes:
+            return
+        por_dia: Dict[datetime.date, int] = {}
+        for entrada in pendientes:
+            dia = self.programado(entrada).date()
+            por_dia[dia] = por_dia.get(dia, 0) + 1
+        for dia, cantidad in sorted(por_dia.items()):
+            print(f"   {dia.isoformat()}: {cantidad} envíos")
+        print(f"🏁 ETA: {self.eta:%Y-%m-%d %H:%M} ({len(por_dia)} día(s))")
+
+
+def obtener_plan(config: Dict[str, Any], contactos: List[Dict[str, str]], quota_manager,
+                 nuevo: bool = False, archivo: Optional[str] = None, generacion: Optional[str] = None) -> PlanEnvios:
+    """
+    Retoma el plan guardado si es de la misma generación de PDFs (agregando
+    contactos nuevos) o crea uno, y vuelve a programar los pendientes desde
+    ahora con el estado actual de las cuotas. `generacion` se calcula de los
+    contactos si no se indica (al reanudar se pasa la de la bitácora).
+    """
+    archivo = archivo or config.get("archivo_plan")
+    generacion = generacion or huella_generacion(contactos)
+    plan = None if nuevo else PlanEnvios.cargar(archivo)
+    if plan is not None and plan.generacion != generacion:
+        print(f"🆕 Los PDFs cambiaron desde el plan creado el {plan.creado}: se descarta y se crea uno nuevo")
+        plan = None
+    if plan is None:
+        plan = PlanEnvios(archivo, config.get("segundos_por_contacto"), generacion)
+    else:
+        print(f"🔁 Retomando plan creado el {plan.creado} ({len(plan.pendientes())} pendientes)")
+    plan.agregar_contactos(contactos)
+    plan.programar(quota_manager)
+    return plan
@@ -0,0 +1,143 @@
+"""
+Registro Estructurado de Eventos
+================================
+
+Los mensajes por consola son para quien mira la corrida; este registro es para
+analizarla después. Cada evento es una línea JSON en `eventos.jsonl` (en la
+carpeta de salida, o donde diga `archivo_eventos` en `config.json`) con:
+
+    ts, corrida, etapa, resultado, cedula, segundos, error, detalle y campos propios
+
+`error` es la clase de la excepción (p. ej. `SMTPAuthenticationError`) y
+`detalle` su mensaje. Los eventos pasan por un `QueueHandler`: el ciclo que los
+emite solo encola y un hilo aparte los escribe, así el registro nunca frena la
+generación ni el envío. El archivo se abre en modo de agregar; `corrida`
+identifica cada ejecución.
+
+Fuera de una `corrida(...)` activa, `evento` y `medir` no hacen nada. Para
+consultar los tiempos por etapa después de una corrida: consultar_eventos.py.
+"""
+
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from manifiesto import cedula_de_archivo
+
+ARCHIVO_EVENTOS = "eventos.jsonl"
+
+_registro = logging.getLogger("eventos")
+_registro.setLevel(logging.INFO)
+_registro.propagate = False
+_oyente_cola: Optional[logging.handlers.QueueListener] = None
+_corrida = ""
+# Proceso dueño del oyente: un proceso hijo (líneas de WhatsApp) hereda el estado pero no su hilo
+_proceso: Optional[int] = None
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por evento, con la fecha en ISO 8601"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {"ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds")}
+        datos.update(record.evento)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+def activo() -> bool:
+    return _oyente_cola is not None and _proceso == os.getpid()
+
+
+def evento(etapa: str, resultado: str = "ok", cedula: Any = None, segundos: Optional[float] = None,
+           error: Optional[BaseException] = None, **campos):
+    """Encola un evento; con `error` se registran su clase y su mensaje"""
+    if not activo():
+        return
+    datos = {"corrida": _corrida, "etapa": etapa, "resultado": resultado}
+    if cedula is not None:
+        datos["cedula"] = str(cedula)
+    if segundos is not None:
+        datos["segundos"] = round(segundos, 4)
+    if error is not None:
+        datos["error"] = type(error).__name__
+        datos["detalle"] = str(error)
+    datos.update(campos)
+    _registro.info(etapa, extra={"evento": datos})
+
+
+@contextmanager
+def medir(etapa: str, cedula: Any = None, **campos):
+    """Registra la duración del bloque; si lanza una excepción, la registra como error y la deja pasar"""
+    inicio = time.perf_counter()
+    try:
+        yield campos
+    except Exception as e:
+        evento(etapa, "error", cedula, time.perf_counter() - inicio, error=e, **campos)
+        raise
+    evento(etapa, campos.pop("resultado", "ok"), cedula, time.perf_counter() - inicio, **campos)
+
+
+@contextmanager
+def corrida(config: Dict[str, Any], directorio_salida: str, archivo: Optional[str] = None):
+    """Activa el registro durante el bloque y espera a que se escriba lo encolado al salir"""
+    global _oyente_cola, _corrida, _proceso
+    if activo():
+        # Ya hay una corrida activa en este proceso (p. ej. main.py llamando a otra etapa)
+        yield
+        return
+    ruta = archivo or config.get('archivo_eventos') or os.path.join(directorio_salida, ARCHIVO_EVENTOS)
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    manejador = logging.FileHandler(ruta, encoding="utf-8")
+    manejador.setFormatter(FormatoJSON())
+    cola = queue.SimpleQueue()
+    cola_handler = logging.handlers.QueueHandler(cola)
+    _registro.handlers.clear()
+    _registro.addHandler(cola_handler)
+    _corrida = f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+    _oyente_cola = logging.handlers.QueueListener(cola, manejador)
+    _oyente_cola.start()
+    _proceso = os.getpid()
+    try:
+        yield
+    finally:
+        oyente, _oyente_cola = _oyente_cola, None
+        _registro.removeHandler(cola_handler)
+        oyente.stop()
+        manejador.close()
+
+
+class OyenteEnvios:
+    """
+    Traduce los eventos de `WhatsAppSafeSender` al registro. Los tiempos de
+    etapa llegan antes que el resultado del contacto, así que se guardan y se
+    escriben con la cédula y el resultado cuando este llega.
+    """
+
+    def __init__(self, canal: str = "whatsapp"):
+        self.canal = canal
+        self._etapas: List[Dict[str, Any]] = []
+
+    def __call__(self, datos: Dict[str, Any]):
+        tipo = datos["tipo"]
+        if tipo == "etapa":
+            self._etapas.append(datos)
+        elif tipo == "contacto":
+            cedula = cedula_de_archivo(datos.get("archivo") or "")
+            for etapa in self._etapas:
+                evento(f"{self.canal}_{etapa['etapa']}", datos["resultado"], cedula, etapa["segundos"],
+                       numero=datos["numero"])
+            self._etapas.clear()
+            evento(f"{self.canal}_contacto", datos["resultado"], cedula, datos.get("segundos"),
+                   numero=datos["numero"], motivo=datos.get("motivo"), clase=datos.get("clase"),
+                   reintento=datos.get("reintento"))
+        elif tipo == "espera":
+            evento(f"{self.canal}_espera", "ok", segundos=datos["segundos"], motivo=datos.get("motivo"))
+        elif tipo == "fin":
+            evento(f"{self.canal}_fin", "detenido" if datos.get("detenido") else "ok",
+                   exitosos=datos.get("exitosos"), fallidos=datos.get("fallidos"))
@@ -0,0 +1,143 @@
+"""
+Simulador Local de WhatsApp Web
+===============================
+
+Servidor HTTP mínimo que sirve `simulador_whatsapp.html`, una página que
+imita los elementos del DOM de los que depende `WhatsAppSafeSender`
+(cuadro de búsqueda, cuadro de mensaje, aviso de número inválido, botones de
+adjuntar/documento, `input[type=file]`, ícono de enviar y avisos de
+problema). Permite probar y medir el envío sin una sesión real.
+
+Latencias (en ms) e inyección de fallos se configuran por diccionario:
+
+    latencia_carga_ms, latencia_busqueda_ms, latencia_chat_ms,
+    latencia_adjunto_ms, latencia_envio_ms, jitter (fracción, p. ej. 0.2),
+    contactos_conocidos, numeros_invalidos, tasa_invalidos,
+    tasa_fallo_envio, banner, banner_tras_envios
+
+Uso:
+    python simulador_whatsapp.py --puerto 8765 --latencia-busqueda-ms 300 --banner Reconectando
+"""
+
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+RUTA_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulador_whatsapp.html")
+MARCA_CONFIG = "/*CONFIG*/{}/*FIN_CONFIG*/"
+
+
+class SimuladorWhatsApp:
+    """Servidor del simulador; guarda los envíos confirmados para consultarlos"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, puerto: int = 0, host: str = "127.0.0.1"):
+        self.config = dict(config or {})
+        self.host = host
+        self.puerto = puerto
+        self.enviados: List[Dict[str, Any]] = []
+        self._bloqueo = threading.Lock()
+        self._servidor: Optional[ThreadingHTTPServer] = None
+        self._hilo: Optional[threading.Thread] = None
+        with open(RUTA_HTML, "r", encoding="utf-8") as f:
+            self._plantilla = f.read()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.puerto}"
+
+    def pagina(self) -> bytes:
+        """HTML con la configuración actual (y el conteo de envíos) incrustada"""
+        with self._bloqueo:
+            config = dict(self.config, envios_previos=len(self.enviados))
+        return self._plantilla.replace(MARCA_CONFIG, json.dumps(config)).encode("utf-8")
+
+    def registrar_envio(self, datos: Dict[str, Any]):
+        with self._bloqueo:
+            self.enviados.append(datos)
+
+    def estado(self) -> Dict[str, Any]:
+        with self._bloqueo:
+            return {"config": self.config, "enviados": list(self.enviados)}
+
+    def iniciar(self) -> str:
+        """Arranca el servidor en un hilo y retorna la URL base"""
+        simulador = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def _responder(self, codigo, cuerpo: bytes, tipo: str):
+                self.send_response(codigo)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def do_GET(self):
+                ruta = urlparse(self.path).path
+                if ruta in ("/", "/send"):
+                    self._responder(200, simulador.pagina(), "text/html; charset=utf-8")
+                elif ruta == "/api/estado":
+                    self._responder(200, json.dumps(simulador.estado()).encode("utf-8"), "application/json")
+                else:
+                    self._responder(404, b"", "text/plain")
+
+            def do_POST(self):
+                if urlparse(self.path).path != "/api/enviado":
+                    self._responder(404, b"", "text/plain")
+                    return
+                largo = int(self.headers.get("Content-Length", 0))
+                simulador.registrar_envio(json.loads(self.rfile.read(largo) or b"{}"))
+                self._responder(204, b"", "text/plain")
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer((self.host, self.puerto), Manejador)
+        self.puerto = self._servidor.server_address[1]
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self.base_url
+
+    def detener(self):
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+
+def construir_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Simulador local de WhatsApp Web")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia-carga-ms", type=int, default=500)
+    parser.add_argument("--latencia-busqueda-ms", type=int, default=300)
+    parser.add_argument("--latencia-chat-ms", type=int, default=300)
+    parser.add_argument("--latencia-adjunto-ms", type=int, default=500)
+    parser.add_argument("--latencia-envio-ms", type=int, default=300)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--contactos-conocidos", nargs="*", default=[])
+    parser.add_argument("--numeros-invalidos", nargs="*", default=[])
+    parser.add_argument("--tasa-invalidos", type=float, default=0.0)
+    parser.add_argument("--tasa-fallo-envio", type=float, default=0.0)
+    parser.add_argument("--banner", default="", help="Texto de aviso de problema (p. ej. 'Reconectando')")
+    parser.add_argument("--banner-tras-envios", type=int, default=None)
+    return parser
+
+
+def config_desde_args(args) -> Dict[str, Any]:
+    return {
+        clave: valor for clave, valor in vars(args).items()
+        if clave != "puerto"
+    }
+
+
+if __name__ == "__main__":
+    args = construir_parser().parse_args()
+    simulador = SimuladorWhatsApp(config_desde_args(args), puerto=args.puerto)
+    print(f"🧪 Simulador de WhatsApp Web en {simulador.iniciar()} (Ctrl+C para terminar)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        simulador.detener()
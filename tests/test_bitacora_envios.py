@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from bitacora_envios import BitacoraEnvios
+
+CONTACTO = {"archivo": "/salida/ANA!123!3001112233.pdf", "numero": "+573001112233", "nombre": "ANA"}
+
+
+@pytest.fixture
+def archivo(tmp_path):
+    return str(tmp_path / "bitacora.db")
+
+
+def test_la_misma_corrida_se_retoma_sin_reenviar(archivo):
+    bitacora = BitacoraEnvios(archivo)
+    bitacora.iniciar_corrida("quincena-1")
+    bitacora.registrar_contactos([CONTACTO])
+    bitacora.enviado(CONTACTO, bitacora.siguiente_indice())
+    bitacora.cerrar()
+
+    bitacora = BitacoraEnvios(archivo)
+    assert not bitacora.iniciar_corrida("quincena-1")
+    assert bitacora.registrar_contactos([CONTACTO]) == 0
+    assert CONTACTO["archivo"] in bitacora.enviados()
+
+
+def test_otra_generacion_con_los_mismos_nombres_vuelve_a_enviar(archivo):
+    bitacora = BitacoraEnvios(archivo)
+    bitacora.iniciar_corrida("quincena-1")
+    bitacora.registrar_contactos([CONTACTO])
+    bitacora.enviado(CONTACTO, 1)
+    bitacora.cerrar()
+
+    bitacora = BitacoraEnvios(archivo)
+    assert bitacora.iniciar_corrida("quincena-2")
+    assert bitacora.registrar_contactos([CONTACTO]) == 1
+    assert bitacora.enviados() == set()
+    assert [c["archivo"] for c in bitacora.pendientes()] == [CONTACTO["archivo"]]
+
+
+def test_el_indice_de_enviados_continua_sin_listar_la_carpeta(archivo, tmp_path):
+    enviados = tmp_path / "enviados"
+    enviados.mkdir()
+    (enviados / "007_20250101_120000_X!1!300.pdf").write_bytes(b"%PDF-")
+
+    bitacora = BitacoraEnvios(archivo)
+    bitacora.iniciar_corrida("quincena-1")
+    assert bitacora.siguiente_indice(str(enviados)) == 8
+    bitacora.registrar_contactos([CONTACTO])
+    bitacora.enviado(CONTACTO, 8)
+    bitacora.cerrar()
+
+    # Con el contador guardado, un archivo nuevo en la carpeta ya no cambia la numeración
+    (enviados / "050_20250101_120000_Y!2!301.pdf").write_bytes(b"%PDF-")
+    bitacora = BitacoraEnvios(archivo)
+    bitacora.iniciar_corrida("quincena-2")
+    assert bitacora.siguiente_indice(str(enviados)) == 9
+
+
+def test_migra_una_bitacora_sin_corridas(archivo):
+    conexion = sqlite3.connect(archivo)
+    conexion.execute(
+        "CREATE TABLE contactos (archivo TEXT PRIMARY KEY, orden INTEGER NOT NULL, numero TEXT NOT NULL,"
+        " nombre TEXT, estado TEXT NOT NULL, intentos INTEGER NOT NULL DEFAULT 0, motivo TEXT,"
+        " indice_envio INTEGER, reintentar_en REAL, actualizado REAL NOT NULL)"
+    )
+    conexion.execute("INSERT INTO contactos (archivo, orden, numero, nombre, estado, indice_envio, actualizado)"
+                     " VALUES (?, 1, ?, ?, 'enviado', 4, 0)", (CONTACTO["archivo"], CONTACTO["numero"], "ANA"))
+    conexion.commit()
+    conexion.close()
+
+    bitacora = BitacoraEnvios(archivo)
+    assert bitacora.enviados() == {CONTACTO["archivo"]}
+    assert bitacora.siguiente_indice() == 5
+    bitacora.iniciar_corrida("quincena-2")
+    assert bitacora.enviados() == set()
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from contactos import (
+    ConfiguracionContactos, a_e164, clave_cedula, normalizar_cedula, normalizar_contactos, normalizar_emails,
+    normalizar_telefono, normalizar_telefonos,
+)
+
+TELEFONOS = ["300 111 2233", "+57 300-111-2233", "573001112233", 3001112233.0, "2001112233", "0", "nan",
+             "", None, np.nan, "30011122", "57 3001112233 ext"]
+
+
+def test_normalizar_telefonos():
+    resultado = normalizar_telefonos(pd.Series(TELEFONOS, dtype=object))
+
+    assert resultado.tolist() == ["3001112233"] * 4 + [""] * 7 + ["3001112233"]
+
+
+@pytest.mark.parametrize("valor", TELEFONOS)
+def test_un_telefono_suelto_sigue_las_mismas_reglas(valor):
+    assert normalizar_telefono(valor) == normalizar_telefonos(pd.Series([valor], dtype=object)).iloc[0]
+
+
+@pytest.mark.parametrize("valor", ["123", 123, 123.0, " 123.00 ", None, np.nan, "AB-12"])
+def test_una_cedula_suelta_sigue_las_mismas_reglas(valor):
+    assert clave_cedula(valor) == normalizar_cedula(pd.Series([valor], dtype=object)).iloc[0]
+
+
+def test_a_e164():
+    assert a_e164("300 111 2233") == "+573001112233"
+    assert a_e164("12345") == ""
+    assert a_e164("") == ""
+
+
+def test_normalizar_emails_descarta_relleno_e_invalidos():
+    resultado = normalizar_emails(pd.Series([" Ana@Correo.COM; ", "no@no.com", "2@2.com", "sin-arroba", "0", None]))
+
+    assert resultado.tolist() == ["ana@correo.com", "", "", "", "", ""]
+
+
+def test_normalizar_contactos_elige_el_mejor_canal_por_cedula():
+    hoja = pd.DataFrame({
+        "CEDULA": [101.0, "101", 202, 303, 404],
+        "NOMBRE": ["ANA", "ANA", "LUIS", "EVA", "JOSE"],
+        "WHATSAPP": ["0", "3001112233", "nan", "12345", None],
+        "EMAIL 1": ["ana@correo.com", "", "no@no.com", "eva@correo", None],
+        "EMAIL 2": ["", "", "luis@correo.com", "", ""],
+    })
+
+    contactos, rechazados = normalizar_contactos(hoja)
+
+    assert contactos.loc["101"].tolist() == ["3001112233", "+573001112233", "", ConfiguracionContactos.CANAL_TEL]
+    assert contactos.loc["202", "email"] == "luis@correo.com"
+    assert contactos.loc["202", "canal"] == ConfiguracionContactos.CANAL_EMAIL
+    assert contactos.loc["303", "canal"] == ConfiguracionContactos.CANAL_IMPRESION
+    assert contactos.loc["404", "canal"] == ConfiguracionContactos.CANAL_IMPRESION
+    assert sorted(contactos.index) == ["101", "202", "303", "404"]
+
+    # Los valores de relleno ("0", "nan", vacío) no son rechazos; los presentes pero inválidos sí
+    assert sorted(map(tuple, rechazados[["cedula", "campo", "valor", "motivo"]].values.tolist())) == [
+        ("202", "EMAIL 1", "no@no.com", "correo de relleno"),
+        ("303", "EMAIL 1", "eva@correo", "correo inválido"),
+        ("303", "WHATSAPP", "12345", "celular inválido"),
+    ]
+
+
+def test_normalizar_contactos_sin_hoja():
+    contactos, rechazados = normalizar_contactos(pd.DataFrame())
+
+    assert contactos.empty and contactos.index.name == "cedula"
+    assert rechazados.empty
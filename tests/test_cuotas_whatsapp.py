@@ -0,0 +1,104 @@
+import datetime
+import pickle
+import threading
+
+import pytest
+
+from WhatsAppSender import QuotaManager
+
+
+@pytest.fixture
+def archivo(tmp_path):
+    return str(tmp_path / "quota_data.db")
+
+
+@pytest.fixture(autouse=True)
+def siempre_en_horario(monkeypatch):
+    monkeypatch.setattr(QuotaManager, "es_horario_permitido", lambda self: True)
+
+
+def test_migra_el_historial_del_pickle_una_sola_vez(archivo, tmp_path):
+    ahora = datetime.datetime.now()
+    with open(tmp_path / "quota_data.pkl", "wb") as f:
+        pickle.dump({"mensajes_hoy": 3, "fecha_actual": ahora.date(),
+                     "historial_horas": {ahora.isoformat(): True}}, f)
+
+    cuotas = QuotaManager(archivo_datos=archivo)
+    assert cuotas.mensajes_hoy == 3
+    # Los envíos sin hora conocida quedan al inicio del día
+    inicio_dia = datetime.datetime.combine(ahora.date(), datetime.time.min).timestamp()
+    marcas = [ts for (ts,) in cuotas.conexion.execute("SELECT ts FROM envios ORDER BY ts")]
+    assert marcas == [inicio_dia, inicio_dia, ahora.timestamp()]
+
+    # Con filas en la base el pickle ya no se vuelve a importar
+    assert QuotaManager(archivo_datos=archivo).mensajes_hoy == 3
+
+
+def test_limite_horario(archivo):
+    cuotas = QuotaManager(limite_diario=10, limite_horario=2, archivo_datos=archivo)
+    cuotas.conexion.execute("INSERT INTO envios (ts) VALUES (?)",
+                            (datetime.datetime.now().timestamp() - cuotas.VENTANA_HORARIA - 1,))
+
+    assert cuotas.reservar_envio() is not None
+    assert cuotas.reservar_envio() is not None
+    assert not cuotas.puede_enviar()
+    assert cuotas.reservar_envio() is None
+
+
+def test_limite_diario_sin_contar_el_dia_anterior(archivo):
+    cuotas = QuotaManager(limite_diario=2, limite_horario=10, archivo_datos=archivo)
+    inicio_dia = datetime.datetime.combine(datetime.date.today(), datetime.time.min).timestamp()
+    cuotas.conexion.execute("INSERT INTO envios (ts) VALUES (?)", (inicio_dia - 1,))
+
+    assert cuotas.reservar_envio() is not None
+    assert cuotas.reservar_envio() is not None
+    assert cuotas.mensajes_hoy == 2
+    assert not cuotas.puede_enviar()
+    assert cuotas.reservar_envio() is None
+
+
+def test_dos_procesos_ven_los_envios_del_otro(archivo):
+    uno = QuotaManager(limite_diario=2, archivo_datos=archivo)
+    otro = QuotaManager(limite_diario=2, archivo_datos=archivo)
+
+    uno.reservar_envio()
+    assert otro.puede_enviar()
+    assert otro.mensajes_hoy == 1
+    assert len(otro.historial_horas) == 1
+
+    otro.reservar_envio()
+    assert not uno.puede_enviar()
+    assert uno.mensajes_hoy == 2
+
+
+def test_cancelar_reserva_devuelve_el_cupo(archivo):
+    cuotas = QuotaManager(limite_diario=1, archivo_datos=archivo)
+    reserva = cuotas.reservar_envio()
+    assert cuotas.reservar_envio() is None
+
+    cuotas.cancelar_reserva(reserva)
+    assert cuotas.mensajes_hoy == 0
+    assert cuotas.reservar_envio() is not None
+
+
+def test_la_reserva_no_supera_el_limite_con_procesos_concurrentes(archivo):
+    QuotaManager(archivo_datos=archivo).conexion.close()
+    reservas = []
+    barrera = threading.Barrier(6)
+
+    def enviar():
+        cuotas = QuotaManager(limite_diario=10, limite_horario=50, archivo_datos=archivo)
+        barrera.wait()
+        for _ in range(5):
+            reserva = cuotas.reservar_envio()
+            if reserva is not None:
+                reservas.append(reserva)
+
+    hilos = [threading.Thread(target=enviar) for _ in range(6)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(reservas) == 10
+    assert len(set(reservas)) == 10
@@ -0,0 +1,76 @@
+import datetime
+
+import pytest
+
+from planificador_envios import ESTADO_ENVIADO, calcular_horario, obtener_plan
+
+LUNES = datetime.date(2026, 1, 5)
+
+
+def a_las(hora, minuto=0, dia=LUNES):
+    return datetime.datetime.combine(dia, datetime.time(hora, minuto))
+
+
+class CuotasStub:
+    limite_diario = 100
+    limite_horario = 100
+    HORA_INICIO = 0
+    HORA_FIN = 23
+    mensajes_hoy = 0
+    historial_horas = ()
+
+    def cargar_datos(self):
+        pass
+
+
+def contactos(sha256):
+    return [{"archivo": f"/salida/{nombre}!{i}!300{i}.pdf", "numero": f"+57300{i}", "nombre": nombre,
+             "sha256": f"{sha256}{i}"} for i, nombre in enumerate(["ANA", "LUIS"])]
+
+
+def test_la_ventana_horaria_arrastra_los_envios_de_la_hora_anterior():
+    horario = calcular_horario(3, limite_diario=100, limite_horario=2, hora_inicio=0, hora_fin=23,
+                               segundos_por_contacto=60, inicio=a_las(10),
+                               envios_ultima_hora=[a_las(9, 30).timestamp()])
+
+    assert horario == [a_las(10), a_las(10, 30), a_las(11)]
+
+
+def test_el_limite_diario_se_reinicia_al_inicio_del_horario_siguiente():
+    horario = calcular_horario(3, limite_diario=2, limite_horario=100, hora_inicio=8, hora_fin=18,
+                               segundos_por_contacto=60, inicio=a_las(17), envios_hoy=1)
+
+    martes = LUNES + datetime.timedelta(days=1)
+    assert horario == [a_las(17), a_las(8, dia=martes), a_las(8, 1, dia=martes)]
+
+
+def test_fuera_de_horario_espera_al_inicio():
+    horario = calcular_horario(1, limite_diario=10, limite_horario=10, hora_inicio=8, hora_fin=18,
+                               segundos_por_contacto=60, inicio=a_las(19))
+
+    assert horario == [a_las(8, dia=LUNES + datetime.timedelta(days=1))]
+
+
+@pytest.mark.parametrize("limites", [
+    dict(limite_diario=0, limite_horario=10, hora_inicio=8, hora_fin=18),
+    dict(limite_diario=10, limite_horario=-1, hora_inicio=8, hora_fin=18),
+    dict(limite_diario=10, limite_horario=10, hora_inicio=19, hora_fin=18),
+    dict(limite_diario=10, limite_horario=10, hora_inicio=8, hora_fin=24),
+])
+def test_limites_que_no_permiten_enviar_son_un_error(limites):
+    with pytest.raises(ValueError):
+        calcular_horario(1, segundos_por_contacto=60, inicio=a_las(10), **limites)
+
+
+def test_obtener_plan_descarta_el_plan_de_otra_generacion(tmp_path):
+    archivo = str(tmp_path / "plan_envio.json")
+    plan = obtener_plan({}, contactos("q1-"), CuotasStub(), archivo=archivo)
+    plan.marcar(contactos("q1-")[0]["archivo"], ESTADO_ENVIADO)
+
+    retomado = obtener_plan({}, contactos("q1-"), CuotasStub(), archivo=archivo)
+    assert retomado.generacion == plan.generacion
+    assert len(retomado.pendientes()) == 1
+
+    nuevo = obtener_plan({}, contactos("q2-"), CuotasStub(), archivo=archivo)
+    assert nuevo.generacion != plan.generacion
+    assert len(nuevo.pendientes()) == 2
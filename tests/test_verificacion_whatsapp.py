@@ -0,0 +1,67 @@
+import pytest
+
+import verificacion_whatsapp
+from verificacion_whatsapp import CacheVerificacion, VerificadorStub, pasada_verificacion
+
+VALIDO = "+573001112233"
+INVALIDO = "+573004445566"
+DESCONOCIDO = "+573007778899"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheVerificacion(archivo=str(tmp_path / "verificacion.db"), dias_vigencia=1)
+    yield cache
+    cache.cerrar()
+
+
+def test_cada_numero_distinto_se_verifica_una_vez(cache):
+    verificador = VerificadorStub(invalidos=[INVALIDO], desconocidos=[DESCONOCIDO])
+
+    resultados = pasada_verificacion([VALIDO, INVALIDO, VALIDO, "", DESCONOCIDO, INVALIDO], verificador, cache)
+
+    assert resultados == {VALIDO: True, INVALIDO: False, DESCONOCIDO: None}
+    assert verificador.consultados == [VALIDO, INVALIDO, DESCONOCIDO]
+    # Lo indeterminado no se guarda: se vuelve a intentar en la siguiente pasada
+    assert cache.obtener(DESCONOCIDO) is None
+    assert cache.es_invalido(INVALIDO)
+
+
+def test_aciertos_del_cache_no_llaman_al_verificador(cache):
+    pasada_verificacion([VALIDO, INVALIDO], VerificadorStub(invalidos=[INVALIDO]), cache)
+
+    verificador = VerificadorStub()
+    resultados = pasada_verificacion([VALIDO, INVALIDO, DESCONOCIDO], verificador, cache)
+
+    assert verificador.consultados == [DESCONOCIDO]
+    assert resultados[INVALIDO] is False
+
+
+def test_resultados_vencidos_se_vuelven_a_verificar(cache, monkeypatch):
+    pasada_verificacion([VALIDO, INVALIDO], VerificadorStub(invalidos=[INVALIDO]), cache)
+
+    ahora = verificacion_whatsapp.time.time()
+    monkeypatch.setattr(verificacion_whatsapp.time, "time", lambda: ahora + cache.ttl_segundos + 1)
+    assert cache.obtener(VALIDO) is None
+
+    verificador = VerificadorStub()
+    resultados = pasada_verificacion([VALIDO, INVALIDO], verificador, cache)
+
+    assert verificador.consultados == [VALIDO, INVALIDO]
+    assert resultados == {VALIDO: True, INVALIDO: True}
+
+
+def test_forzar_ignora_el_cache_y_lo_renueva(cache):
+    pasada_verificacion([VALIDO, INVALIDO], VerificadorStub(invalidos=[INVALIDO]), cache)
+
+    verificador = VerificadorStub(invalidos=[VALIDO])
+    resultados = pasada_verificacion([VALIDO, INVALIDO], verificador, cache, forzar=True)
+
+    assert verificador.consultados == [VALIDO, INVALIDO]
+    assert resultados == {VALIDO: False, INVALIDO: True}
+    assert cache.es_invalido(VALIDO)
+    assert not cache.es_invalido(INVALIDO)
+
+
+def test_archivo_por_defecto_en_la_carpeta_del_proyecto():
+    assert CacheVerificacion.ARCHIVO_DEFECTO.startswith(verificacion_whatsapp.DIRECTORIO_PROYECTO)
@@ -0,0 +1,130 @@
+"""
+Verificación de Números de WhatsApp
+===================================
+
+Pasada independiente que comprueba una sola vez si cada número (E.164) tiene
+WhatsApp y guarda el resultado con vigencia (TTL) en una base SQLite local.
+El envío consulta este caché para saltar los números ya conocidos como
+inválidos sin gastar una carga de página ni la recarga posterior.
+
+La comprobación en sí es cualquier función `numero -> Optional[bool]`
+(True = válido, False = inválido, None = no se pudo determinar), de modo que
+la pasada puede ejecutarse contra el navegador real o contra `VerificadorStub`.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from configuracion import DIRECTORIO_PROYECTO
+
+
+class CacheVerificacion:
+    """Resultados de verificación por número E.164 con vigencia configurable"""
+
+    ARCHIVO_DEFECTO = os.path.join(DIRECTORIO_PROYECTO, "verificacion_whatsapp.db")
+    DIAS_VIGENCIA_DEFECTO = 30
+
+    def __init__(self, archivo: Optional[str] = None, dias_vigencia: Optional[float] = None):
+        self.archivo = archivo or self.ARCHIVO_DEFECTO
+        dias = self.DIAS_VIGENCIA_DEFECTO if dias_vigencia is None else dias_vigencia
+        self.ttl_segundos = dias * 24 * 3600
+        # WAL + timeout: varias líneas (procesos) pueden consultar y escribir a la vez
+        self.conexion = sqlite3.connect(self.archivo, timeout=30)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS verificaciones ("
+            " numero TEXT PRIMARY KEY,"
+            " valido INTEGER NOT NULL,"
+            " verificado_en REAL NOT NULL)"
+        )
+        self.conexion.commit()
+
+    def obtener(self, numero: str) -> Optional[bool]:
+        """Resultado vigente para el número, o None si no hay o ya venció"""
+        fila = self.conexion.execute(
+            "SELECT valido FROM verificaciones WHERE numero = ? AND verificado_en >= ?",
+            (numero, time.time() - self.ttl_segundos)
+        ).fetchone()
+        return None if fila is None else bool(fila[0])
+
+    def obtener_varios(self, numeros: Iterable[str]) -> Dict[str, bool]:
+        """Resultados vigentes para varios números en una sola consulta"""
+        numeros = list(dict.fromkeys(numeros))
+        if not numeros:
+            return {}
+        marcadores = ",".join("?" * len(numeros))
+        filas = self.conexion.execute(
+            f"SELECT numero, valido FROM verificaciones "
+            f"WHERE verificado_en >= ? AND numero IN ({marcadores})",
+            (time.time() - self.ttl_segundos, *numeros)
+        ).fetchall()
+        return {numero: bool(valido) for numero, valido in filas}
+
+    def guardar(self, numero: str, valido: bool):
+        """Registra (o renueva) el resultado de un número"""
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO verificaciones (numero, valido, verificado_en) VALUES (?, ?, ?)",
+            (numero, int(bool(valido)), time.time())
+        )
+        self.conexion.commit()
+
+    def es_invalido(self, numero: str) -> bool:
+        """True solo si hay un resultado vigente que marca el número como inválido"""
+        return self.obtener(numero) is False
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+class VerificadorStub:
+    """
+    Verificador local para pruebas: responde según conjuntos predefinidos,
+    sin navegador. Los números que no estén en `invalidos` se consideran
+    válidos, salvo los de `desconocidos`, que retornan None.
+    """
+
+    def __init__(self, invalidos: Iterable[str] = (), desconocidos: Iterable[str] = ()):
+        self.invalidos: Set[str] = set(invalidos)
+        self.desconocidos: Set[str] = set(desconocidos)
+        self.consultados = []
+
+    def __call__(self, numero: str) -> Optional[bool]:
+        self.consultados.append(numero)
+        if numero in self.desconocidos:
+            return None
+        return numero not in self.invalidos
+
+
+def pasada_verificacion(numeros: Iterable[str], verificador: Callable[[str], Optional[bool]],
+                        cache: CacheVerificacion, forzar: bool = False) -> Dict[str, Optional[bool]]:
+    """
+    Verifica cada número distinto una sola vez, consultando primero el caché.
+
+    Args:
+        numeros: Números en formato E.164 (se ignoran repetidos y vacíos)
+        verificador: Función que determina si un número tiene WhatsApp
+        cache: Caché donde se consultan y guardan los resultados
+        forzar: Si es True, ignora los resultados vigentes y vuelve a verificar
+
+    Returns:
+        Diccionario numero -> True/False/None con el estado de cada número
+    """
+    numeros = [n for n in dict.fromkeys(numeros) if n]
+    resultados: Dict[str, Optional[bool]] = {} if forzar else cache.obtener_varios(numeros)
+    pendientes = [n for n in numeros if n not in resultados]
+
+    print(f"🔎 Verificando {len(pendientes)} números ({len(numeros) - len(pendientes)} ya en caché)")
+    for i, numero in enumerate(pendientes, 1):
+        valido = verificador(numero)
+        resultados[numero] = valido
+        if valido is None:
+            print(f"⚠️ [{i}/{len(pendientes)}] No se pudo verificar {numero}")
+            continue
+        cache.guardar(numero, valido)
+        print(f"{'✅' if valido else '❌'} [{i}/{len(pendientes)}] {numero}: {'válido' if valido else 'sin WhatsApp'}")
+
+    invalidos = sum(1 for v in resultados.values() if v is False)
+    print(f"📊 Verificación terminada: {len(numeros)} números, {invalidos} sin WhatsApp")
+    return resultados